@@ -0,0 +1,227 @@
+"""
+Answers many filter queries from one load of the sales data, without
+prompting, so it can run from cron.
+
+    python3 batch.py --spec region=North --spec "region=East min=1000 max=50000"
+    python3 batch.py --specs-file specs.txt --output-dir output/batch
+
+A spec is a list of key=value pairs, separated by spaces or commas:
+region, min, max and an optional name for the report file. Amounts may
+use thousands separators (min=10,000). An empty spec covers all valid transactions.
+A specs file holds one spec per line; blank lines and lines starting
+with # are skipped.
+
+The file is read, parsed and validated once, and the catalog is fetched
+and every valid row enriched once. Each spec is then answered from an
+index over the valid rows. Identical specs share one set of aggregates,
+and a spec without filters reuses the aggregates from the load.
+"""
+
+import argparse
+import os
+import re
+import shlex
+import sys
+
+from main import DATA_FILE, load_catalog
+from utils.api_handler import enrich_sales_data
+from utils.data_processor import enrichment_stats, generate_sales_report
+from utils.parallel import load_sales
+from utils.sales_summary import SalesSummary
+from utils.transaction_index import TransactionIndex
+from utils.transaction_table import TransactionTable
+
+
+OUTPUT_DIR = "output/batch"
+
+SPEC_KEYS = {"name", "region", "min", "max"}
+
+
+# A comma separates pairs only where another key= follows, so amounts
+# such as min=10,000 keep their thousands separators
+PAIR_SEPARATOR = re.compile(r",(?=\s*[A-Za-z]+=)")
+
+
+def _spec_tokens(text):
+    for token in shlex.split(text):
+        for pair in PAIR_SEPARATOR.split(token):
+            pair = pair.strip(",")
+            if pair:
+                yield pair
+
+
+def parse_spec(text):
+    """
+    Parses a spec such as "region=North min=1000"
+
+    Returns: dict with name, region, min_amount and max_amount
+    """
+
+    spec = {"name": None, "region": None, "min_amount": None, "max_amount": None}
+
+    for token in _spec_tokens(text):
+        key, sep, value = token.partition("=")
+        key = key.strip().lower()
+        if not sep or key not in SPEC_KEYS:
+            raise ValueError(f"Invalid filter '{token}', expected one of "
+                             f"{', '.join(sorted(SPEC_KEYS))} as key=value")
+
+        value = value.strip()
+        if key in ("min", "max"):
+            try:
+                spec[f"{key}_amount"] = float(value.replace(",", "")) if value else None
+            except ValueError:
+                raise ValueError(f"Invalid amount '{value}' for {key}") from None
+        else:
+            spec[key] = value or None
+
+    return spec
+
+
+def read_specs_file(filename):
+    """
+    Reads one spec per line
+
+    Returns: list of spec dictionaries
+    """
+
+    specs = []
+
+    with open(filename, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                specs.append(parse_spec(line))
+            except ValueError as e:
+                raise ValueError(f"{filename}, line {number}: {e}") from None
+
+    return specs
+
+
+def spec_name(spec):
+    """
+    Returns the report name of a spec, built from its filters if it has
+    no name
+    """
+
+    if spec["name"]:
+        name = spec["name"]
+    else:
+        parts = []
+        if spec["region"]:
+            parts.append(spec["region"])
+        if spec["min_amount"] is not None:
+            parts.append(f"min{spec['min_amount']:g}")
+        if spec["max_amount"] is not None:
+            parts.append(f"max{spec['max_amount']:g}")
+        name = "_".join(parts) or "all"
+
+    return re.sub(r"[^A-Za-z0-9._-]+", "-", name).strip("-") or "report"
+
+
+def run_batch(specs, data_file=DATA_FILE, output_dir=OUTPUT_DIR, workers=1,
+              start_date=None, end_date=None):
+    """
+    Loads the data once and writes one report per spec into output_dir.
+    data_file may be a directory or glob of partitions, start_date and
+    end_date limit the data to a date window.
+
+    Returns: list of (spec, report path, matching transaction count)
+    """
+
+    print(f"Reading {data_file}...")
+    result = load_sales(data_file, workers, start_date, end_date, keep_rows=True)
+    table = result["transactions"] or TransactionTable()
+    invalid_count = result["filter_summary"]["invalid"]
+    print(f"✓ {len(table)} valid transactions, {invalid_count} invalid")
+
+    index = TransactionIndex(
+        table,
+        total_input=result["filter_summary"]["total_input"],
+        invalid_count=invalid_count
+    )
+
+    print("Fetching product data from API...")
+    _, product_mapping, name_index = load_catalog()
+    enriched = enrich_sales_data(table, product_mapping, name_index)
+    print(f"✓ Enriched {enrichment_stats(enriched)['enriched_count']}/{len(enriched)} transactions")
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    # (region, min, max) -> (transactions, summary, enriched, enrichment)
+    answers = {}
+    used_names = set()
+    reports = []
+
+    for spec in specs:
+        key = (spec["region"], spec["min_amount"], spec["max_amount"])
+
+        if key not in answers:
+            if key == (None, None, None):
+                transactions = table
+                summary = result["summary"]
+                subset = enriched
+            else:
+                rows = index.select(*key)
+                transactions = table.take(rows)
+                summary = SalesSummary.from_transactions(transactions)
+                subset = enriched.take(rows)
+            answers[key] = (transactions, summary, subset, enrichment_stats(subset))
+
+        transactions, summary, subset, enrichment = answers[key]
+
+        name = spec_name(spec)
+        unique = name
+        suffix = 2
+        while unique in used_names:
+            unique = f"{name}-{suffix}"
+            suffix += 1
+        used_names.add(unique)
+
+        report_path = generate_sales_report(
+            transactions, subset,
+            output_file=os.path.join(output_dir, unique + ".txt"),
+            summary=summary,
+            enrichment=enrichment
+        )
+        print(f"✓ {unique}: {len(transactions)} transactions -> {report_path}")
+        reports.append((spec, report_path, len(transactions)))
+
+    return reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Write one sales report per filter spec from a single load of the data"
+    )
+    parser.add_argument("--spec", action="append", default=[],
+                        help='filter spec such as "region=North min=1000 max=50000", repeatable')
+    parser.add_argument("--specs-file", help="file with one spec per line")
+    parser.add_argument("--data-file", default=DATA_FILE,
+                        help="sales file, or a directory or glob of partition files")
+    parser.add_argument("--start-date", help="first date to include, YYYY-MM-DD")
+    parser.add_argument("--end-date", help="last date to include, YYYY-MM-DD")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes used to read the data file (default 1)")
+    args = parser.parse_args(argv)
+
+    try:
+        specs = [parse_spec(text) for text in args.spec]
+        if args.specs_file:
+            specs.extend(read_specs_file(args.specs_file))
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    if not specs:
+        parser.error("no specs given, use --spec or --specs-file")
+
+    run_batch(specs, args.data_file, args.output_dir, args.workers,
+              args.start_date, args.end_date)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+Writes synthetic sales files in the data/sales_data.txt format, with the
+same kinds of dirt the real file has, for benchmarking.
+
+    python3 -m benchmarks.generate_data data/sales_1m.txt --rows 1M --seed 7
+"""
+
+import argparse
+import random
+from datetime import date, timedelta
+
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region"
+
+REGIONS = ["North", "South", "East", "West"]
+
+# The products of the real data file: (name, typical unit price)
+BASE_PRODUCTS = [
+    ("Laptop", 60000),
+    ("Mouse", 500),
+    ("Keyboard", 2500),
+    ("Monitor", 12000),
+    ("Webcam", 3000),
+    ("Headphones", 2800),
+    ("USB Cable", 250),
+    ("Wireless Mouse", 900),
+    ("External Hard Drive", 4000),
+    ("Laptop Charger", 1900)
+]
+
+SUFFIXES = ["", "", "", " Pro", " Premium", " HD", " Mini"]
+
+# Rows are written in chunks of this many lines
+CHUNK_SIZE = 10000
+
+
+def parse_count(text):
+    """
+    Parses a row count such as 1000, 10K or 50M
+    """
+
+    text = text.strip().upper()
+    scale = {"K": 1000, "M": 1000000}.get(text[-1:], 1)
+    if scale != 1:
+        text = text[:-1]
+    return int(float(text) * scale)
+
+
+def make_products(count, seed=0):
+    """
+    Returns count (product id, name, unit price) tuples, the real file's
+    products first
+    """
+
+    rng = random.Random(seed)
+    products = []
+
+    for i in range(count):
+        name, price = BASE_PRODUCTS[i % len(BASE_PRODUCTS)]
+        if i >= len(BASE_PRODUCTS):
+            name = f"{name}{rng.choice(SUFFIXES)} {i // len(BASE_PRODUCTS)}"
+            price = max(50, int(price * rng.uniform(0.5, 1.5)))
+        products.append((f"P{101 + i}", name, price))
+
+    return products
+
+
+def make_catalog(products, seed=0):
+    """
+    Returns a product catalog in the cleaned fetch_all_products shape:
+    about half the products match by id, a quarter only by name
+    """
+
+    rng = random.Random(seed)
+    catalog = []
+    next_id = 101 + len(products)
+
+    for product_id, name, price in products:
+        roll = rng.random()
+        if roll < 0.5:
+            api_id = int(product_id[1:])
+        elif roll < 0.75:
+            api_id = next_id
+            next_id += 1
+        else:
+            continue
+
+        catalog.append({
+            "id": api_id,
+            "title": name,
+            "category": rng.choice(["laptops", "accessories", "electronics"]),
+            "brand": rng.choice(["Acme", "Globex", "Initech", None]),
+            "price": price / 80
+        })
+
+    return catalog
+
+
+# Share of rows priced in rupees and paise, as in "1916.50"
+DECIMAL_PRICES = 0.25
+
+# Non-canonical forms of a date, which the columnar table rejects
+DATE_FORMATS = ["%Y/%m/%d", "%Y%m%d", "%d-%m-%Y"]
+
+# Above the int64 range a TransactionTable column holds
+OVERFLOW_QUANTITY = 99999999999999999999
+
+
+def _money(value, rng, dirt):
+    places = ".2f" if isinstance(value, float) else ""
+    text = format(value, places)
+    # Thousands separators, as in "1,916"
+    if value >= 1000 and rng.random() < dirt * 4:
+        text = format(value, "," + places)
+    return text
+
+
+def generate_lines(rows, seed=0, dirt=0.05, products=200, customers=None,
+                   start=date(2024, 1, 1), days=365):
+    """
+    Yields rows data lines (without newlines), reproducible from seed.
+
+    dirt is the rough share of rows with a problem: invalid ids, zero
+    quantities, missing regions, commas in names, blank and malformed lines,
+    dates not in YYYY-MM-DD form and quantities too large for int64. About
+    DECIMAL_PRICES of the prices have two decimals.
+    """
+
+    rng = random.Random(seed)
+    catalog = make_products(products, seed)
+    customers = customers or max(10, rows // 20)
+    days_ = [start + timedelta(days=i) for i in range(days)]
+    dates = [day.isoformat() for day in days_]
+
+    random_ = rng.random
+    randrange = rng.randrange
+
+    for i in range(rows):
+        product_id, name, price = catalog[randrange(len(catalog))]
+        transaction_id = f"T{i + 1:03d}"
+        customer_id = f"C{randrange(customers) + 1:03d}"
+        region = REGIONS[randrange(len(REGIONS))]
+        quantity = randrange(1, 11)
+        unit_price = max(1, int(price * (0.8 + 0.4 * random_())))
+        if random_() < DECIMAL_PRICES:
+            unit_price = max(1.0, round(price * (0.8 + 0.4 * random_()), 2))
+        date_str = dates[randrange(days)]
+
+        if random_() < dirt:
+            kind = randrange(10)
+            if kind == 0:
+                transaction_id = "X" + transaction_id[1:]
+            elif kind == 1:
+                product_id = product_id[1:]
+            elif kind == 2:
+                customer_id = ""
+            elif kind == 3:
+                quantity = 0
+            elif kind == 4:
+                region = ""
+            elif kind == 5:
+                name = name.replace(" ", ",", 1) if " " in name else name + ",Premium"
+            elif kind == 6:
+                # A blank line stands in for the row
+                yield ""
+                continue
+            elif kind == 7:
+                yield f"{transaction_id}|{date_str}|{product_id}|{name}"
+                continue
+            elif kind == 8:
+                date_str = days_[randrange(days)].strftime(DATE_FORMATS[randrange(len(DATE_FORMATS))])
+            else:
+                quantity = OVERFLOW_QUANTITY
+
+        yield "|".join([
+            transaction_id,
+            date_str,
+            product_id,
+            name,
+            str(quantity),
+            _money(unit_price, rng, dirt),
+            customer_id,
+            region
+        ])
+
+
+def write_sales_file(filename, rows, seed=0, dirt=0.05, products=200, customers=None):
+    """
+    Writes a sales file with a header and rows generated lines
+    """
+
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(HEADER + "\n")
+        chunk = []
+        for line in generate_lines(rows, seed, dirt, products, customers):
+            chunk.append(line)
+            if len(chunk) == CHUNK_SIZE:
+                f.write("\n".join(chunk) + "\n")
+                chunk = []
+        if chunk:
+            f.write("\n".join(chunk) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic sales data file")
+    parser.add_argument("output", help="file to write")
+    parser.add_argument("--rows", type=parse_count, default=parse_count("10K"),
+                        help="data lines to write, e.g. 1000, 10K, 50M (default 10K)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dirt", type=float, default=0.05,
+                        help="share of rows with a problem (default 0.05)")
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--customers", type=int, default=None,
+                        help="distinct customers (default rows / 20)")
+    args = parser.parse_args(argv)
+
+    write_sales_file(args.output, args.rows, args.seed, args.dirt, args.products, args.customers)
+    print(f"Wrote {args.rows} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Times every pipeline stage on generated sales files and compares the
+results with a saved baseline.
+
+    python3 -m benchmarks.run_benchmarks --rows 1K 100K 1M --save-baseline
+    python3 -m benchmarks.run_benchmarks --rows 1K 100K 1M
+
+Each stage reports wall time, rows per second (rows going into the stage)
+and the peak resident set size while it ran. The second command exits
+with status 1 if a stage got slower than the baseline by more than the
+tolerance.
+
+With --fetch the product catalog fetch is timed too, against a local
+stub of the products API (see benchmarks/stub_api.py) that adds
+--fetch-latency seconds to every request: paged with one worker, paged
+with the default workers, and revalidating a cached copy (304).
+
+    python3 -m benchmarks.run_benchmarks --rows 10K --fetch --fetch-products 2K
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.generate_data import make_catalog, make_products, parse_count, write_sales_file
+from benchmarks.stub_api import StubCatalogServer
+from utils.api_handler import FETCH_WORKERS, create_product_mapping, enrich_sales_data, fetch_product_catalog
+from utils.data_processor import (
+    parse_transactions,
+    validate_and_filter,
+    calculate_total_revenue,
+    region_wise_sales,
+    top_selling_products,
+    customer_analysis,
+    daily_sales_trend,
+    find_peak_sales_day,
+    low_performing_products,
+    generate_sales_report
+)
+from utils.file_handler import read_sales_data
+
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Seconds between resident set size samples while a stage runs
+RSS_INTERVAL = 0.005
+
+PRODUCTS = 200
+
+
+def _current_rss():
+    """
+    Returns the resident set size in bytes, or None where /proc is missing
+    """
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _max_rss():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PeakRSS:
+    """
+    Samples the resident set size in a thread while the block runs.
+    Without /proc the process-wide peak so far is reported instead.
+    """
+
+    def __enter__(self):
+        self.peak = _current_rss()
+        if self.peak is None:
+            return self
+
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._done.wait(RSS_INTERVAL):
+            self.peak = max(self.peak, _current_rss())
+
+    def __exit__(self, *exc):
+        if self.peak is None:
+            self.peak = _max_rss()
+            return
+
+        self._done.set()
+        self._thread.join()
+        self.peak = max(self.peak, _current_rss())
+
+
+def run_stages(filename, product_mapping, report_file, columnar=False, repeat=1):
+    """
+    Runs the pipeline stage by stage on one file.
+
+    Returns: {stage: {"seconds", "rows_in", "rows_out", "rows_per_sec",
+    "peak_rss_mb"}} in stage order, timings are the best of repeat runs
+    """
+
+    results = {}
+
+    def stage(name, rows_in, func, *args, **kwargs):
+        best = None
+        for _ in range(repeat):
+            with PeakRSS() as rss:
+                start = time.perf_counter()
+                value = func(*args, **kwargs)
+                seconds = time.perf_counter() - start
+            if best is None or seconds < best[0]:
+                best = (seconds, rss.peak)
+
+        seconds, peak = best
+        # validate_and_filter returns a tuple, the analytics functions
+        # return groups, the report returns its path
+        output = value[0] if isinstance(value, tuple) else value
+        rows_out = len(output) if isinstance(output, (list, dict)) or hasattr(output, "amounts") else None
+        # Reading has no rows going in, rate it by the lines it returns
+        rows = rows_out if rows_in is None else rows_in
+        results[name] = {
+            "seconds": round(seconds, 6),
+            "rows_in": rows_in,
+            "rows_out": rows_out,
+            "rows_per_sec": round(rows / seconds, 1) if seconds else None,
+            "peak_rss_mb": round(peak / 2 ** 20, 1)
+        }
+        return value
+
+    lines = stage("read_sales_data", None, read_sales_data, filename)
+    parsed = stage("parse_transactions", len(lines), parse_transactions, lines, columnar=columnar)
+    valid, _, _ = stage("validate_and_filter", len(parsed), validate_and_filter, parsed)
+
+    n = len(valid)
+    stage("calculate_total_revenue", n, calculate_total_revenue, valid)
+    stage("region_wise_sales", n, region_wise_sales, valid)
+    stage("top_selling_products", n, top_selling_products, valid)
+    stage("customer_analysis", n, customer_analysis, valid)
+    stage("daily_sales_trend", n, daily_sales_trend, valid)
+    stage("find_peak_sales_day", n, find_peak_sales_day, valid)
+    stage("low_performing_products", n, low_performing_products, valid)
+
+    enriched = stage("enrich_sales_data", n, enrich_sales_data, valid, product_mapping)
+    stage("generate_sales_report", n, generate_sales_report, valid, enriched, report_file)
+
+    return results
+
+
+def run_fetch(catalog, latency, cache_dir, repeat=1):
+    """
+    Times fetch_product_catalog against a StubCatalogServer serving
+    catalog: a full paged fetch with one worker and with FETCH_WORKERS,
+    then revalidating a cached copy that is past its ttl.
+
+    Returns: {stage: stats} as run_stages, rows being products
+    """
+
+    results = {}
+    cache_file = os.path.join(cache_dir, "product_catalog.json")
+
+    def quiet(message):
+        pass
+
+    with StubCatalogServer(catalog, latency) as server:
+        def stage(name, **kwargs):
+            best = None
+            for _ in range(repeat):
+                with PeakRSS() as rss:
+                    start = time.perf_counter()
+                    products, _ = fetch_product_catalog(server.url, log=quiet, **kwargs)
+                    seconds = time.perf_counter() - start
+                if best is None or seconds < best[0]:
+                    best = (seconds, rss.peak)
+
+            seconds, peak = best
+            results[name] = {
+                "seconds": round(seconds, 6),
+                "rows_in": len(catalog),
+                "rows_out": len(products),
+                "rows_per_sec": round(len(catalog) / seconds, 1) if seconds else None,
+                "peak_rss_mb": round(peak / 2 ** 20, 1)
+            }
+
+        stage("fetch_catalog_1_worker", cache_file=None, workers=1)
+        stage("fetch_catalog", cache_file=None, workers=FETCH_WORKERS)
+
+        # One fetch fills the cache, the timed ones only revalidate it
+        fetch_product_catalog(server.url, cache_file=cache_file, log=quiet)
+        stage("revalidate_catalog", cache_file=cache_file, ttl=0)
+
+    return results
+
+
+def _label(size):
+    # Row counts are keyed by number, the fetch stages by name
+    return f"{size} rows" if size.isdigit() else size
+
+
+def compare(results, baseline, tolerance):
+    """
+    Prints each stage's throughput against the baseline.
+
+    Returns: list of (size, stage) pairs slower than the baseline by more
+    than tolerance
+    """
+
+    regressions = []
+
+    for size, stages in results.items():
+        base_stages = baseline.get(size)
+        if not base_stages:
+            print(f"\n{_label(size)}: no baseline")
+            continue
+
+        print(f"\n{_label(size)} vs baseline:")
+        for name, stats in stages.items():
+            base = base_stages.get(name)
+            if not base or not base["rows_per_sec"] or not stats["rows_per_sec"]:
+                continue
+            ratio = stats["rows_per_sec"] / base["rows_per_sec"]
+            flag = ""
+            if ratio < 1 - tolerance:
+                flag = "  REGRESSION"
+                regressions.append((size, name))
+            print(f"  {name:<24} {ratio:6.2f}x{flag}")
+
+    return regressions
+
+
+def print_results(size, stages):
+    print(f"\n{_label(str(size))}:")
+    print(f"  {'stage':<24} {'seconds':>10} {'rows/sec':>14} {'peak RSS MB':>12}")
+    for name, stats in stages.items():
+        rate = stats["rows_per_sec"]
+        rate = f"{rate:,.0f}" if rate is not None else "-"
+        print(f"  {name:<24} {stats['seconds']:>10.4f} {rate:>14} {stats['peak_rss_mb']:>12.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the sales pipeline stages")
+    parser.add_argument("--rows", type=parse_count, nargs="+", default=[parse_count("10K")],
+                        help="file sizes to benchmark, e.g. 1K 100K 1M (default 10K)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dirt", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=1, help="runs per stage, the best counts")
+    parser.add_argument("--columnar", action="store_true", help="parse into a TransactionTable")
+    parser.add_argument("--data-dir", help="keep generated files here and reuse them")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="save results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed throughput drop before a stage is flagged (default 0.2)")
+    parser.add_argument("--output", help="also write the results as JSON here")
+    parser.add_argument("--fetch", action="store_true",
+                        help="also time the catalog fetch against a local stub API")
+    parser.add_argument("--fetch-products", type=parse_count, default=parse_count("1K"),
+                        help="products the stub API serves (default 1K)")
+    parser.add_argument("--fetch-latency", type=float, default=0.05,
+                        help="seconds the stub API waits per request (default 0.05)")
+    args = parser.parse_args(argv)
+
+    catalog = make_catalog(make_products(PRODUCTS, args.seed), args.seed)
+    product_mapping = create_product_mapping(catalog)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = args.data_dir or temp_dir
+        report_file = os.path.join(temp_dir, "sales_report.txt")
+        results = {}
+
+        for rows in args.rows:
+            filename = os.path.join(data_dir, f"sales_{rows}_{args.seed}_{args.dirt}.txt")
+            if not os.path.exists(filename):
+                write_sales_file(filename, rows, args.seed, args.dirt, PRODUCTS)
+
+            stages = run_stages(filename, product_mapping, report_file, args.columnar, args.repeat)
+            results[str(rows)] = stages
+            print_results(rows, stages)
+
+        if args.fetch:
+            fetch_catalog = make_catalog(make_products(args.fetch_products, args.seed), args.seed)
+            stages = run_fetch(fetch_catalog, args.fetch_latency, temp_dir, args.repeat)
+            results["fetch"] = stages
+            print_results("fetch", stages)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        print(f"\nNo baseline at {args.baseline}, run with --save-baseline to create one")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} stage(s) regressed by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Local stand-in for the DummyJSON products endpoint, so the catalog fetch
+can be benchmarked without the network.
+
+    with StubCatalogServer(catalog, latency=0.05) as server:
+        fetch_product_catalog(server.url, cache_file=None)
+
+Pages follow the API: limit and skip select the products, the body
+carries products and total, limit is capped at max_page_size, and a
+request whose If-None-Match matches the ETag gets 304 Not Modified.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubCatalogServer:
+    """
+    Serves catalog (a list of product dicts) on a free local port from a
+    background thread. Every request waits latency seconds first, like a
+    round trip to the real API, and requests counts the requests served.
+    """
+
+    def __init__(self, catalog, latency=0.0, max_page_size=100, etag='"catalog-v1"'):
+        self.catalog = catalog
+        self.latency = latency
+        self.max_page_size = max_page_size
+        self.etag = etag
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/products"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                if self.headers.get("If-None-Match") == stub.etag:
+                    self.send_response(304)
+                    self.send_header("ETag", stub.etag)
+                    self.end_headers()
+                    return
+
+                query = parse_qs(urlparse(self.path).query)
+                try:
+                    limit = int(query.get("limit", ["30"])[0])
+                    skip = int(query.get("skip", ["0"])[0])
+                except ValueError:
+                    self.send_error(400, "limit and skip must be integers")
+                    return
+
+                limit = min(max(limit, 0), stub.max_page_size)
+                body = json.dumps({
+                    "products": stub.catalog[skip:skip + limit],
+                    "total": len(stub.catalog),
+                    "skip": skip,
+                    "limit": limit
+                }).encode("utf-8")
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", stub.etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
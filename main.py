@@ -1,53 +1,142 @@
-from utils.file_handler import read_sales_data
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import metrics
+from utils.incremental import default_state_file, refresh_state, save_state
+from utils.parallel import load_sales
+from utils.file_handler import detect_compression
+from utils.partitions import is_partitioned
+from utils.sales_summary import SalesSummary
+from utils.sketches import Approximation
 from utils.data_processor import (
-    parse_transactions,
     validate_and_filter,
-    calculate_total_revenue,
-    region_wise_sales,
-    top_selling_products,
-    customer_analysis,
-    daily_sales_trend,
-    find_peak_sales_day,
-    low_performing_products,
+    enrichment_stats,
     generate_sales_report
 )
 from utils.api_handler import (
-    fetch_all_products,
-    create_product_mapping,
+    ProductNameIndex,
+    fetch_product_catalog,
     enrich_sales_data,
     save_enriched_data
 )
 
-def main():
+DATA_FILE = "data/sales_data.txt"
+
+# Where the enriched rows are saved, per format (see save_enriched_data)
+ENRICHED_FILES = {
+    "text": "data/enriched_sales_data.txt",
+    "columnar": "data/enriched_sales_data.scol"
+}
+
+
+def load_catalog(log=print):
+    """
+    Fetches the product catalog and indexes its titles for enrichment
+
+    Returns: (api_products, product_mapping, name_index)
+    """
+
+    api_products, product_mapping = fetch_product_catalog(log=log)
+    return api_products, product_mapping, ProductNameIndex(product_mapping)
+
+
+def main(workers=1, incremental=False, prefetch=True, collect_metrics=False,
+         trace_memory=True, approximate=False, data_source=DATA_FILE,
+         start_date=None, end_date=None, enriched_format="text"):
+    # data_source may also be a directory or glob of partition files (one
+    # per day or store); with start_date / end_date (YYYY-MM-DD) only the
+    # partitions and rows in that window are read
+
+    # enriched_format="columnar" saves the enriched rows as typed binary
+    # columns that load memory-mapped (columnar_file.ColumnarFile)
+    # instead of pipe-delimited text
+    enriched_file = ENRICHED_FILES[enriched_format]
+
+    # approximate=True (or an Approximation with custom error bounds)
+    # keeps customer and daily unique counts in fixed-size sketches, the
+    # report marks the estimated figures
+    if approximate is True:
+        approximate = Approximation()
+    approximate = approximate or None
+
+    # With collect_metrics, per-stage and per-function timings, row counts
+    # and (with trace_memory) allocation peaks are written to
+    # sales_metrics.json next to the report
+    collector = metrics.enable(trace_memory) if collect_metrics else None
+
     try:
         print("=" * 40)
         print("SALES ANALYTICS SYSTEM")
         print("=" * 40)
 
-        # [1] Read data
-        print("\n[1/10] Reading sales data...")
-        raw_lines = read_sales_data("data/sales_data.txt")
-        print(f"✓ Successfully read {len(raw_lines)} transactions")
+        if incremental and (
+            is_partitioned(data_source) or start_date or end_date
+            or (os.path.isfile(data_source) and detect_compression(data_source))
+        ):
+            print("Incremental mode needs a single uncompressed data file without a date window, "
+                  "reading everything.")
+            incremental = False
+
+        # With prefetch the catalog is fetched in a background thread
+        # while steps 1-5 run; its messages are held back until step 6
+        if prefetch:
+            catalog_messages = []
+            catalog_pool = ThreadPoolExecutor(max_workers=1)
+            catalog_future = catalog_pool.submit(load_catalog, catalog_messages.append)
+            catalog_pool.shutdown(wait=False)
 
+        # [1] Read data
         # [2] Parse
-        print("\n[2/10] Parsing and cleaning data...")
-        parsed = parse_transactions(raw_lines)
-        print(f"✓ Parsed {len(parsed)} records")
+        # Lines are streamed in batches, parsed, validated and aggregated
+        # as they arrive; with workers > 1 byte ranges of the file are
+        # processed in parallel and the partial results merged
+        print("\n[1/10] Reading sales data...")
+        print("[2/10] Parsing and cleaning data...")
+        with metrics.stage("read_and_parse") as record:
+            if incremental:
+                # Only lines appended since the last run are read, the saved
+                # aggregates cover the rest
+                state, result, rebuilt = refresh_state(
+                    data_source, workers=workers, approximate=approximate
+                )
+                totals = state["result"]
+                if rebuilt:
+                    print("✓ No usable saved state, rebuilt from the full file")
+                else:
+                    print(f"✓ Read {result['raw_count']} new lines since the last run")
+            else:
+                result = load_sales(
+                    data_source, workers, start_date, end_date,
+                    keep_rows=True, approximate=approximate
+                )
+                totals = result
+            record["rows_in"] = result["raw_count"]
+            record["rows_out"] = result["filter_summary"]["final_count"]
+        print(f"✓ Successfully read {totals['raw_count']} transactions")
+        print(f"✓ Parsed {totals['parsed_count']} records")
 
         # [3] Filter options
-        regions = sorted({tx["Region"] for tx in parsed if tx.get("Region")})
-        amounts = [tx["Quantity"] * tx["UnitPrice"] for tx in parsed]
+        regions = sorted(r for r in totals["regions"] if r)
 
         print("\n[3/10] Filter Options Available:")
         print("Regions:", ", ".join(regions))
-        print(f"Amount Range: ₹{int(min(amounts))} - ₹{int(max(amounts))}")
-
-        use_filter = input("\nDo you want to filter data? (y/n): ").strip().lower()
+        if totals["min_amount"] is None:
+            print("Amount Range: no transactions")
+        else:
+            print(f"Amount Range: ₹{int(totals['min_amount'])} - ₹{int(totals['max_amount'])}")
 
         region_filter = None
         min_amount = None
         max_amount = None
 
+        if incremental:
+            # Saved aggregates are unfiltered
+            print("Filtering is not available in incremental mode.")
+            use_filter = "n"
+        else:
+            use_filter = input("\nDo you want to filter data? (y/n): ").strip().lower()
+
         if use_filter == "y":
             region_filter = input("Enter region (or press Enter to skip): ").strip()
             region_filter = region_filter if region_filter else None
@@ -58,50 +147,85 @@ def main():
             min_amount = float(min_val) if min_val else None
             max_amount = float(max_val) if max_val else None
 
+        filters_applied = region_filter or min_amount is not None or max_amount is not None
+
         # [4] Validate
+        # Rows came back already validated, only the filters are left
         print("\n[4/10] Validating transactions...")
-        valid_transactions, invalid_count, summary = validate_and_filter(
-            parsed,
-            region=region_filter,
-            min_amount=min_amount,
-            max_amount=max_amount
-        )
-        print(f"✓ Valid: {len(valid_transactions)} | Invalid: {invalid_count}")
+        with metrics.stage("filter", len(result["transactions"] or ())) as record:
+            valid_transactions, _, filter_summary = validate_and_filter(
+                result["transactions"],
+                region=region_filter,
+                min_amount=min_amount,
+                max_amount=max_amount
+            )
+            record["rows_out"] = len(valid_transactions)
+        invalid_count = totals["filter_summary"]["invalid"]
+        valid_count = filter_summary["final_count"] if filters_applied else len(totals["summary"])
+        print(f"✓ Valid: {valid_count} | Invalid: {invalid_count}")
 
         # [5] Analysis
+        # One pass builds every aggregate, the report reads from it later
         print("\n[5/10] Analyzing sales data...")
-        calculate_total_revenue(valid_transactions)
-        region_wise_sales(valid_transactions)
-        top_selling_products(valid_transactions)
-        customer_analysis(valid_transactions)
-        daily_sales_trend(valid_transactions)
-        find_peak_sales_day(valid_transactions)
-        low_performing_products(valid_transactions)
+        with metrics.stage("analysis", len(valid_transactions)) as record:
+            if filters_applied:
+                summary = SalesSummary.from_transactions(valid_transactions, approximate)
+            else:
+                summary = totals["summary"]
+            record["rows_out"] = len(summary)
         print("✓ Analysis complete")
 
         # [6] API fetch
         print("\n[6/10] Fetching product data from API...")
-        api_products = fetch_all_products()
-        product_mapping = create_product_mapping(api_products)
+        # Served from data/product_catalog.json while it is fresh
+        # With prefetch this only times the wait for the background fetch
+        with metrics.stage("api_fetch") as record:
+            if prefetch:
+                api_products, product_mapping, name_index = catalog_future.result()
+                for message in catalog_messages:
+                    print(message)
+            else:
+                api_products, product_mapping, name_index = load_catalog()
+            record["rows_out"] = len(api_products)
         print(f"✓ Fetched {len(api_products)} products")
 
         # [7] Enrich
+        # In incremental mode only the new rows are enriched, their match
+        # counts are added to the saved ones
         print("\n[7/10] Enriching sales data...")
-        enriched_transactions = enrich_sales_data(valid_transactions, product_mapping)
-        enriched_count = sum(1 for tx in enriched_transactions if tx["API_Match"])
-        rate = (enriched_count / len(enriched_transactions)) * 100 if enriched_transactions else 0
-        print(f"✓ Enriched {enriched_count}/{len(enriched_transactions)} transactions ({rate:.1f}%)")
+        with metrics.stage("enrich", len(valid_transactions)) as record:
+            enriched_transactions = enrich_sales_data(valid_transactions, product_mapping, name_index)
+            record["rows_out"] = len(enriched_transactions)
+        previous = state["enrichment"] if incremental else None
+        enrichment = enrichment_stats(enriched_transactions, previous)
+        enriched_count = enrichment["enriched_count"]
+        rate = (enriched_count / enrichment["total"]) * 100 if enrichment["total"] else 0
+        print(f"✓ Enriched {enriched_count}/{enrichment['total']} transactions ({rate:.1f}%)")
 
         # [8] Save enriched file
         print("\n[8/10] Saving enriched data...")
-        save_enriched_data(enriched_transactions)
-        print("✓ Saved to: data/enriched_sales_data.txt")
+        with metrics.stage("save_enriched", len(enriched_transactions)):
+            save_enriched_data(enriched_transactions, enriched_file, append=incremental and not rebuilt)
+        print(f"✓ Saved to: {enriched_file}")
 
         # [9] Generate report
         print("\n[9/10] Generating report...")
-        report_path = generate_sales_report(valid_transactions, enriched_transactions)
+        with metrics.stage("report", len(summary)):
+            report_path = generate_sales_report(
+                valid_transactions, enriched_transactions,
+                summary=summary, enrichment=enrichment
+            )
         print(f"✓ Report saved to: {report_path}")
 
+        if incremental:
+            state["enrichment"] = enrichment
+            save_state(default_state_file(data_source), state)
+
+        if collector is not None:
+            metrics_path = os.path.join(os.path.dirname(report_path), "sales_metrics.json")
+            collector.write(metrics_path)
+            print(f"✓ Metrics saved to: {metrics_path}")
+
         # [10] Done
         print("\n[10/10] Process Complete!")
         print("=" * 40)
@@ -111,6 +235,62 @@ def main():
         print(str(e))
         print("Please check input files and try again.")
 
+    finally:
+        if collector is not None:
+            metrics.disable()
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line options of main.py
+
+    Returns: keyword arguments for main()
+    """
+
+    parser = argparse.ArgumentParser(description="Analyze the sales data and write the report")
+    parser.add_argument("--data-file", default=DATA_FILE,
+                        help="sales file, or a directory or glob of partition files")
+    parser.add_argument("--start-date", help="first date to include, YYYY-MM-DD")
+    parser.add_argument("--end-date", help="last date to include, YYYY-MM-DD")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes used to read the data file (default 1)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only read lines appended since the previous run")
+    parser.add_argument("--approximate", action="store_true",
+                        help="keep customer and unique counts in fixed-size sketches")
+    parser.add_argument("--spend-error", type=float,
+                        help="approximate mode's bound on overstated customer spend, "
+                             "as a share of total revenue (implies --approximate)")
+    parser.add_argument("--enriched-format", choices=sorted(ENRICHED_FILES), default="text",
+                        help="format of the enriched rows (default text)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="write per-stage metrics to output/sales_metrics.json")
+    parser.add_argument("--no-trace-memory", action="store_true",
+                        help="with --metrics, skip the allocation tracing")
+    parser.add_argument("--no-prefetch", action="store_true",
+                        help="fetch the catalog after the analysis instead of during it")
+    args = parser.parse_args(argv)
+
+    approximate = args.approximate
+    if args.spend_error is not None:
+        try:
+            approximate = Approximation(spend_error=args.spend_error)
+        except ValueError as e:
+            parser.error(str(e))
+
+    return {
+        "workers": args.workers,
+        "incremental": args.incremental,
+        "prefetch": not args.no_prefetch,
+        "collect_metrics": args.metrics,
+        "trace_memory": not args.no_trace_memory,
+        "approximate": approximate,
+        "data_source": args.data_file,
+        "start_date": args.start_date,
+        "end_date": args.end_date,
+        "enriched_format": args.enriched_format
+    }
+
 
 if __name__ == "__main__":
-    main()
+    main(**parse_args())
@@ -0,0 +1,369 @@
+"""
+Long-running local HTTP service answering analytics queries from data
+kept in memory, for dashboards.
+
+    python3 server.py --port 8000
+    curl "http://127.0.0.1:8000/region_wise_sales"
+    curl "http://127.0.0.1:8000/top_selling_products?n=10&region=North&min=1000"
+
+Every query endpoint accepts the filters region, min and max. The
+validated transactions, their index, the product mapping and the
+enriched rows are loaded once. Results are kept in an LRU cache keyed by
+the query and the data version. The data file's size and modification
+time are checked on each request, and a change reloads the data and
+empties the cache.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from main import DATA_FILE, load_catalog
+from utils.api_handler import enrich_sales_data
+from utils.data_processor import (
+    calculate_total_revenue,
+    region_wise_sales,
+    top_selling_products,
+    customer_analysis,
+    daily_sales_trend,
+    find_peak_sales_day,
+    low_performing_products,
+    enrichment_stats
+)
+from utils.parallel import run_parallel
+from utils.sales_summary import SalesSummary
+from utils.transaction_index import TransactionIndex
+from utils.transaction_table import TransactionTable
+
+
+CACHE_SIZE = 256
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache
+    """
+
+    def __init__(self, capacity=CACHE_SIZE):
+        self.capacity = capacity
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        """
+        Returns the cached value for key, computing and storing it if
+        missing
+        """
+
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return self.items[key]
+            self.misses += 1
+
+        # Computed outside the lock so slow queries do not block others
+        value = compute()
+
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.capacity:
+                self.items.popitem(last=False)
+
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+class Dataset:
+    """
+    One loaded version of the sales file
+    """
+
+    def __init__(self, data_file, workers, product_mapping, name_index):
+        stat = os.stat(data_file)
+        self.version = (stat.st_mtime_ns, stat.st_size)
+
+        result = run_parallel(data_file, workers, keep_rows=True)
+        self.table = result["transactions"] or TransactionTable()
+        self.summary = result["summary"]
+        self.filter_summary = result["filter_summary"]
+        self.index = TransactionIndex(
+            self.table,
+            total_input=self.filter_summary["total_input"],
+            invalid_count=self.filter_summary["invalid"]
+        )
+        self.enriched = enrich_sales_data(self.table, product_mapping, name_index)
+
+
+class AnalyticsService:
+    """
+    Keeps the current Dataset and answers queries through the cache
+    """
+
+    def __init__(self, data_file=DATA_FILE, workers=1, cache_size=CACHE_SIZE):
+        self.data_file = data_file
+        self.workers = workers
+        self.cache = LRUCache(cache_size)
+        self.reload_lock = threading.Lock()
+
+        _, self.product_mapping, self.name_index = load_catalog()
+        self.dataset = self._load()
+
+    def _load(self):
+        dataset = Dataset(self.data_file, self.workers, self.product_mapping, self.name_index)
+        print(f"Loaded {len(dataset.table)} valid transactions from {self.data_file}")
+        return dataset
+
+    def current(self):
+        """
+        Returns the Dataset for the file as it is now, reloading it first
+        if the file changed
+        """
+
+        stat = os.stat(self.data_file)
+        if (stat.st_mtime_ns, stat.st_size) != self.dataset.version:
+            with self.reload_lock:
+                # Another request may have reloaded it meanwhile
+                stat = os.stat(self.data_file)
+                if (stat.st_mtime_ns, stat.st_size) != self.dataset.version:
+                    self.dataset = self._load()
+                    self.cache.clear()
+        return self.dataset
+
+    def summary(self, dataset, filters):
+        """
+        Returns the SalesSummary of the rows matching (region, min, max)
+        """
+
+        if filters == (None, None, None):
+            return dataset.summary
+        return self.cache.get(
+            (dataset.version, "summary", filters),
+            lambda: SalesSummary.from_transactions(dataset.table.take(dataset.index.select(*filters)))
+        )
+
+    def query(self, endpoint, params):
+        """
+        Answers one query
+
+        Returns: JSON-serializable result
+        Raises: KeyError for an unknown endpoint, ValueError for bad
+        parameters
+        """
+
+        handler = QUERIES[endpoint]
+        filters = (
+            params.get("region") or None,
+            _amount(params, "min"),
+            _amount(params, "max")
+        )
+        options = {
+            name: _int_param(params, name, default)
+            for name, default in QUERY_OPTIONS.get(endpoint, {}).items()
+        }
+
+        dataset = self.current()
+        key = (dataset.version, endpoint, filters, tuple(sorted(options.items())))
+        return self.cache.get(key, lambda: handler(self, dataset, filters, **options))
+
+    def status(self):
+        dataset = self.current()
+        return {
+            "data_file": self.data_file,
+            "version": list(dataset.version),
+            "valid_transactions": len(dataset.table),
+            "invalid_transactions": dataset.filter_summary["invalid"],
+            "catalog_products": len(self.product_mapping),
+            "cache": {
+                "size": len(self.cache.items),
+                "capacity": self.cache.capacity,
+                "hits": self.cache.hits,
+                "misses": self.cache.misses
+            }
+        }
+
+
+def _amount(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return float(value.replace(",", ""))
+    except ValueError:
+        raise ValueError(f"Invalid amount '{value}' for {name}") from None
+
+
+def _int_param(params, name, default):
+    value = params.get(name)
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid integer '{value}' for {name}") from None
+    # A negative n or limit would slice from the end of the ranking
+    if number < 0:
+        raise ValueError(f"Invalid integer '{value}' for {name}, must not be negative")
+    return number
+
+
+# The query endpoints, each answered from the summary of the filtered rows
+
+def _total_revenue(service, dataset, filters):
+    summary = service.summary(dataset, filters)
+    return {"total_revenue": calculate_total_revenue(summary), "transaction_count": len(summary)}
+
+
+def _region_wise_sales(service, dataset, filters):
+    return region_wise_sales(service.summary(dataset, filters))
+
+
+def _top_selling_products(service, dataset, filters, n):
+    return [list(row) for row in top_selling_products(service.summary(dataset, filters), n=n)]
+
+
+def _customer_analysis(service, dataset, filters, limit):
+    return customer_analysis(service.summary(dataset, filters), n=limit or None)
+
+
+def _daily_sales_trend(service, dataset, filters):
+    return daily_sales_trend(service.summary(dataset, filters))
+
+
+def _peak_sales_day(service, dataset, filters):
+    peak_date, revenue, count = find_peak_sales_day(service.summary(dataset, filters))
+    return {"date": peak_date, "revenue": revenue, "transaction_count": count}
+
+
+def _low_performing_products(service, dataset, filters, threshold):
+    summary = service.summary(dataset, filters)
+    return [list(row) for row in low_performing_products(summary, threshold=threshold)]
+
+
+def _filter_options(service, dataset, filters):
+    amounts = dataset.index.amount_range()
+    return {
+        "regions": sorted(region for region in dataset.index.regions() if region),
+        "min_amount": amounts[0] if amounts else None,
+        "max_amount": amounts[1] if amounts else None
+    }
+
+
+def _enrichment(service, dataset, filters):
+    rows = dataset.index.select(*filters)
+    stats = enrichment_stats(dataset.enriched.take(rows))
+    total = stats["total"]
+    return {
+        "enriched_count": stats["enriched_count"],
+        "total": total,
+        "success_rate": round(stats["enriched_count"] / total * 100, 2) if total else 0,
+        "unmatched_products": sorted(stats["unmatched"])
+    }
+
+
+QUERIES = {
+    "total_revenue": _total_revenue,
+    "region_wise_sales": _region_wise_sales,
+    "top_selling_products": _top_selling_products,
+    "customer_analysis": _customer_analysis,
+    "daily_sales_trend": _daily_sales_trend,
+    "peak_sales_day": _peak_sales_day,
+    "low_performing_products": _low_performing_products,
+    "filter_options": _filter_options,
+    "enrichment": _enrichment
+}
+
+# endpoint -> {integer parameter: default}
+QUERY_OPTIONS = {
+    "top_selling_products": {"n": 5},
+    "customer_analysis": {"limit": 0},
+    "low_performing_products": {"threshold": 10}
+}
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        endpoint = url.path.strip("/")
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        try:
+            if endpoint in ("", "status"):
+                body = self.service.status()
+            elif endpoint not in QUERIES:
+                return self._send(404, {"error": f"Unknown endpoint '{endpoint}'",
+                                        "endpoints": sorted(QUERIES)})
+            else:
+                body = self.service.query(endpoint, params)
+        except ValueError as e:
+            return self._send(400, {"error": str(e)})
+        except OSError as e:
+            return self._send(503, {"error": f"Data file unavailable: {e}"})
+
+        self._send(200, body)
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(service, host="127.0.0.1", port=8000, verbose=False):
+    handler = type("BoundQueryHandler", (QueryHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.verbose = verbose
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve sales analytics queries over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--data-file", default=DATA_FILE)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes used to read the data file (default 1)")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE,
+                        help=f"cached query results (default {CACHE_SIZE})")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    try:
+        service = AnalyticsService(args.data_file, args.workers, args.cache_size)
+    except OSError as e:
+        print(f"Error: Cannot load '{args.data_file}': {e}")
+        return 1
+
+    server = make_server(service, args.host, args.port, args.verbose)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}/")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
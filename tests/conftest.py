@@ -0,0 +1,39 @@
+import pytest
+
+from benchmarks.generate_data import write_sales_file
+from tests.equivalence import CUSTOMERS, PRODUCTS, ROWS, SEED, analytics, baseline
+from utils import vectorized
+
+
+@pytest.fixture(scope="session")
+def sales_file(tmp_path_factory):
+    """
+    A generated sales file with every kind of dirty row
+    """
+
+    filename = str(tmp_path_factory.mktemp("data") / "sales.txt")
+    write_sales_file(filename, ROWS, seed=SEED, dirt=0.1, products=PRODUCTS, customers=CUSTOMERS)
+    return filename
+
+
+@pytest.fixture(scope="session")
+def expected(sales_file):
+    """
+    The original path's results for sales_file, see equivalence.baseline
+    """
+
+    valid, filter_summary, rejected = baseline(sales_file)
+    return {
+        "valid": valid,
+        "filter_summary": filter_summary,
+        "rejected": rejected,
+        "analytics": analytics(valid)
+    }
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "pure-python"])
+def vectorized_mode(request, monkeypatch):
+    if request.param and not vectorized.ENABLED:
+        pytest.skip("NumPy is not installed")
+    monkeypatch.setattr(vectorized, "ENABLED", request.param)
+    return request.param
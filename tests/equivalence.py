@@ -0,0 +1,87 @@
+"""
+The original path every faster one is checked against:
+read_sales_data -> parse_transactions -> validate_and_filter over lists
+of dicts, then the analytics functions.
+
+The table paths reject rows their columns cannot hold (see
+TransactionTable), so the original path's figures are taken over the
+rows the table can store, with the rest counted invalid. A SalesSummary
+sums money exactly where the original path adds in row order, so its
+rounded figures may differ from it by a cent (see to_the_cent).
+"""
+
+from datetime import date
+
+import pytest
+
+from utils.data_processor import (
+    calculate_total_revenue,
+    customer_analysis,
+    daily_sales_trend,
+    find_peak_sales_day,
+    low_performing_products,
+    parse_transactions,
+    region_wise_sales,
+    top_selling_products,
+    validate_and_filter
+)
+from utils.file_handler import read_sales_data
+from utils.transaction_table import check_storable
+
+
+# Shape of the generated file the fixtures in conftest write
+ROWS = 4000
+PRODUCTS = 40
+CUSTOMERS = 150
+SEED = 3
+
+
+def analytics(transactions):
+    return {
+        "total_revenue": calculate_total_revenue(transactions),
+        "region_wise_sales": region_wise_sales(transactions),
+        "top_selling_products": top_selling_products(transactions),
+        "customer_analysis": customer_analysis(transactions),
+        "daily_sales_trend": daily_sales_trend(transactions),
+        "find_peak_sales_day": find_peak_sales_day(transactions),
+        "low_performing_products": low_performing_products(transactions)
+    }
+
+
+def to_the_cent(value):
+    """
+    Returns value with every float replaced by one that compares equal
+    to within a cent
+    """
+
+    if isinstance(value, dict):
+        return {key: to_the_cent(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(to_the_cent(item) for item in value)
+    if isinstance(value, float):
+        return pytest.approx(value, abs=0.0101)
+    return value
+
+
+def storable(tx):
+    try:
+        check_storable(tx["Quantity"], tx["UnitPrice"])
+        return date.fromisoformat(tx["Date"]).isoformat() == tx["Date"]
+    except (ValueError, OverflowError):
+        return False
+
+
+def baseline(filename):
+    """
+    Returns: (valid transaction dicts, filter_summary, rows the table
+    rejects)
+    """
+
+    transactions = parse_transactions(read_sales_data(filename))
+    kept = [tx for tx in transactions if storable(tx)]
+    rejected = len(transactions) - len(kept)
+
+    valid, _, filter_summary = validate_and_filter(kept)
+    filter_summary["total_input"] += rejected
+    filter_summary["invalid"] += rejected
+    return valid, filter_summary, rejected
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+import batch
+from benchmarks.generate_data import make_catalog, make_products
+from tests.equivalence import PRODUCTS
+from utils.api_handler import ProductNameIndex, create_product_mapping
+from utils.data_processor import parse_transactions, validate_and_filter
+from utils.file_handler import read_sales_data
+
+
+@pytest.mark.parametrize("text, spec", [
+    ("", {}),
+    ("region=North", {"region": "North"}),
+    ("region=East min=1000 max=50000", {"region": "East", "min_amount": 1000.0, "max_amount": 50000.0}),
+    ("min=10,000,max=1,500,000", {"min_amount": 10000.0, "max_amount": 1500000.0}),
+    ("name='big north' REGION=North min=", {"name": "big north", "region": "North"})
+])
+def test_parse_spec(text, spec):
+    expected = {"name": None, "region": None, "min_amount": None, "max_amount": None}
+    expected.update(spec)
+    assert batch.parse_spec(text) == expected
+
+
+@pytest.mark.parametrize("text", ["region", "colour=red", "min=lots"])
+def test_parse_spec_rejects(text):
+    with pytest.raises(ValueError):
+        batch.parse_spec(text)
+
+
+def test_read_specs_file(tmp_path):
+    filename = str(tmp_path / "specs.txt")
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write("# nightly\n\nregion=North\nmin=5000\n")
+    assert [spec["region"] for spec in batch.read_specs_file(filename)] == ["North", None]
+
+    with open(filename, "a", encoding="utf-8") as f:
+        f.write("max=plenty\n")
+    with pytest.raises(ValueError, match="line 5"):
+        batch.read_specs_file(filename)
+
+
+@pytest.mark.parametrize("text, name", [
+    ("", "all"),
+    ("region=North min=1000", "North_min1000"),
+    # No separators are left to leave output_dir by
+    ("name=../../etc", "..-..-etc"),
+    ("name='a b'", "a-b")
+])
+def test_spec_name(text, name):
+    assert batch.spec_name(batch.parse_spec(text)) == name
+
+
+def test_run_batch_matches_validate_and_filter(sales_file, tmp_path, monkeypatch):
+    catalog = make_catalog(make_products(PRODUCTS, 3), 3)
+    mapping = create_product_mapping(catalog)
+    monkeypatch.setattr(batch, "load_catalog", lambda: (catalog, mapping, ProductNameIndex(mapping)))
+
+    texts = ["", "region=North", "region=East min=1000 max=50000", "region=North", "region=Nowhere"]
+    output_dir = str(tmp_path / "reports")
+    reports = batch.run_batch([batch.parse_spec(text) for text in texts], sales_file, output_dir)
+
+    table = parse_transactions(read_sales_data(sales_file), columnar=True)
+    names = []
+    for (spec, report_path, count), text in zip(reports, texts):
+        filtered, _, _ = validate_and_filter(table, spec["region"], spec["min_amount"], spec["max_amount"])
+        assert count == len(filtered), text
+        assert os.path.exists(report_path)
+        names.append(os.path.basename(report_path))
+
+    # Repeated specs get their own report
+    assert names == ["all.txt", "North.txt", "East_min1000_max50000.txt", "North-2.txt", "Nowhere.txt"]
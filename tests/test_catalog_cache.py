@@ -0,0 +1,87 @@
+import pytest
+
+from benchmarks.generate_data import make_catalog, make_products
+from benchmarks.stub_api import StubCatalogServer
+from utils import api_handler
+from utils.api_handler import create_product_mapping, fetch_product_catalog
+from utils.catalog_cache import load_catalog_cache
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return make_catalog(make_products(60, 2), 2)
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    return str(tmp_path / "catalog.json")
+
+
+def fetch(server, cache_file, ttl=3600):
+    return fetch_product_catalog(server.url, cache_file, ttl=ttl, log=lambda message: None)
+
+
+def test_fresh_cache_skips_the_api(catalog, cache_file):
+    with StubCatalogServer(catalog) as server:
+        products, mapping = fetch(server, cache_file)
+        requests = server.requests
+        cached_products, cached_mapping = fetch(server, cache_file)
+
+    assert server.requests == requests
+    assert cached_products == products == catalog
+    # Integer ids survive the JSON round trip
+    assert cached_mapping == mapping == create_product_mapping(catalog)
+
+
+def test_stale_cache_is_revalidated(catalog, cache_file):
+    with StubCatalogServer(catalog) as server:
+        fetch(server, cache_file)
+        fetched_at = load_catalog_cache(cache_file)["fetched_at"]
+        requests = server.requests
+
+        # 304 Not Modified: one request, the cached copy renewed
+        products, _ = fetch(server, cache_file, ttl=0)
+        assert server.requests == requests + 1
+        assert products == catalog
+        assert load_catalog_cache(cache_file)["fetched_at"] >= fetched_at
+
+    changed = catalog[:10]
+    with StubCatalogServer(changed, etag='"catalog-v2"') as server:
+        products, _ = fetch(server, cache_file, ttl=0)
+
+    assert products == changed
+    assert load_catalog_cache(cache_file)["etag"] == '"catalog-v2"'
+
+
+def test_unreachable_api_falls_back_to_stale_cache(catalog, cache_file, monkeypatch):
+    monkeypatch.setattr(api_handler, "RETRY_BACKOFF", 0)
+
+    with StubCatalogServer(catalog) as server:
+        fetch(server, cache_file)
+    # The server is gone, its port refuses connections
+    products, mapping = fetch(server, cache_file, ttl=0)
+    assert products == catalog
+    assert mapping == create_product_mapping(catalog)
+
+    assert fetch(server, None) == ([], {})
+
+
+def test_unreadable_cache_is_refetched(catalog, cache_file):
+    with open(cache_file, "w", encoding="utf-8") as f:
+        f.write("{not json")
+
+    with StubCatalogServer(catalog) as server:
+        products, _ = fetch(server, cache_file)
+        assert server.requests > 0
+
+    assert products == catalog
+    assert load_catalog_cache(cache_file) is not None
+
+
+def test_cache_of_another_url_is_ignored(catalog, cache_file):
+    with StubCatalogServer(catalog[:5]) as server:
+        fetch(server, cache_file)
+    with StubCatalogServer(catalog) as server:
+        products, _ = fetch(server, cache_file)
+
+    assert products == catalog
@@ -0,0 +1,33 @@
+import math
+
+import pytest
+
+from benchmarks.generate_data import make_catalog, make_products
+from benchmarks.stub_api import StubCatalogServer
+from utils.api_handler import PAGE_SIZE, fetch_product_catalog
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return make_catalog(make_products(120, 4), 4)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+@pytest.mark.parametrize("max_page_size", [7, PAGE_SIZE, 1000])
+def test_pages_come_back_in_order(catalog, workers, max_page_size):
+    with StubCatalogServer(catalog, max_page_size=max_page_size) as server:
+        products, mapping = fetch_product_catalog(server.url, cache_file=None, workers=workers,
+                                                  log=lambda message: None)
+
+    assert products == catalog
+    assert list(mapping) == [product["id"] for product in catalog]
+    # The API's page size is followed when it caps the requested one
+    assert server.requests == math.ceil(len(catalog) / min(PAGE_SIZE, max_page_size))
+
+
+def test_empty_catalog():
+    with StubCatalogServer([]) as server:
+        products, mapping = fetch_product_catalog(server.url, cache_file=None, log=lambda message: None)
+
+    assert (products, mapping) == ([], {})
+    assert server.requests == 1
@@ -0,0 +1,93 @@
+import pytest
+
+from benchmarks.generate_data import make_catalog, make_products
+from tests.equivalence import PRODUCTS
+from utils.api_handler import create_product_mapping, enrich_sales_data
+from utils.columnar_file import ChainedColumn, ColumnarFile, save_columnar
+from utils.transaction_table import Categorical, TransactionTable
+
+
+@pytest.fixture(scope="module")
+def enriched(expected):
+    catalog = make_catalog(make_products(PRODUCTS, 3), 3)
+    mapping = create_product_mapping(catalog)
+    return list(enrich_sales_data(expected["valid"], mapping))
+
+
+def test_round_trip(enriched, tmp_path):
+    filename = str(tmp_path / "enriched.scol")
+    save_columnar(enriched, filename)
+
+    with ColumnarFile(filename) as columnar:
+        assert len(columnar) == len(enriched)
+        assert list(columnar) == enriched
+        # One segment maps its plain columns straight from the file
+        assert isinstance(columnar.columns["Quantity"], memoryview)
+        assert isinstance(columnar.columns["Region"].codes, memoryview)
+
+
+def test_table_enrichment_round_trip(expected, enriched, tmp_path):
+    catalog = make_catalog(make_products(PRODUCTS, 3), 3)
+    mapping = create_product_mapping(catalog)
+    table = TransactionTable.from_dicts(expected["valid"])
+    assert list(enrich_sales_data(table, mapping)) == enriched
+
+    filename = str(tmp_path / "enriched.scol")
+    save_columnar(enrich_sales_data(table, mapping), filename)
+    with ColumnarFile(filename) as columnar:
+        assert list(columnar) == enriched
+
+
+def test_appended_segments(enriched, tmp_path):
+    filename = str(tmp_path / "enriched.scol")
+    thirds = [enriched[:1000], enriched[1000:1001], enriched[1001:]]
+    save_columnar(thirds[0], filename)
+    for rows in thirds[1:]:
+        save_columnar(rows, filename, append=True)
+
+    with ColumnarFile(filename) as columnar:
+        assert len(columnar) == len(enriched)
+        assert list(columnar) == enriched
+        assert columnar[-1] == enriched[-1]
+        assert columnar[1000] == enriched[1000]
+        with pytest.raises(IndexError):
+            columnar[len(enriched)]
+
+        assert isinstance(columnar.columns["Quantity"], ChainedColumn)
+        # Each value once, whichever segments it appears in
+        regions = columnar.columns["Region"]
+        assert isinstance(regions, Categorical)
+        assert sorted(regions.categories, key=str) == sorted({tx["Region"] for tx in enriched}, key=str)
+
+
+def test_append_to_missing_file_creates_it(enriched, tmp_path):
+    filename = str(tmp_path / "enriched.scol")
+    save_columnar(enriched[:10], filename, append=True)
+
+    with ColumnarFile(filename) as columnar:
+        assert list(columnar) == enriched[:10]
+
+
+def test_append_to_other_file_is_refused(enriched, tmp_path):
+    filename = str(tmp_path / "enriched.txt")
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write("TransactionID|Date\n")
+
+    with pytest.raises(ValueError):
+        save_columnar(enriched[:10], filename, append=True)
+    with open(filename, encoding="utf-8") as f:
+        assert f.read() == "TransactionID|Date\n"
+
+
+def test_truncated_file_is_refused(enriched, tmp_path):
+    filename = str(tmp_path / "enriched.scol")
+    save_columnar(enriched[:100], filename)
+    save_columnar(enriched[100:200], filename, append=True)
+    with open(filename, "rb") as f:
+        data = f.read()
+
+    for size in (4, len(data) - 8, len(data) // 2):
+        with open(filename, "wb") as f:
+            f.write(data[:size])
+        with pytest.raises(ValueError):
+            ColumnarFile(filename)
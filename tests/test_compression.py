@@ -0,0 +1,72 @@
+import shutil
+
+import pytest
+
+from tests.equivalence import analytics, to_the_cent
+from utils.api_handler import save_enriched_data
+from utils.file_handler import (
+    COMPRESSIONS,
+    detect_compression,
+    iter_sales_data,
+    open_text,
+    read_sales_data,
+    split_line_ranges
+)
+from utils.parallel import run_parallel
+
+
+@pytest.fixture(scope="module", params=sorted(COMPRESSIONS))
+def compressed_file(request, sales_file, tmp_path_factory):
+    compression = request.param
+    filename = str(tmp_path_factory.mktemp(compression) / ("sales" + COMPRESSIONS[compression][1]))
+    with open(sales_file, "rb") as source, COMPRESSIONS[compression][2](filename, "wb") as target:
+        shutil.copyfileobj(source, target)
+    return compression, filename
+
+
+def test_detected_by_content(compressed_file, sales_file, tmp_path):
+    compression, filename = compressed_file
+    assert detect_compression(filename) == compression
+    assert detect_compression(sales_file) is None
+
+    # The name does not matter, only the magic bytes
+    renamed = str(tmp_path / "sales.dat")
+    shutil.copy(filename, renamed)
+    assert detect_compression(renamed) == compression
+
+
+def test_reads_like_the_plain_file(compressed_file, sales_file):
+    _, filename = compressed_file
+
+    assert read_sales_data(filename) == read_sales_data(sales_file)
+    assert sum(map(len, iter_sales_data(filename, batch_size=300))) == len(read_sales_data(sales_file))
+
+
+def test_parallel_reads_one_stream(compressed_file, expected):
+    _, filename = compressed_file
+
+    assert len(split_line_ranges(filename, 4)) == 1
+    result = run_parallel(filename, workers=2, keep_rows=True)
+    assert result["filter_summary"] == expected["filter_summary"]
+    assert result["transactions"].to_dicts() == expected["valid"]
+    assert analytics(result["summary"]) == to_the_cent(expected["analytics"])
+
+
+@pytest.mark.parametrize("compression", sorted(COMPRESSIONS))
+def test_enriched_output_appends_streams(compression, tmp_path):
+    filename = str(tmp_path / ("enriched.txt" + COMPRESSIONS[compression][1]))
+    rows = [
+        {"TransactionID": f"T{i}", "Date": "2024-12-01", "ProductID": "P101", "ProductName": "Laptop",
+         "Quantity": 1, "UnitPrice": 10.0, "CustomerID": "C001", "Region": "North",
+         "API_Category": None, "API_Brand": None, "API_Match": False}
+        for i in range(3)
+    ]
+
+    save_enriched_data(rows[:2], filename)
+    save_enriched_data(rows[2:], filename, append=True)
+
+    assert detect_compression(filename) == compression
+    with open_text(filename, "utf-8") as f:
+        lines = f.read().splitlines()
+    assert lines[0].startswith("TransactionID|")
+    assert [line.split("|")[0] for line in lines[1:]] == ["T0", "T1", "T2"]
@@ -0,0 +1,82 @@
+import pytest
+
+from benchmarks.generate_data import make_catalog, make_products
+from tests.equivalence import PRODUCTS
+from utils.api_handler import ProductNameIndex, _match_product, create_product_mapping, enrich_sales_data
+from utils.enriched_view import EnrichedTransactions
+from utils.transaction_table import TransactionTable
+
+
+@pytest.fixture(scope="module")
+def mapping():
+    return create_product_mapping(make_catalog(make_products(PRODUCTS, 3), 3))
+
+
+@pytest.fixture(scope="module")
+def rows(expected, mapping):
+    """
+    The enriched rows as matched one transaction at a time
+    """
+
+    name_index = ProductNameIndex(mapping)
+    enriched = []
+    for tx in expected["valid"]:
+        category, brand, match = _match_product(tx["ProductID"], tx["ProductName"], mapping, name_index)
+        enriched.append({**tx, "API_Category": category, "API_Brand": brand, "API_Match": match})
+    return enriched
+
+
+@pytest.mark.parametrize("columnar", [False, True], ids=["dicts", "table"])
+def test_view_matches_per_row_enrichment(expected, mapping, rows, columnar):
+    transactions = expected["valid"]
+    if columnar:
+        transactions = TransactionTable.from_dicts(transactions)
+    view = enrich_sales_data(transactions, mapping)
+
+    assert isinstance(view, EnrichedTransactions)
+    assert len(view) == len(rows)
+    assert list(view) == rows
+    assert len(view.dimension) < len(view)
+    for name in ("ProductName", "API_Brand", "API_Match"):
+        assert list(view.column(name)) == [tx[name] for tx in rows]
+
+    # The transactions are neither copied nor changed
+    assert view.transactions is transactions
+    assert "API_Match" not in expected["valid"][0]
+
+
+def test_generator_input(expected, mapping, rows):
+    view = enrich_sales_data((tx for tx in expected["valid"]), mapping)
+
+    # Read once into the view, not left half consumed
+    assert list(view) == rows
+    assert list(view) == rows
+
+
+def test_indexing_and_slices(expected, mapping, rows):
+    view = enrich_sales_data(expected["valid"], mapping)
+
+    assert view[0] == rows[0]
+    assert view[-1] == rows[-1]
+    assert view[-len(rows)] == rows[0]
+    for i in (len(rows), -len(rows) - 1):
+        with pytest.raises(IndexError):
+            view[i]
+
+    for part in (slice(None), slice(10, 20), slice(-5, None), slice(None, None, -97), slice(50, 10)):
+        assert isinstance(view[part], list)
+        assert view[part] == rows[part]
+
+
+def test_take(expected, mapping, rows):
+    view = enrich_sales_data(TransactionTable.from_dicts(expected["valid"]), mapping)
+    indices = list(range(0, len(rows), 13))
+
+    selection = view.take(indices)
+    assert isinstance(selection, EnrichedTransactions)
+    assert list(selection) == [rows[i] for i in indices]
+    assert selection.column("Region") == [rows[i]["Region"] for i in indices]
+
+    # A selection of a selection still points into the same rows
+    again = selection.take([2, 0, -1])
+    assert again[:] == [rows[indices[2]], rows[indices[0]], rows[indices[-1]]]
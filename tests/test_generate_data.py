@@ -0,0 +1,63 @@
+import pytest
+
+from benchmarks.generate_data import (
+    OVERFLOW_QUANTITY,
+    generate_lines,
+    make_products,
+    parse_count,
+    write_sales_file
+)
+from tests.equivalence import ROWS
+from utils.file_handler import read_sales_data
+
+
+@pytest.mark.parametrize("text, count", [
+    ("1000", 1000), ("10K", 10000), ("2.5k", 2500), (" 50M ", 50000000)
+])
+def test_parse_count(text, count):
+    assert parse_count(text) == count
+
+
+def test_generated_file_is_dirty(expected):
+    assert expected["filter_summary"]["invalid"] > expected["rejected"] > 0
+    assert 0 < len(expected["valid"]) < ROWS
+    assert any(tx["UnitPrice"] != int(tx["UnitPrice"]) for tx in expected["valid"])
+
+
+def test_every_kind_of_dirt_appears():
+    lines = list(generate_lines(3000, seed=1, dirt=0.2))
+    rows = [line.split("|") for line in lines if line.count("|") == 7]
+
+    assert "" in lines
+    assert any(line and line.count("|") != 7 for line in lines)
+    assert any(row[0].startswith("X") for row in rows)
+    assert any(not row[2].startswith("P") for row in rows)
+    assert any(row[6] == "" for row in rows)
+    assert any(row[7] == "" for row in rows)
+    assert any(row[4] == "0" for row in rows)
+    assert any(row[4] == str(OVERFLOW_QUANTITY) for row in rows)
+    assert any("," in row[3] for row in rows)
+    assert any("," in row[5] for row in rows)
+    assert any("." in row[5] for row in rows)
+    assert any(len(row[1]) != 10 or "/" in row[1] or row[1][4] != "-" for row in rows)
+
+
+def test_reproducible_from_seed(tmp_path):
+    first = str(tmp_path / "first.txt")
+    second = str(tmp_path / "second.txt")
+    write_sales_file(first, 500, seed=9)
+    write_sales_file(second, 500, seed=9)
+
+    with open(first, "rb") as a, open(second, "rb") as b:
+        assert a.read() == b.read()
+    assert list(generate_lines(500, seed=10)) != list(generate_lines(500, seed=9))
+    # Blank stand-in lines are dropped when read back
+    assert len(read_sales_data(first)) <= 500
+
+
+def test_products_start_with_the_real_ones():
+    products = make_products(25)
+
+    assert [product[0] for product in products[:3]] == ["P101", "P102", "P103"]
+    assert products[0][1:] == ("Laptop", 60000)
+    assert len({product[1] for product in products}) == 25
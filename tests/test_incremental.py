@@ -0,0 +1,105 @@
+import gzip
+
+import pytest
+
+from tests.equivalence import analytics, to_the_cent
+from utils.incremental import refresh_state, save_state
+from utils.transaction_table import TransactionTable
+
+
+def test_incremental_append_and_noop(sales_file, expected, tmp_path):
+    with open(sales_file, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+
+    filename = str(tmp_path / "sales.txt")
+    state_file = str(tmp_path / "sales.state.json")
+    half = len(lines) // 2
+
+    with open(filename, "w", encoding="utf-8") as f:
+        f.writelines(lines[:half])
+    state, new_rows, rebuilt = refresh_state(filename, state_file)
+    save_state(state_file, state)
+    assert rebuilt
+    first_rows = len(new_rows["transactions"])
+
+    with open(filename, "a", encoding="utf-8") as f:
+        f.writelines(lines[half:])
+    state, new_rows, rebuilt = refresh_state(filename, state_file, workers=2)
+    save_state(state_file, state)
+    assert not rebuilt
+    assert first_rows + len(new_rows["transactions"]) == len(expected["valid"])
+    assert state["result"]["filter_summary"] == expected["filter_summary"]
+    assert analytics(state["result"]["summary"]) == to_the_cent(expected["analytics"])
+
+    # Nothing appended: no rows read, the saved aggregates unchanged
+    state, new_rows, rebuilt = refresh_state(filename, state_file)
+    assert not rebuilt
+    assert isinstance(new_rows["transactions"], TransactionTable)
+    assert len(new_rows["transactions"]) == 0
+    assert analytics(state["result"]["summary"]) == to_the_cent(expected["analytics"])
+
+
+def test_incremental_rebuilds_after_rewrite(sales_file, tmp_path):
+    filename = str(tmp_path / "sales.txt")
+    state_file = str(tmp_path / "sales.state.json")
+
+    with open(sales_file, "rb") as f:
+        data = bytearray(f.read())
+    with open(filename, "wb") as f:
+        f.write(data)
+    state, _, _ = refresh_state(filename, state_file)
+    save_state(state_file, state)
+
+    # Change one digit well inside the file, away from either end
+    middle = data.index(b"|", len(data) // 2) + 1
+    data[middle:middle + 1] = b"9" if data[middle:middle + 1] != b"9" else b"8"
+    with open(filename, "wb") as f:
+        f.write(data)
+
+    _, _, rebuilt = refresh_state(filename, state_file)
+    assert rebuilt
+
+
+@pytest.mark.parametrize("appended, rebuilds", [
+    ("\nT002|2024-12-02|P102|Mouse|1|500|C002|South\n", False),
+    ("ern\nT002|2024-12-02|P102|Mouse|1|500|C002|South\n", True)
+])
+def test_unterminated_last_line(tmp_path, appended, rebuilds):
+    filename = str(tmp_path / "sales.txt")
+    state_file = str(tmp_path / "sales.state.json")
+
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write("TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n")
+        f.write("T001|2024-12-01|P101|Laptop|2|45000|C001|North")
+    state, _, _ = refresh_state(filename, state_file)
+    save_state(state_file, state)
+
+    # A new line may follow, but a last line that grows was read with
+    # another value
+    with open(filename, "a", encoding="utf-8") as f:
+        f.write(appended)
+    state, new_rows, rebuilt = refresh_state(filename, state_file)
+
+    assert rebuilt == rebuilds
+    assert len(new_rows["transactions"]) == (2 if rebuilds else 1)
+    assert state["result"]["filter_summary"]["final_count"] == 2
+
+
+def test_unreadable_state_rebuilds(sales_file, expected, tmp_path):
+    state_file = str(tmp_path / "sales.state.json")
+    with open(state_file, "w", encoding="utf-8") as f:
+        f.write("{not json")
+
+    state, new_rows, rebuilt = refresh_state(sales_file, state_file)
+    assert rebuilt
+    assert len(new_rows["transactions"]) == len(expected["valid"])
+    assert state["result"]["filter_summary"] == expected["filter_summary"]
+
+
+def test_compressed_file_is_refused(tmp_path):
+    filename = str(tmp_path / "sales.txt.gz")
+    with gzip.open(filename, "wt", encoding="utf-8") as f:
+        f.write("TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n")
+
+    with pytest.raises(ValueError):
+        refresh_state(filename, str(tmp_path / "sales.state.json"))
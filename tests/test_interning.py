@@ -0,0 +1,42 @@
+from utils.data_processor import customer_analysis, parse_transactions, region_wise_sales
+
+
+LINES = [
+    "T001|2024-12-01|P101|Laptop|1|45000|C001|North",
+    "T002|2024-12-01|P102|Mouse|2|500| C001 |South",
+    "T003|2024-12-02|P101|Laptop|1|45000|C002|North",
+    "T004|2024-12-02|P103|USB,Cable|3|250|C001|South"
+]
+
+
+def test_equal_fields_share_one_string():
+    # Split gives every line its own string objects; one strings dict
+    # shares them across batches
+    strings = {}
+    rows = parse_transactions(LINES[:2], strings=strings) + parse_transactions(LINES[2:], strings=strings)
+
+    for field in ("Date", "ProductID", "ProductName", "Region"):
+        values = {}
+        for tx in rows:
+            assert values.setdefault(tx[field], tx[field]) is tx[field], field
+    assert rows[3]["ProductName"] == "USBCable"
+
+
+def test_table_codes_match_the_dicts():
+    table = parse_transactions(LINES, columnar=True)
+    rows = parse_transactions(LINES)
+
+    assert table.to_dicts() == rows
+    assert table.region.categories == ["North", "South"]
+    assert list(table.region.codes) == [0, 1, 0, 1]
+    assert table.product_name.categories == ["Laptop", "Mouse", "USBCable"]
+
+
+def test_grouping_on_codes_matches_the_dicts():
+    table = parse_transactions(LINES, columnar=True)
+    rows = parse_transactions(LINES)
+
+    # " C001 " and "C001" are one customer after stripping, on both paths
+    assert customer_analysis(table) == customer_analysis(rows)
+    assert customer_analysis(table)["C001"]["purchase_count"] == 3
+    assert region_wise_sales(table) == region_wise_sales(rows)
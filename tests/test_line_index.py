@@ -0,0 +1,94 @@
+import gzip
+import os
+import random
+
+import pytest
+
+from utils.file_handler import iter_line_range, read_sales_data
+from utils.line_index import LineIndex
+
+
+ENDINGS = [b"\n", b"\r\n", b"\r", b"\r\r\n", b"\n \t\n"]
+
+
+@pytest.fixture(scope="module")
+def mixed_endings(sales_file, tmp_path_factory):
+    """
+    The generated file with a random line ending after every line, blank
+    lines included, and no ending after the last one
+    """
+
+    rng = random.Random(2)
+    with open(sales_file, "rb") as f:
+        lines = f.read().split(b"\n")
+    filename = str(tmp_path_factory.mktemp("endings") / "sales.txt")
+    with open(filename, "wb") as f:
+        f.write(b"".join(line + rng.choice(ENDINGS) for line in lines).rstrip(b"\r\n"))
+    return filename
+
+
+@pytest.mark.parametrize("source", ["sales_file", "mixed_endings"])
+def test_lines_match_read_sales_data(request, source, vectorized_mode, tmp_path):
+    filename = request.getfixturevalue(source)
+    expected = read_sales_data(filename)
+
+    with LineIndex(filename, index_file=str(tmp_path / "lines.idx")) as index:
+        assert len(index) == len(expected)
+        assert index[:] == expected
+        assert index[-1] == expected[-1]
+        assert index[5:40:7] == expected[5:40:7]
+
+        for parts in (1, 3, 8):
+            lines = [
+                line
+                for start, end in index.byte_ranges(parts)
+                for line in iter_line_range(filename, start, end, index.encoding)
+            ]
+            assert lines == expected
+
+
+def test_cache_is_reused_until_the_file_changes(sales_file, tmp_path):
+    filename = str(tmp_path / "sales.txt")
+    with open(sales_file, "rb") as source, open(filename, "wb") as target:
+        target.write(source.read())
+
+    with LineIndex(filename) as index:
+        built = index[:]
+        assert not isinstance(index.offsets, memoryview)
+    assert os.path.exists(filename[:-4] + ".lines.idx")
+
+    with LineIndex(filename) as index:
+        # Mapped back in from the cache, not rebuilt
+        assert isinstance(index.offsets, memoryview)
+        assert index[:] == built
+
+    with open(filename, "a", encoding="utf-8") as f:
+        f.write("T99999|2024-12-31|P101|Laptop|1|1000|C001|North\n")
+    with LineIndex(filename) as index:
+        assert not isinstance(index.offsets, memoryview)
+        assert index[-1] == "T99999|2024-12-31|P101|Laptop|1|1000|C001|North"
+
+
+def test_sample(sales_file, tmp_path):
+    with LineIndex(sales_file, cache=False) as index:
+        sample = index.sample(50, seed=4)
+        assert sample == index.sample(50, seed=4)
+        lines = index[:]
+        positions = [lines.index(line) for line in sample]
+        assert positions == sorted(positions)
+        assert len(index.sample(len(index) + 10)) == len(index)
+
+
+def test_edge_cases(tmp_path):
+    empty = str(tmp_path / "empty.txt")
+    open(empty, "wb").close()
+    with LineIndex(empty, cache=False) as index:
+        assert len(index) == 0
+        with pytest.raises(IndexError):
+            index[0]
+
+    compressed = str(tmp_path / "sales.txt.gz")
+    with gzip.open(compressed, "wt") as f:
+        f.write("TransactionID|Date\n")
+    with pytest.raises(ValueError):
+        LineIndex(compressed)
@@ -0,0 +1,66 @@
+import shutil
+import threading
+
+import pytest
+
+import main
+from benchmarks.generate_data import make_catalog, make_products
+from tests.equivalence import PRODUCTS
+from utils.api_handler import create_product_mapping
+
+
+@pytest.fixture
+def workdir(sales_file, tmp_path, monkeypatch):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "output").mkdir()
+    shutil.copy(sales_file, tmp_path / "data" / "sales_data.txt")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("builtins.input", lambda prompt="": "n")
+    return tmp_path
+
+
+@pytest.fixture
+def fetch_threads(monkeypatch):
+    """
+    Stands in for the catalog fetch, recording the threads it ran on
+    """
+
+    catalog = make_catalog(make_products(PRODUCTS, 3), 3)
+    threads = []
+
+    def fetch_product_catalog(log=print):
+        threads.append(threading.current_thread())
+        log("Using cached product catalog")
+        return catalog, create_product_mapping(catalog)
+
+    monkeypatch.setattr(main, "fetch_product_catalog", fetch_product_catalog)
+    return threads
+
+
+def run(workdir, capsys, **options):
+    main.main(**options)
+    output = capsys.readouterr().out
+    report = (workdir / "output" / "sales_report.txt").read_text(encoding="utf-8")
+    enriched = (workdir / "data" / "enriched_sales_data.txt").read_text(encoding="utf-8")
+    # Only the timestamp may differ between runs
+    report = [line for line in report.splitlines() if "Generated:" not in line]
+    return output, report, enriched
+
+
+def test_prefetch_gives_the_same_output(workdir, fetch_threads, capsys):
+    output, report, enriched = run(workdir, capsys, prefetch=True)
+    assert fetch_threads[-1] is not threading.main_thread()
+
+    plain_output, plain_report, plain_enriched = run(workdir, capsys, prefetch=False)
+    assert fetch_threads[-1] is threading.main_thread()
+
+    assert "An error occurred" not in output
+    assert (report, enriched) == (plain_report, plain_enriched)
+    # The background fetch's messages are held back until step 6
+    assert output.index("[6/10]") < output.index("Using cached product catalog")
+    assert output == plain_output
+
+
+def test_no_prefetch_flag():
+    assert main.parse_args([])["prefetch"]
+    assert not main.parse_args(["--no-prefetch"])["prefetch"]
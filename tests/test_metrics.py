@@ -0,0 +1,78 @@
+import json
+import threading
+import tracemalloc
+
+import pytest
+
+from utils import metrics
+
+
+@metrics.instrument
+def double(values):
+    return [value * 2 for value in values]
+
+
+@pytest.fixture
+def collector():
+    collector = metrics.enable(trace_memory=True)
+    yield collector
+    metrics.disable()
+
+
+def test_nothing_recorded_while_disabled():
+    metrics.disable()
+
+    with metrics.stage("idle", 3) as record:
+        assert double([1, 2]) == [2, 4]
+    assert record == {}
+
+
+def test_stages_and_functions(collector):
+    with metrics.stage("double", 3) as record:
+        for _ in range(2):
+            rows = double([1, 2, 3])
+        record["rows_out"] = len(rows)
+
+    stage, = collector.stages
+    assert stage["name"] == "double"
+    assert (stage["rows_in"], stage["rows_out"]) == (3, 3)
+    assert stage["wall_seconds"] >= 0
+    assert stage["alloc_peak_bytes"] > 0
+
+    totals = collector.functions["double"]
+    assert totals["calls"] == 2
+    assert (totals["rows_in"], totals["rows_out"]) == (6, 6)
+    # The enclosing stage's peak covers the calls inside it
+    assert stage["alloc_peak_bytes"] >= totals["alloc_peak_bytes"]
+
+
+def test_other_threads_record_no_allocation_peak(collector):
+    thread = threading.Thread(target=double, args=([1, 2],))
+    thread.start()
+    thread.join()
+
+    assert collector.functions["double"]["calls"] == 1
+    assert collector.functions["double"]["alloc_peak_bytes"] is None
+
+
+def test_disable_stops_tracing(collector):
+    assert tracemalloc.is_tracing()
+    metrics.disable()
+    assert not tracemalloc.is_tracing()
+
+
+def test_write(collector, tmp_path, monkeypatch):
+    with metrics.stage("double"):
+        double([1])
+    filename = str(tmp_path / "metrics.json")
+    collector.write(filename)
+
+    with open(filename, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    assert [stage["name"] for stage in data["stages"]] == ["double"]
+    assert "double" in data["functions"]
+    assert data["total"]["peak_rss_bytes"] > 0
+
+    # Without the resource module the peak RSS is left out
+    monkeypatch.setattr(metrics, "resource", None)
+    assert collector.to_dict()["total"]["peak_rss_bytes"] is None
@@ -0,0 +1,39 @@
+from tests.equivalence import analytics, storable, to_the_cent
+from utils.data_processor import parse_transactions, validate_and_filter
+from utils.file_handler import read_sales_data
+from utils.parallel import run_parallel
+
+
+def test_parallel_matches_dicts(sales_file, expected):
+    result = run_parallel(sales_file, workers=3, keep_rows=True)
+
+    assert result["filter_summary"] == expected["filter_summary"]
+    assert result["transactions"].to_dicts() == expected["valid"]
+    assert analytics(result["summary"]) == to_the_cent(expected["analytics"])
+
+
+def test_one_worker_matches_many(sales_file):
+    one = run_parallel(sales_file, workers=1, keep_rows=True)
+    many = run_parallel(sales_file, workers=2, keep_rows=True)
+
+    assert many["filter_summary"] == one["filter_summary"]
+    assert many["transactions"].to_dicts() == one["transactions"].to_dicts()
+    assert analytics(many["summary"]) == analytics(one["summary"])
+
+
+def test_parallel_filters_match_dicts(sales_file):
+    transactions = [tx for tx in parse_transactions(read_sales_data(sales_file)) if storable(tx)]
+    valid, _, _ = validate_and_filter(transactions, region="North", min_amount=5000, max_amount=100000)
+
+    result = run_parallel(sales_file, workers=2, region="North", min_amount=5000,
+                          max_amount=100000, keep_rows=True)
+
+    assert result["transactions"].to_dicts() == valid
+    assert result["filter_summary"]["final_count"] == len(valid)
+
+
+def test_missing_file_gives_empty_result(tmp_path):
+    result = run_parallel(str(tmp_path / "missing.txt"), workers=2, keep_rows=True)
+
+    assert result["filter_summary"]["total_input"] == 0
+    assert len(result["transactions"]) == 0
@@ -0,0 +1,101 @@
+import calendar
+import gzip
+import os
+
+import pytest
+
+from tests.equivalence import analytics, to_the_cent
+from utils.parallel import load_sales, run_partitioned
+from utils.partitions import find_dates, partition_date_range, select_partitions
+
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region"
+
+
+@pytest.mark.parametrize("text, dates", [
+    ("sales_2024-03-01.txt", ["2024-03-01"]),
+    ("store_0012_20241201", ["2024-12-01"]),
+    ("sales_2024_01_01_to_2024_01_31.txt.gz", ["2024-01-01", "2024-01-31"]),
+    ("sales_2024-02-30.txt", []),
+    ("batch_120240101.txt", [])
+])
+def test_find_dates(text, dates):
+    assert find_dates(text) == dates
+
+
+@pytest.fixture(scope="module")
+def partitions(sales_file, tmp_path_factory):
+    """
+    The generated file split into one file per month, every other one
+    gzipped, with the lines whose date is not canonical in an undated
+    file; plus a corrupt file dated outside every window used
+    """
+
+    directory = tmp_path_factory.mktemp("partitions")
+    months = {}
+    with open(sales_file, "r", encoding="utf-8") as f:
+        next(f)
+        for line in f:
+            fields = line.split("|")
+            month = fields[1][:7] if len(fields) > 1 and len(fields[1]) == 10 and fields[1][4] == "-" else None
+            months.setdefault(month, []).append(line)
+
+    for i, (month, lines) in enumerate(sorted(months.items(), key=lambda item: item[0] or "")):
+        header = HEADER
+        if month is None:
+            path, opener = directory / "misc.txt", open
+        else:
+            last = calendar.monthrange(int(month[:4]), int(month[5:]))[1]
+            if i % 2:
+                path, opener = directory / f"sales_{month}-01_{month}-{last}.txt.gz", gzip.open
+            else:
+                # Dated only in the header
+                path, opener = directory / f"sales_{i}.txt", open
+                header = f"{HEADER} {month}-01 {month}-{last}"
+        with opener(path, "wt", encoding="utf-8") as f:
+            f.write(header + "\n")
+            f.writelines(lines)
+
+    (directory / "old_2019-01-01.txt.gz").write_bytes(b"\x1f\x8b\x08\x00 cut short")
+    return str(directory)
+
+
+def test_select_partitions_prunes_by_date(partitions):
+    selected = select_partitions(partitions, "2024-03-01", "2024-04-15")
+    names = [os.path.basename(filename) for filename, _ in selected]
+
+    assert names[0] == "misc.txt"
+    assert len(names) == 3
+    assert all(dates is None or (dates[1] >= "2024-03-01" and dates[0] <= "2024-04-15")
+               for _, dates in selected)
+    assert partition_date_range(os.path.join(partitions, "misc.txt")) is None
+
+
+@pytest.mark.parametrize("start_date, end_date", [
+    ("2024-03-01", "2024-04-15"),
+    ("2024-06-10", None),
+    ("2024-01-01", "2024-02-29")
+])
+def test_window_matches_dicts(partitions, expected, start_date, end_date):
+    # Partitions are merged in date order, a month at a time
+    valid = sorted((
+        tx for tx in expected["valid"]
+        if (start_date is None or tx["Date"] >= start_date) and (end_date is None or tx["Date"] <= end_date)
+    ), key=lambda tx: tx["Date"][:7])
+
+    result = run_partitioned(partitions, workers=2, start_date=start_date,
+                             end_date=end_date, keep_rows=True)
+
+    assert result["transactions"].to_dicts() == valid
+    assert analytics(result["summary"]) == to_the_cent(analytics(valid))
+
+
+def test_whole_directory(partitions, expected):
+    # The corrupt partition is only skipped when a window excludes it
+    with pytest.raises((OSError, EOFError)):
+        load_sales(partitions, workers=1)
+
+    result = load_sales(os.path.join(partitions, "[ms]*.txt*"), workers=2, keep_rows=True)
+
+    assert result["filter_summary"] == expected["filter_summary"]
+    assert len(result["transactions"]) == len(expected["valid"])
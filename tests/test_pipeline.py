@@ -0,0 +1,122 @@
+import pytest
+
+from tests.equivalence import to_the_cent
+from utils.data_processor import validate_and_filter
+from utils.file_handler import read_sales_data
+from utils.pipeline import SalesPipeline
+from utils.transaction_table import TransactionTable
+
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region"
+
+LINES = [
+    "T001|2024-12-01|P101|Laptop|2|45000|C001|North",
+    "T002|2024-12-02|P102|Mouse|5|500|C002|South",
+    "T003|2024-12-03|P101|Laptop|99999999999999999999|45000|C003|North",
+    "T004|2024/12/04|P101|Laptop|1|45000|C004|North",
+    "T005|2024-12-05|P101|Laptop|1|45000|North",
+    "X006|2024-12-06|P101|Laptop|1|45000|C006|North",
+    "T007|2024-12-07|P103|Keyboard|0|1,500|C007|North",
+    "T008|2024-12-08|P103|Keyboard|1|1,500|C008|North",
+    "T009|2025-01-09|P101|Laptop|1|45000|C009|North",
+    "",
+    "T010|2024-12-10|P104|Webcam|3|2500|C010|East"
+]
+
+
+@pytest.fixture
+def small_file(tmp_path):
+    filename = str(tmp_path / "sales.txt")
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(HEADER + "\n" + "\n".join(LINES) + "\n")
+    return filename
+
+
+def test_counts(small_file):
+    results = (
+        SalesPipeline(small_file)
+        .where(region="North", min_amount=2000, end_date="2024-12-31")
+        .collect()
+    )
+
+    assert results["counts"] == {
+        "raw_count": 10,
+        # T002 and T010 never get decoded
+        "pushed_down": 2,
+        # Too few fields, an overflowing quantity and a non-canonical date
+        "malformed": 3,
+        "invalid": 2,
+        "filtered_by_region": 0,
+        "filtered_by_date": 1,
+        "filtered_by_amount": 1,
+        "final_count": 1
+    }
+    assert [tx["TransactionID"] for tx in results["rows"].to_dicts()] == ["T001"]
+
+
+def test_non_ascii_region_is_not_pushed_down(tmp_path):
+    filename = str(tmp_path / "sales.txt")
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(HEADER + "\n")
+        f.write("T001|2024-12-01|P101|Laptop|2|45000|C001|Nörd\n")
+        f.write("T002|2024-12-01|P101|Laptop|2|45000|C002|North\n")
+
+    counts = SalesPipeline(filename).where(region="Nörd").collect()["counts"]
+
+    assert counts["pushed_down"] == 0
+    assert counts["filtered_by_region"] == 1
+    assert counts["final_count"] == 1
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("filters", [
+    {},
+    {"region": "North"},
+    {"min_amount": 5000, "max_amount": 50000},
+    {"region": "East", "start_date": "2024-03-01", "end_date": "2024-06-30"}
+])
+def test_rows_match_validate_and_filter(sales_file, expected, filters, workers):
+    results = SalesPipeline(sales_file, workers=workers).where(**filters).collect()
+
+    rows, _, _ = validate_and_filter(
+        expected["valid"], filters.get("region"), filters.get("min_amount"), filters.get("max_amount")
+    )
+    rows = [
+        tx for tx in rows
+        if filters.get("start_date", "") <= tx["Date"] <= filters.get("end_date", "9999")
+    ]
+
+    assert results["rows"].to_dicts() == TransactionTable.from_dicts(rows).to_dicts()
+    assert results["counts"]["final_count"] == len(rows)
+    assert results["counts"]["raw_count"] == len(read_sales_data(sales_file))
+
+
+def test_aggregates_match_analytics(sales_file, expected):
+    names = list(expected["analytics"])
+    names[names.index("find_peak_sales_day")] = "peak_sales_day"
+
+    pruned = SalesPipeline(sales_file).aggregate(*names).collect()
+    with_summary = SalesPipeline(sales_file).aggregate("summary", *names).collect()
+
+    for results in (pruned, with_summary):
+        assert results["counts"]["final_count"] == len(expected["valid"])
+        assert to_the_cent(expected["analytics"]) == {
+            name: results["peak_sales_day" if name == "find_peak_sales_day" else name]
+            for name in expected["analytics"]
+        }
+    assert "rows" not in pruned
+    assert "summary" not in pruned
+    assert with_summary["summary"] is not None
+
+
+def test_explain(small_file):
+    pipeline = SalesPipeline(small_file).where(region="North").aggregate("total_revenue")
+    plan = pipeline.explain()
+
+    assert "1 of 1 file(s)" in plan
+    assert "b'|North'" in plan
+    assert "build quantity, unit_price" in plan
+    assert "skip transaction_id" in plan
+
+    with pytest.raises(ValueError):
+        pipeline.aggregate("median")
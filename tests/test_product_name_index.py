@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from benchmarks.generate_data import make_catalog, make_products
+from utils.api_handler import ProductNameIndex, create_product_mapping
+
+
+def linear_match(product_mapping, product_name):
+    # The original fallback: the first title containing, or contained in,
+    # the name
+    name = product_name.lower()
+    for product in product_mapping.values():
+        title = product["title"].lower()
+        if title in name or name in title:
+            return product
+    return None
+
+
+@pytest.fixture(scope="module")
+def product_mapping():
+    catalog = make_catalog(make_products(300, 5), 5)
+    catalog += [
+        {"id": 9001, "title": "Mouse", "category": "accessories", "brand": None, "price": 5},
+        {"id": 9002, "title": "USB", "category": "accessories", "brand": None, "price": 2},
+        {"id": 9003, "title": "Ab", "category": "misc", "brand": None, "price": 1}
+    ]
+    return create_product_mapping(catalog)
+
+
+def test_matches_linear_scan(product_mapping):
+    rng = random.Random(11)
+    titles = [product["title"] for product in product_mapping.values()]
+    names = ["", "a", "AB", "mouse", "Wireless MOUSE", "USB Cable 6", "Gaming Laptop Pro", "zzz"]
+    for _ in range(300):
+        title = rng.choice(titles)
+        start = rng.randrange(len(title))
+        names.append(title[start:start + rng.randrange(1, 12)])
+        names.append("Big " + title.upper() + " Kit")
+
+    index = ProductNameIndex(product_mapping)
+    for name in names:
+        assert index.match(name) is linear_match(product_mapping, name), name
+
+
+def test_caches_per_name(product_mapping):
+    index = ProductNameIndex(product_mapping)
+    match = index.match("Wireless Mouse")
+
+    assert index.cache["Wireless Mouse"] is match
+    assert index.match("Wireless Mouse") is match
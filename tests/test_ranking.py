@@ -0,0 +1,33 @@
+import pytest
+
+from utils.data_processor import customer_analysis, top_selling_products
+from utils.sales_summary import SalesSummary
+
+
+def rows(pairs):
+    return [
+        {"TransactionID": f"T{i}", "Date": "2024-12-01", "ProductID": "P101", "ProductName": name,
+         "Quantity": quantity, "UnitPrice": 10.0, "CustomerID": f"C{quantity % 4}", "Region": "North"}
+        for i, (name, quantity) in enumerate(pairs)
+    ]
+
+
+@pytest.mark.parametrize("n", [0, 1, 3, 5, 100])
+def test_top_n_is_a_prefix_of_the_full_ranking(expected, n):
+    summary = SalesSummary.from_transactions(expected["valid"])
+    for source in (expected["valid"], summary):
+        ranking = top_selling_products(source, n=None)
+        assert top_selling_products(source, n=n) == ranking[:n]
+
+        customers = customer_analysis(source)
+        top = customer_analysis(source, n=n)
+        assert list(top.items()) == list(customers.items())[:n]
+
+
+def test_ties_keep_first_seen_order():
+    transactions = rows([("Mouse", 2), ("Laptop", 5), ("Cable", 2), ("Webcam", 2), ("Monitor", 1)])
+
+    assert [row[0] for row in top_selling_products(transactions, n=3)] == ["Laptop", "Mouse", "Cable"]
+    assert [row[0] for row in top_selling_products(transactions, n=None)] == [
+        "Laptop", "Mouse", "Cable", "Webcam", "Monitor"
+    ]
@@ -0,0 +1,33 @@
+import json
+
+from tests.equivalence import analytics, to_the_cent
+from utils.sales_summary import SalesSummary
+from utils.transaction_table import TransactionTable
+
+
+def test_summary_matches_dicts(expected, vectorized_mode):
+    summary = SalesSummary.from_transactions(expected["valid"])
+    table_summary = SalesSummary.from_transactions(TransactionTable.from_dicts(expected["valid"]))
+
+    assert analytics(summary) == to_the_cent(expected["analytics"])
+    assert analytics(table_summary) == to_the_cent(expected["analytics"])
+
+
+def test_merged_parts_match_one_pass(expected):
+    valid = expected["valid"]
+    whole = analytics(SalesSummary.from_transactions(valid))
+
+    # Sums are exact, so the split makes no difference at all
+    merged = SalesSummary()
+    for start in range(0, len(valid), 700):
+        merged.merge(SalesSummary.from_transactions(valid[start:start + 700]))
+
+    assert len(merged) == len(valid)
+    assert analytics(merged) == whole
+
+
+def test_dict_round_trip(expected):
+    summary = SalesSummary.from_transactions(expected["valid"])
+    restored = SalesSummary.from_dict(json.loads(json.dumps(summary.to_dict())))
+
+    assert analytics(restored) == analytics(summary)
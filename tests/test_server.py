@@ -0,0 +1,102 @@
+import json
+import shutil
+import threading
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+import server
+from benchmarks.generate_data import make_catalog, make_products
+from tests.equivalence import PRODUCTS
+from utils.api_handler import ProductNameIndex, create_product_mapping
+from utils.data_processor import parse_transactions, region_wise_sales, validate_and_filter
+from utils.file_handler import read_sales_data
+
+
+@pytest.fixture
+def service(sales_file, tmp_path, monkeypatch):
+    catalog = make_catalog(make_products(PRODUCTS, 3), 3)
+    mapping = create_product_mapping(catalog)
+    monkeypatch.setattr(server, "load_catalog", lambda: (catalog, mapping, ProductNameIndex(mapping)))
+
+    data_file = str(tmp_path / "sales.txt")
+    shutil.copy(sales_file, data_file)
+    return server.AnalyticsService(data_file, cache_size=4)
+
+
+@pytest.fixture
+def base_url(service):
+    http = server.make_server(service, port=0)
+    thread = threading.Thread(target=http.serve_forever, daemon=True)
+    thread.start()
+    host, port = http.server_address[:2]
+    yield f"http://{host}:{port}"
+    http.shutdown()
+    http.server_close()
+
+
+def get(url):
+    try:
+        with urlopen(url) as response:
+            return response.status, json.load(response)
+    except HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = server.LRUCache(2)
+    cache.get("a", lambda: 1)
+    cache.get("b", lambda: 2)
+    cache.get("a", lambda: None)
+    cache.get("c", lambda: 3)
+
+    assert list(cache.items) == ["a", "c"]
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_query_matches_data_processor(service):
+    table = parse_transactions(read_sales_data(service.data_file), columnar=True)
+    filtered, _, _ = validate_and_filter(table, region="North", min_amount=1000)
+
+    result = service.query("region_wise_sales", {"region": "North", "min": "1,000"})
+    assert result == region_wise_sales(filtered)
+
+    hits = service.cache.hits
+    assert service.query("region_wise_sales", {"region": "North", "min": "1000"}) == result
+    assert service.cache.hits == hits + 1
+
+
+def test_changed_file_reloads_and_empties_cache(service):
+    before = service.query("total_revenue", {})
+    version = service.dataset.version
+
+    with open(service.data_file, "a", encoding="utf-8") as f:
+        f.write("T99999|2024-12-31|P101|Laptop|1|1000|C001|North\n")
+    after = service.query("total_revenue", {})
+
+    assert service.dataset.version != version
+    assert after["transaction_count"] == before["transaction_count"] + 1
+    assert after["total_revenue"] == pytest.approx(before["total_revenue"] + 1000)
+    assert all(key[0] == service.dataset.version for key in service.cache.items)
+
+
+@pytest.mark.parametrize("path, status", [
+    ("/status", 200),
+    ("/top_selling_products?n=3&region=North", 200),
+    ("/top_selling_products?n=-1", 400),
+    ("/top_selling_products?n=three", 400),
+    ("/total_revenue?min=lots", 400),
+    ("/nothing_here", 404)
+])
+def test_http_status(base_url, path, status):
+    code, body = get(base_url + path)
+
+    assert code == status
+    if status != 200:
+        assert "error" in body
+
+
+def test_http_top_selling_products(base_url):
+    _, body = get(base_url + "/top_selling_products?n=3")
+    assert len(body) == 3
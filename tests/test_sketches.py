@@ -0,0 +1,106 @@
+import json
+import math
+import random
+
+import pytest
+
+from tests.equivalence import analytics, to_the_cent
+from utils.data_processor import customer_analysis, daily_sales_trend
+from utils.sales_summary import SalesSummary
+from utils.sketches import Approximation, CountMinSketch, HyperLogLog, SpaceSaving
+
+
+def test_hyperloglog_within_error():
+    first = HyperLogLog(12)
+    second = HyperLogLog(12)
+    for i in range(20000):
+        first.add(f"C{i}")
+        # Repeats do not count again
+        first.add(f"C{i}")
+    for i in range(10000, 30000):
+        second.add(f"C{i}")
+
+    error = 4 * 1.04 / math.sqrt(1 << 12)
+    assert len(first) == pytest.approx(20000, rel=error)
+
+    restored = HyperLogLog.from_dict(json.loads(json.dumps(first.to_dict())))
+    assert restored.registers == first.registers
+    assert len(restored.merge(second)) == pytest.approx(30000, rel=error)
+    assert len(HyperLogLog(12)) == 0
+
+    with pytest.raises(ValueError):
+        first.merge(HyperLogLog(10))
+
+
+def test_count_min_never_undercounts():
+    rng = random.Random(4)
+    sketch = CountMinSketch.for_error(0.001, 0.01)
+    other = CountMinSketch.for_error(0.001, 0.01)
+    counts = {}
+    for _ in range(20000):
+        key = f"C{int(rng.paretovariate(1.2))}"
+        counts[key] = counts.get(key, 0) + 1
+        (sketch if rng.random() < 0.5 else other).add(key)
+
+    merged = CountMinSketch.from_dict(json.loads(json.dumps(sketch.to_dict()))).merge(other)
+    assert merged.total == 20000
+    for key, count in counts.items():
+        assert count <= merged.estimate(key) <= count + 0.001 * 20000
+
+
+def test_space_saving_bounds():
+    rng = random.Random(8)
+    weights = {}
+    first = SpaceSaving(20)
+    second = SpaceSaving(20)
+    for _ in range(5000):
+        key = f"C{int(rng.paretovariate(1.0))}"
+        weight = rng.uniform(1, 100)
+        weights[key] = weights.get(key, 0) + weight
+        (first if rng.random() < 0.5 else second).add(key, weight, lambda: None)
+
+    merged = first.merge(second, lambda a, b: a, lambda payload: payload)
+    total = sum(weights.values())
+    assert len(merged) == 20
+    for key, (weight, error, _) in merged.entries.items():
+        assert weight - error - 1e-6 <= weights[key] <= weight + 1e-6
+
+    # Every key heavier than the bound is tracked
+    for key, weight in weights.items():
+        if weight > 2 * total / 20:
+            assert key in merged.entries
+
+
+def test_approximation():
+    assert Approximation(spend_error=0.01).top_customers == 100
+    assert Approximation.from_dict(Approximation().to_dict()) == Approximation()
+    for options in ({"spend_error": 0}, {"cardinality_error": 1}, {"top_customers": 0},
+                    {"count_confidence": 1}):
+        with pytest.raises(ValueError):
+            Approximation(**options)
+
+
+def test_approximate_summary(expected):
+    approximate = Approximation(top_customers=20)
+    summary = SalesSummary.from_transactions(expected["valid"], approximate)
+    exact = expected["analytics"]
+
+    # Totals, regions and products stay exact
+    result = analytics(summary)
+    for name in ("total_revenue", "region_wise_sales", "top_selling_products", "low_performing_products"):
+        assert result[name] == to_the_cent(exact[name])
+
+    trend = daily_sales_trend(summary)
+    for date_str, stats in exact["daily_sales_trend"].items():
+        assert trend[date_str]["revenue"] == pytest.approx(stats["revenue"], abs=0.01)
+        assert trend[date_str]["unique_customers"] == pytest.approx(stats["unique_customers"], abs=3)
+
+    customers = customer_analysis(summary)
+    assert 0 < len(customers) <= 20
+    for customer_id, stats in customers.items():
+        spent = exact["customer_analysis"][customer_id]["total_spent"]
+        assert stats["estimated"]
+        assert stats["total_spent"] - stats["spent_error"] - 0.01 <= spent <= stats["total_spent"] + 0.01
+
+    restored = SalesSummary.from_dict(json.loads(json.dumps(summary.to_dict())))
+    assert analytics(restored) == result
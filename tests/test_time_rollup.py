@@ -0,0 +1,111 @@
+import math
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from utils.sales_summary import SalesSummary
+from utils.time_rollup import TimeRollup
+
+
+START = date(2023, 12, 20)
+
+
+@pytest.fixture(scope="module")
+def daily():
+    # Sparse days with sales, some with equal revenue to exercise ties
+    rng = random.Random(6)
+    days = {}
+    for offset in sorted(rng.sample(range(120), 50)):
+        revenue = rng.choice([100.0, 250.5, 250.5, rng.uniform(1, 1000)])
+        days[(START + timedelta(days=offset)).isoformat()] = (revenue, rng.randrange(1, 9), rng.randrange(1, 30))
+    return days
+
+
+def in_range(daily, start, end):
+    return {day: stats for day, stats in daily.items() if start <= day <= end}
+
+
+def test_totals_and_peak_match_a_scan(daily):
+    rollup = TimeRollup.from_daily(daily)
+    rng = random.Random(1)
+
+    for _ in range(200):
+        first, last = sorted(rng.sample(range(-5, 130), 2))
+        start = (START + timedelta(days=first)).isoformat()
+        end = (START + timedelta(days=last)).isoformat()
+        window = in_range(daily, start, end)
+
+        revenue, count, quantity = rollup.totals(start, end)
+        assert revenue == pytest.approx(math.fsum(stats[0] for stats in window.values()))
+        assert count == sum(stats[1] for stats in window.values())
+        assert quantity == sum(stats[2] for stats in window.values())
+
+        peak = rollup.peak(start, end)
+        if not window:
+            assert peak is None
+            continue
+        # max() keeps the earliest day on ties
+        best = max(window, key=lambda day: window[day][0])
+        assert peak == (date.fromisoformat(best).toordinal(), window[best][0], window[best][1])
+
+
+def test_open_ends(daily):
+    rollup = TimeRollup.from_daily(daily)
+
+    assert rollup.totals()[1] == sum(stats[1] for stats in daily.values())
+    assert rollup.totals(end=min(daily)) == daily[min(daily)]
+    assert rollup.totals(start=date(2030, 1, 1)) == (0.0, 0, 0)
+
+
+def test_moving_average(daily):
+    rollup = TimeRollup.from_daily(daily)
+    first = date.fromisoformat(min(daily))
+
+    for day, average in rollup.moving_average(7):
+        window = [
+            daily.get(date.fromordinal(day - i).isoformat(), (0.0,))[0]
+            for i in range(7) if day - i >= first.toordinal()
+        ]
+        assert average == pytest.approx(sum(window) / len(window))
+
+    with pytest.raises(ValueError):
+        rollup.moving_average(0)
+
+
+@pytest.mark.parametrize("period, label", [
+    ("day", lambda day: day.isoformat()),
+    ("week", lambda day: "{:04d}-W{:02d}".format(*day.isocalendar()[:2])),
+    ("month", lambda day: f"{day.year:04d}-{day.month:02d}")
+])
+def test_buckets(daily, period, label):
+    expected = {}
+    for day, stats in daily.items():
+        bucket = expected.setdefault(label(date.fromisoformat(day)), [0.0, 0, 0])
+        for i in range(3):
+            bucket[i] += stats[i]
+
+    buckets = TimeRollup.from_daily(daily).buckets(period)
+    assert list(buckets) == list(expected)
+    for name, (revenue, count, quantity) in buckets.items():
+        assert revenue == pytest.approx(expected[name][0])
+        assert (count, quantity) == tuple(expected[name][1:])
+
+
+def test_construction(daily):
+    rollup = TimeRollup.from_daily(dict(daily, **{"12/05/2024": (5.0, 1, 1)}))
+
+    assert len(rollup) == len(daily)
+    assert TimeRollup.from_dict(rollup.to_dict()).to_dict() == rollup.to_dict()
+    with pytest.raises(ValueError):
+        TimeRollup([2, 1], [1.0, 1.0], [1, 1], [1, 1])
+    with pytest.raises(ValueError):
+        rollup.buckets("year")
+
+
+def test_summary_rollup(expected):
+    summary = SalesSummary.from_transactions(expected["valid"])
+    revenue, count, _ = summary.rollup().totals()
+
+    assert revenue == summary.total_revenue
+    assert count == len(expected["valid"])
@@ -0,0 +1,52 @@
+import pytest
+
+from tests.equivalence import storable
+from utils.data_processor import parse_transactions, validate_and_filter
+from utils.file_handler import read_sales_data
+from utils.transaction_index import TransactionIndex
+
+
+QUERIES = [
+    {},
+    {"region": "North"},
+    {"region": "Nowhere"},
+    {"min_amount": 5000},
+    {"max_amount": 2000},
+    {"region": "East", "min_amount": 1000, "max_amount": 50000},
+    {"min_amount": 50000, "max_amount": 1000}
+]
+
+
+@pytest.fixture(scope="module")
+def transactions(sales_file):
+    return [tx for tx in parse_transactions(read_sales_data(sales_file)) if storable(tx)]
+
+
+@pytest.mark.parametrize("query", QUERIES, ids=lambda query: repr(query))
+def test_index_matches_validate_and_filter(transactions, query):
+    expected = validate_and_filter(transactions, **query)
+    index = TransactionIndex.from_transactions(transactions)
+
+    assert validate_and_filter(index, **query) == expected
+    assert index.count(**query) == len(expected[0])
+
+
+@pytest.mark.parametrize("query", QUERIES, ids=lambda query: repr(query))
+def test_table_index_matches_validate_and_filter(sales_file, query):
+    table = parse_transactions(read_sales_data(sales_file), columnar=True)
+    expected, invalid_count, filter_summary = validate_and_filter(table, **query)
+    index = TransactionIndex.from_transactions(table)
+
+    filtered, index_invalid, index_summary = validate_and_filter(index, **query)
+    assert filtered.to_dicts() == expected.to_dicts()
+    assert (index_invalid, index_summary) == (invalid_count, filter_summary)
+
+
+def test_amount_range():
+    index = TransactionIndex([
+        {"Quantity": 2, "UnitPrice": 10.0, "Region": "North"},
+        {"Quantity": 1, "UnitPrice": 5.0, "Region": "South"}
+    ])
+
+    assert index.amount_range() == (5.0, 20.0)
+    assert TransactionIndex([]).amount_range() is None
@@ -0,0 +1,60 @@
+import pytest
+
+from tests.equivalence import analytics
+from utils.data_processor import parse_transactions, validate_and_filter
+from utils.file_handler import read_sales_data
+from utils.transaction_table import FIELDS, QUANTITY_MAX, TransactionTable
+
+
+ROW = ["T001", "2024-12-01", "P101", "Laptop", 2, 45000.0, "C001", "North"]
+
+
+def test_table_matches_dicts(sales_file, expected, vectorized_mode):
+    table = parse_transactions(read_sales_data(sales_file), columnar=True)
+    valid, _, filter_summary = validate_and_filter(table)
+
+    assert isinstance(valid, TransactionTable)
+    assert table.rejected == expected["rejected"]
+    assert filter_summary == expected["filter_summary"]
+    assert valid.to_dicts() == expected["valid"]
+    assert analytics(valid) == expected["analytics"]
+
+
+@pytest.mark.parametrize("column, value", [
+    (1, "2024/12/01"),
+    (1, "20241201"),
+    (4, QUANTITY_MAX + 1),
+    (5, float("inf")),
+    (5, float("nan"))
+])
+def test_append_rejects_unstorable_row_whole(column, value):
+    table = TransactionTable()
+    table.append(*ROW)
+    row = list(ROW)
+    row[column] = value
+
+    with pytest.raises(ValueError):
+        table.append(*row)
+
+    # Every column still holds the one good row
+    assert len(table) == 1
+    assert len(table.transaction_id) == len(table.date) == len(table.region.codes) == 1
+    assert table.to_dicts() == [dict(zip(FIELDS, ROW))]
+
+
+def test_parse_counts_rejected_rows():
+    lines = [
+        "|".join(map(str, ROW)),
+        "T002|2024-12-01|P101|Laptop|99999999999999999999|45000|C001|North",
+        "T003|2024-12-01|P101|Laptop|1|1e400|C001|North",
+        "T004|2024/12/01|P101|Laptop|1|45000|C001|North"
+    ]
+
+    table = parse_transactions(lines, columnar=True)
+    _, _, filter_summary = validate_and_filter(table)
+
+    assert len(table) == 1
+    assert table.rejected == 3
+    assert filter_summary["total_input"] == 4
+    assert filter_summary["invalid"] == 3
+    assert filter_summary["final_count"] == 1
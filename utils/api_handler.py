@@ -1,19 +1,156 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from utils.catalog_cache import (
+    CATALOG_CACHE_FILE,
+    CATALOG_TTL,
+    catalog_age,
+    is_fresh,
+    load_catalog_cache,
+    save_catalog_cache
+)
+from utils.columnar_file import COLUMNAR_SUFFIX, save_columnar
+from utils.enriched_view import EnrichedTransactions, ProductDimension
+from utils.file_handler import open_output
+from utils.metrics import instrument
+
+PRODUCTS_URL = "https://dummyjson.com/products"
+
+# Products requested per page, and pages requested at once
+PAGE_SIZE = 100
+FETCH_WORKERS = 4
+
+# Tries per page, and the first delay in seconds between them (doubled
+# after each failed try)
+PAGE_ATTEMPTS = 3
+RETRY_BACKOFF = 0.5
+
+
+@instrument
+def fetch_all_products(url=PRODUCTS_URL, cache_file=CATALOG_CACHE_FILE, ttl=CATALOG_TTL,
+                       workers=FETCH_WORKERS, log=print):
+    """
+    Fetches all products from DummyJSON API, see fetch_product_catalog
+    """
 
+    api_products, _ = fetch_product_catalog(url, cache_file, ttl, workers, log)
+    return api_products
 
-def fetch_all_products():
+
+def _get_page(session, url, skip, headers=None, log=print):
     """
-    Fetches all products from DummyJSON API
+    Requests one page of products. Connection errors, timeouts, 429 and
+    5xx responses are retried with exponential backoff.
     """
 
-    url = "https://dummyjson.com/products"
+    for attempt in range(PAGE_ATTEMPTS):
+        try:
+            response = session.get(
+                url, params={"limit": PAGE_SIZE, "skip": skip},
+                headers=headers, timeout=5
+            )
+            if response.status_code == 429 or response.status_code >= 500:
+                response.raise_for_status()
+        except (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+            requests.exceptions.HTTPError
+        ) as e:
+            if attempt + 1 == PAGE_ATTEMPTS:
+                raise
+            log(f"Retrying products page at {skip}: {e}")
+            time.sleep(RETRY_BACKOFF * 2 ** attempt)
+            continue
+
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+
+def _fetch_pages(session, url, headers, workers, log=print):
+    """
+    Fetches the first page, which gives the total, then the remaining
+    pages concurrently.
+
+    Returns: (first page response, raw products in API order), with
+    products None if the first page came back 304 Not Modified
+    """
+
+    first = _get_page(session, url, 0, headers, log)
+    if first.status_code == 304 and headers:
+        return first, None
+
+    data = first.json()
+    products = list(data.get("products", []))
+    total = data.get("total", len(products))
+
+    # The API may cap the page size, step by what it actually returned
+    step = len(products)
+    if not step or step >= total:
+        return first, products
+
+    skips = range(step, total, step)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # map() yields in submission order, so pages stay in order
+        pages = pool.map(lambda skip: _get_page(session, url, skip, log=log).json(), skips)
+        for page in pages:
+            products.extend(page.get("products", []))
+
+    return first, products
+
+
+@instrument
+def fetch_product_catalog(url=PRODUCTS_URL, cache_file=CATALOG_CACHE_FILE, ttl=CATALOG_TTL,
+                          workers=FETCH_WORKERS, log=print):
+    """
+    Fetches all products from DummyJSON API, through an on-disk cache.
+
+    The catalog is paged: the first page gives the total and the other
+    pages are fetched by up to workers threads sharing one connection pool.
+
+    A cached catalog younger than ttl seconds is used as is. An older one
+    is revalidated with its ETag / Last-Modified and kept if unchanged,
+    and is still used if the API cannot be reached. Set cache_file to None
+    to always fetch.
+
+    Progress messages go to log, one string per call.
+
+    Returns: (api_products, product_mapping)
+    """
+
+    cache = load_catalog_cache(cache_file) if cache_file else None
+    if cache is not None and cache["url"] != url:
+        cache = None
+
+    if cache is not None and is_fresh(cache, ttl):
+        log("Using cached product catalog")
+        return cache["products"], cache["mapping"]
+
+    headers = {}
+    if cache is not None:
+        if cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        if cache.get("last_modified"):
+            headers["If-Modified-Since"] = cache["last_modified"]
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
 
     try:
-        response = requests.get(url, params={"limit": 100}, timeout=5)
-        response.raise_for_status()
+        with session:
+            response, products = _fetch_pages(session, url, headers, workers, log)
 
-        data = response.json()
-        products = data.get("products", [])
+        if products is None:
+            log("Product catalog unchanged, using cached copy")
+            cache["fetched_at"] = time.time()
+            _save_catalog(cache_file, cache, log)
+            return cache["products"], cache["mapping"]
 
         cleaned_products = []
 
@@ -26,14 +163,43 @@ def fetch_all_products():
                 "price": p.get("price")
             })
 
-        print("Successfully fetched products from DummyJSON API")
-        return cleaned_products
+        log("Successfully fetched products from DummyJSON API")
 
     except requests.exceptions.RequestException as e:
-        print("Failed to fetch products from DummyJSON API:", e)
-        return []
+        log(f"Failed to fetch products from DummyJSON API: {e}")
+
+        if cache is not None:
+            hours = catalog_age(cache) / 3600
+            log(f"Using cached product catalog from {hours:.1f} hours ago")
+            return cache["products"], cache["mapping"]
+
+        return [], {}
+
+    product_mapping = create_product_mapping(cleaned_products)
+
+    if cache_file:
+        cache = {
+            "url": url,
+            "fetched_at": time.time(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "products": cleaned_products,
+            "mapping": product_mapping
+        }
+        _save_catalog(cache_file, cache, log)
+
+    return cleaned_products, product_mapping
+
+
+def _save_catalog(cache_file, cache, log=print):
+    # A cache that cannot be written only costs a fetch next time
+    try:
+        save_catalog_cache(cache_file, cache)
+    except OSError as e:
+        log(f"Could not save product catalog cache: {e}")
 
 
+@instrument
 def create_product_mapping(api_products):
     """
     Creates a mapping of product IDs to product info
@@ -55,63 +221,180 @@ def create_product_mapping(api_products):
     return product_mapping
 
 
-def enrich_sales_data(transactions, product_mapping):
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ProductNameIndex:
+    """
+    Finds the first product in a product mapping whose title contains, or
+    is contained in, a product name (case-insensitive).
+
+    Titles are lowercased once. Titles contained in the name are found by
+    looking up the name's substrings; titles containing the name must have
+    every trigram of the name, so only the titles listed under its rarest
+    trigram are checked. Results are memoized per product name.
+    """
+
+    def __init__(self, product_mapping):
+        # (lowercased title, product) in mapping order
+        self.products = []
+        # lowercased title -> its first position in self.products
+        self.positions = {}
+        # trigram -> positions in self.products, ascending
+        self.postings = {}
+        self.cache = {}
+
+        for product in product_mapping.values():
+            title = product.get("title")
+            if title is None:
+                continue
+
+            position = len(self.products)
+            title = title.lower()
+
+            self.products.append((title, product))
+            self.positions.setdefault(title, position)
+            for gram in _trigrams(title):
+                self.postings.setdefault(gram, []).append(position)
+
+        self.lengths = sorted({len(title) for title in self.positions})
+
+    def match(self, product_name):
+        """
+        Returns the matched product info, or None
+        """
+
+        if product_name in self.cache:
+            return self.cache[product_name]
+
+        name = product_name.lower()
+        first = len(self.products)
+
+        # Titles contained in the name
+        positions = self.positions
+        for length in self.lengths:
+            if length > len(name):
+                break
+            for i in range(len(name) - length + 1):
+                position = positions.get(name[i:i + length])
+                if position is not None and position < first:
+                    first = position
+
+        # Titles containing the name
+        grams = _trigrams(name)
+        if grams:
+            candidates = min(
+                (self.postings.get(gram, ()) for gram in grams),
+                key=len
+            )
+        else:
+            candidates = range(len(self.products))
+
+        for position in candidates:
+            if position >= first:
+                break
+            if name in self.products[position][0]:
+                first = position
+                break
+
+        match = self.products[first][1] if first < len(self.products) else None
+        self.cache[product_name] = match
+        return match
+
+
+@instrument
+def enrich_sales_data(transactions, product_mapping, name_index=None):
     """
     Enriches sales transactions using API product data
+
+    name_index is a ProductNameIndex over product_mapping, built here if
+    not given
+
+    Each distinct (ProductID, ProductName) pair is matched once into a
+    product dimension and every row only keeps its integer key, so the
+    matching work grows with the number of products, not rows.
+
+    Returns: EnrichedTransactions, a lazy view that builds the enriched
+    rows on access
     """
 
-    enriched = []
+    if name_index is None:
+        name_index = ProductNameIndex(product_mapping)
 
-    for tx in transactions:
-        enriched_tx = tx.copy()
+    dimension = ProductDimension(
+        lambda product_id, product_name: _match_product(product_id, product_name, product_mapping, name_index)
+    )
+    return EnrichedTransactions.join(transactions, dimension)
 
-        product_id = tx.get("ProductID", "")
-        numeric_id = None
 
-        try:
-            numeric_id = int("".join(filter(str.isdigit, product_id)))
-        except ValueError:
-            pass
-
-        api_product = product_mapping.get(numeric_id)
-
-        # Optional fallback by product name
-        if not api_product:
-            for p in product_mapping.values():
-                if (
-                    p["title"].lower() in tx["ProductName"].lower()
-                    or tx["ProductName"].lower() in p["title"].lower()
-                ):
-                    api_product = p
-                    break
-
-        if api_product:
-            enriched_tx["API_Category"] = api_product.get("category")
-            enriched_tx["API_Brand"] = api_product.get("brand")
-            enriched_tx["API_Match"] = True
-        else:
-            enriched_tx["API_Category"] = None
-            enriched_tx["API_Brand"] = None
-            enriched_tx["API_Match"] = False
+def _match_product(product_id, product_name, product_mapping, name_index):
+    """
+    Matches a product by the digits of its ID, then by name
+
+    Returns: (API_Category, API_Brand, API_Match)
+    """
+
+    numeric_id = None
 
-        enriched.append(enriched_tx)
+    try:
+        numeric_id = int("".join(filter(str.isdigit, product_id)))
+    except ValueError:
+        pass
+
+    api_product = product_mapping.get(numeric_id)
 
-    return enriched
+    # Optional fallback by product name
+    if not api_product:
+        api_product = name_index.match(product_name)
 
+    if api_product:
+        return api_product.get("category"), api_product.get("brand"), True
+    return None, None, False
 
-def save_enriched_data(enriched_transactions, filename="data/enriched_sales_data.txt"):
+
+@instrument
+def save_enriched_data(enriched_transactions, filename="data/enriched_sales_data.txt", append=False,
+                       compression=None, file_format=None):
     """
     Saves enriched transactions to file
+
+    With append=True rows are added to an existing file (the header is
+    only written if the file is new or empty).
+
+    file_format is "text" (pipe-delimited) or "columnar" (typed binary
+    column blocks, see columnar_file), by default "columnar" when filename
+    ends in .scol. A text file is compressed as it is written with
+    compression ("gz", "bz2" or "xz"), by default when filename ends in
+    .gz, .bz2 or .xz.
     """
 
+    if file_format is None:
+        file_format = "columnar" if filename.endswith(COLUMNAR_SUFFIX) else "text"
+
+    if file_format == "columnar":
+        # Columns are memory-mapped when loaded, so they stay uncompressed
+        if compression is not None:
+            raise ValueError("The columnar format cannot be compressed")
+        save_columnar(enriched_transactions, filename, append)
+        print(f"Enriched data saved to {filename}")
+        return
+    if file_format != "text":
+        raise ValueError(f"Unknown enriched data format '{file_format}'")
+
     headers = [
         "TransactionID", "Date", "ProductID", "ProductName",
         "Quantity", "UnitPrice", "CustomerID", "Region",
         "API_Category", "API_Brand", "API_Match"
     ]
 
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write("|".join(headers) + "\n")
+    # A compressed file's position restarts with each appended stream, so
+    # emptiness is checked on disk
+    new_file = not append or not os.path.exists(filename) or os.path.getsize(filename) == 0
+
+    with open_output(filename, append, compression) as f:
+        if new_file:
+            f.write("|".join(headers) + "\n")
 
         for tx in enriched_transactions:
             row = [str(tx.get(h, "")) for h in headers]
@@ -0,0 +1,75 @@
+import json
+import os
+import time
+
+
+CATALOG_VERSION = 1
+
+CATALOG_CACHE_FILE = "data/product_catalog.json"
+
+# Seconds a cached catalog is used without asking the API again
+CATALOG_TTL = 24 * 60 * 60
+
+
+def load_catalog_cache(cache_file):
+    """
+    Loads a saved product catalog, with the product mapping rebuilt.
+
+    Returns: cache dictionary, or None if missing, unreadable or from an
+    older version
+    """
+
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(data, dict) or data.get("version") != CATALOG_VERSION:
+        return None
+
+    try:
+        # Saved as rows so the id keys keep their type
+        data["mapping"] = {
+            product_id: {"title": title, "category": category, "brand": brand}
+            for product_id, title, category, brand in data["mapping"]
+        }
+        data["fetched_at"] = float(data["fetched_at"])
+        list(data["products"])
+        str(data["url"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    return data
+
+
+def save_catalog_cache(cache_file, cache):
+    """
+    Writes a product catalog, replacing the old file only once the new one
+    is complete
+    """
+
+    mapping = [
+        [product_id, info["title"], info["category"], info["brand"]]
+        for product_id, info in cache["mapping"].items()
+    ]
+    data = dict(cache, version=CATALOG_VERSION, mapping=mapping)
+
+    temp_file = cache_file + ".tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(temp_file, cache_file)
+
+
+def catalog_age(cache, now=None):
+    """
+    Returns the seconds since the cached catalog was fetched or revalidated
+    """
+
+    return (time.time() if now is None else now) - cache["fetched_at"]
+
+
+def is_fresh(cache, ttl, now=None):
+    age = catalog_age(cache, now)
+    # A negative age means the clock went back, do not trust it
+    return 0 <= age < ttl
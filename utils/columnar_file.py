@@ -0,0 +1,435 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from itertools import chain
+
+from utils.enriched_view import EnrichedTransactions
+from utils.transaction_table import Categorical
+
+
+COLUMNAR_MAGIC = b"SCOL"
+COLUMNAR_VERSION = 1
+
+# File suffix save_enriched_data writes this format for
+COLUMNAR_SUFFIX = ".scol"
+
+# magic, version, header length; the JSON header follows. A file is one
+# or more segments of preamble, header and column blocks, each append
+# adding a segment
+PREAMBLE = struct.Struct("<4sII")
+
+# Blocks start on 8-byte boundaries so they map as aligned arrays, and
+# every segment is a whole number of them long
+ALIGNMENT = 8
+
+# column -> type. "dictionary" columns are integer codes into a list of
+# distinct values (which may include None), "string" columns are offsets
+# into UTF-8 data, the others are fixed-width arrays
+ENRICHED_COLUMNS = {
+    "TransactionID": "string",
+    "Date": "dictionary",
+    "ProductID": "dictionary",
+    "ProductName": "dictionary",
+    "Quantity": "int64",
+    "UnitPrice": "float64",
+    "CustomerID": "dictionary",
+    "Region": "dictionary",
+    "API_Category": "dictionary",
+    "API_Brand": "dictionary",
+    "API_Match": "bool"
+}
+
+# type -> array typecode of its values, dictionary codes are int32
+TYPECODES = {"int64": "q", "float64": "d", "bool": "B", "codes": "i", "offsets": "Q"}
+
+
+def _new_column(kind):
+    if kind == "string":
+        return []
+    if kind == "dictionary":
+        return Categorical()
+    return array(TYPECODES[kind])
+
+
+class _StringBlocks:
+    """
+    Encodes strings as uint64 end offsets into concatenated UTF-8 data
+    """
+
+    def __init__(self, values):
+        encoded = [value.encode("utf-8") for value in values]
+        self.data = b"".join(encoded)
+        self.offsets = array("Q", [0])
+        end = 0
+        for value in encoded:
+            end += len(value)
+            self.offsets.append(end)
+
+
+def save_columnar(enriched_transactions, filename, append=False):
+    """
+    Writes enriched transactions as typed column blocks (see
+    ENRICHED_COLUMNS) after a small JSON header giving the row count and
+    each block's position.
+
+    A new file is only put in place once it is complete. With
+    append=True the rows are written as a new segment at the end of an
+    existing file, so an append costs the new rows only and the old ones
+    are not read; if the write fails, the file is cut back to its old
+    length.
+
+    Raises TypeError if a Quantity, UnitPrice or API_Match value does
+    not fit its column, ValueError if the file to append to is not a
+    columnar file.
+    """
+
+    segment = _encode_segment(enriched_transactions)
+
+    if append and os.path.exists(filename) and os.path.getsize(filename):
+        with open(filename, "r+b") as f:
+            preamble = f.read(PREAMBLE.size)
+            if len(preamble) < PREAMBLE.size or PREAMBLE.unpack(preamble)[0] != COLUMNAR_MAGIC:
+                raise ValueError(f"'{filename}' is not a columnar file")
+
+            size = f.seek(0, 2)
+            if size % ALIGNMENT:
+                raise ValueError(f"'{filename}' ends in an incomplete segment")
+            try:
+                for block in segment:
+                    f.write(block)
+                f.flush()
+            except BaseException:
+                f.truncate(size)
+                raise
+        return
+
+    temp_file = filename + ".tmp"
+    with open(temp_file, "wb") as f:
+        for block in segment:
+            f.write(block)
+    os.replace(temp_file, filename)
+
+
+def _encode_segment(enriched_transactions):
+    """
+    Returns: the byte strings of one segment (preamble, header, padded
+    column blocks) holding enriched_transactions
+    """
+
+    columns = {name: _new_column(kind) for name, kind in ENRICHED_COLUMNS.items()}
+
+    # A lazy enriched view hands out whole columns without building rows
+    if isinstance(enriched_transactions, EnrichedTransactions):
+        column_values = enriched_transactions.column
+    else:
+        rows = list(enriched_transactions)
+
+        def column_values(name):
+            return [tx.get(name) for tx in rows]
+
+    for name, kind in ENRICHED_COLUMNS.items():
+        column = columns[name]
+        values = column_values(name)
+        if isinstance(values, Categorical):
+            column.extend(values)
+        elif kind == "dictionary":
+            # Only distinct values are looked up one at a time
+            for value in dict.fromkeys(values):
+                column.encode(value)
+            column.codes.extend(map(column.lookup.__getitem__, values))
+        else:
+            column.extend(values)
+
+    count = len(columns["TransactionID"])
+    blocks = []
+    described = []
+    position = 0
+
+    for name, kind in ENRICHED_COLUMNS.items():
+        column = columns[name]
+        entry = {"name": name, "type": kind, "blocks": {}}
+
+        if kind == "string":
+            strings = _StringBlocks(column)
+            parts = {"offsets": strings.offsets, "data": strings.data}
+        elif kind == "dictionary":
+            entry["null"] = column.lookup.get(None)
+            strings = _StringBlocks("" if value is None else value for value in column.categories)
+            parts = {
+                "codes": array(TYPECODES["codes"], column.codes),
+                "offsets": strings.offsets,
+                "data": strings.data
+            }
+        else:
+            parts = {"values": column}
+
+        for part, values in parts.items():
+            if isinstance(values, array):
+                if sys.byteorder != "little":
+                    values = array(values.typecode, values)
+                    values.byteswap()
+                values = values.tobytes()
+            entry["blocks"][part] = [position, len(values)]
+            blocks.append(values)
+            blocks.append(b"\0" * (-len(values) % ALIGNMENT))
+            position += len(values) + -len(values) % ALIGNMENT
+
+        described.append(entry)
+
+    # Block positions count from the end of the header, which is padded
+    # so the first block is aligned
+    header = json.dumps({"rows": count, "columns": described}).encode("utf-8")
+    header += b" " * (-(PREAMBLE.size + len(header)) % ALIGNMENT)
+
+    return [PREAMBLE.pack(COLUMNAR_MAGIC, COLUMNAR_VERSION, len(header)), header] + blocks
+
+
+class StringColumn:
+    """
+    Read-only sequence over a string block, decoding values as they are
+    accessed
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string column index out of range")
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class ChainedColumn:
+    """
+    Read-only sequence over the same column in consecutive segments
+    """
+
+    def __init__(self, parts):
+        self.parts = parts
+        self.ends = []
+        end = 0
+        for part in parts:
+            end += len(part)
+            self.ends.append(end)
+
+    def __len__(self):
+        return self.ends[-1] if self.ends else 0
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("column index out of range")
+        k = bisect_right(self.ends, i)
+        return self.parts[k][i - self.ends[k] + len(self.parts[k])]
+
+    def __iter__(self):
+        return chain.from_iterable(self.parts)
+
+
+def _merge_categoricals(parts):
+    """
+    Returns: one Categorical holding the values of parts in turn, the
+    codes of each remapped onto the union of their categories
+    """
+
+    merged = Categorical()
+    for part in parts:
+        remap = array("l", (merged.encode(value) for value in part.categories))
+        merged.codes.extend(remap[code] for code in part.codes)
+    return merged
+
+
+class ColumnarFile:
+    """
+    Memory-mapped file written by save_columnar.
+
+    columns maps each column name to its values without parsing the rows:
+    int64, float64 and bool (0/1) columns are typed memoryviews over the
+    file, string columns are StringColumns, and dictionary columns are
+    Categoricals whose codes are a view over the file (only the distinct
+    values are decoded). row(i) and iteration give the enriched
+    transaction dictionaries back.
+
+    A file that was appended to has one segment per save. The plain
+    columns are then ChainedColumns over the segments' views, and each
+    dictionary column is one Categorical over the values of all of them,
+    with its codes copied into memory.
+
+    Use as a context manager, or call close(); the columns are invalid
+    afterwards.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+
+        with open(filename, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < PREAMBLE.size:
+                raise ValueError(f"'{filename}' is not a columnar file")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._views = []
+        self.rows = 0
+        self.types = {}
+        self.columns = {}
+
+        try:
+            segments = []
+            offset = 0
+            while offset < size:
+                header, offset = self._read_segment(offset, size)
+                segments.append(header)
+                self.rows += header["rows"]
+
+            for entry in segments[0]["columns"]:
+                self.types[entry["name"]] = entry["type"]
+            for header in segments[1:]:
+                if {entry["name"]: entry["type"] for entry in header["columns"]} != self.types:
+                    raise ValueError(f"'{filename}' has segments with different columns")
+
+            parts = {name: [] for name in self.types}
+            for header in segments:
+                for entry in header["columns"]:
+                    parts[entry["name"]].append(self._column(entry, header["_data_start"]))
+
+            for name, kind in self.types.items():
+                if len(segments) == 1:
+                    self.columns[name] = parts[name][0]
+                elif kind == "dictionary":
+                    self.columns[name] = _merge_categoricals(parts[name])
+                else:
+                    self.columns[name] = ChainedColumn(parts[name])
+        except BaseException:
+            self.close()
+            raise
+
+    def _read_segment(self, offset, size):
+        """
+        Returns: (header of the segment at offset, offset of the next one)
+        """
+
+        if offset + PREAMBLE.size > size:
+            raise ValueError(f"'{self.filename}' ends in an incomplete segment")
+        magic, version, header_size = PREAMBLE.unpack_from(self._map, offset)
+        if magic != COLUMNAR_MAGIC:
+            raise ValueError(f"'{self.filename}' is not a columnar file")
+        if version != COLUMNAR_VERSION:
+            raise ValueError(f"'{self.filename}' has unsupported columnar version {version}")
+
+        data_start = offset + PREAMBLE.size + header_size
+        header = json.loads(self._map[offset + PREAMBLE.size:data_start])
+        header["_data_start"] = data_start
+
+        end = data_start
+        for entry in header["columns"]:
+            for start, length in entry["blocks"].values():
+                end = max(end, data_start + start + length + -length % ALIGNMENT)
+        if end > size:
+            raise ValueError(f"'{self.filename}' ends in an incomplete segment")
+        return header, end
+
+    def _column(self, entry, data_start):
+        kind = entry["type"]
+        blocks = entry["blocks"]
+
+        if kind == "string":
+            return StringColumn(
+                self._block(blocks["offsets"], data_start, "offsets"),
+                self._block(blocks["data"], data_start)
+            )
+        if kind == "dictionary":
+            values = StringColumn(
+                self._block(blocks["offsets"], data_start, "offsets"),
+                self._block(blocks["data"], data_start)
+            )
+            categories = list(values)
+            if entry["null"] is not None:
+                categories[entry["null"]] = None
+            column = Categorical(categories, {value: code for code, value in enumerate(categories)})
+            column.codes = self._block(blocks["codes"], data_start, "codes")
+            return column
+        return self._block(blocks["values"], data_start, kind)
+
+    def _block(self, position, data_start, kind=None):
+        start, size = position
+        start += data_start
+        view = memoryview(self._map)[start:start + size]
+        if kind is not None:
+            if sys.byteorder != "little":
+                # Copied and swapped, no longer a view over the file
+                values = array(TYPECODES[kind], bytes(view))
+                values.byteswap()
+                return values
+            view = view.cast(TYPECODES[kind])
+        self._views.append(view)
+        return view
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        # The views have to go before the map under them
+        self.columns = {}
+        for view in self._views:
+            view.release()
+        self._views = []
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __len__(self):
+        return self.rows
+
+    def row(self, i):
+        """
+        Returns row i as an enriched transaction dictionary
+        """
+
+        tx = {name: column[i] for name, column in self.columns.items()}
+        if "API_Match" in tx:
+            tx["API_Match"] = bool(tx["API_Match"])
+        return tx
+
+    def __getitem__(self, i):
+        return self.row(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def to_builders(self):
+        """
+        Copies the columns out of the file into appendable lists, arrays
+        and Categoricals, as save_columnar builds them
+        """
+
+        builders = {}
+        for name, column in self.columns.items():
+            kind = self.types[name]
+            if kind == "string":
+                builders[name] = list(column)
+            elif kind == "dictionary":
+                builder = Categorical(list(column.categories), dict(column.lookup))
+                builder.codes = array("l", column.codes)
+                builders[name] = builder
+            else:
+                builders[name] = array(TYPECODES[kind], column)
+        return builders
@@ -1,9 +1,34 @@
-def parse_transactions(raw_lines):
+import heapq
+from datetime import date, datetime
+
+from utils import vectorized
+from utils.enriched_view import EnrichedTransactions
+from utils.metrics import instrument
+from utils.sales_summary import SalesSummary
+from utils.sketches import HyperLogLog
+from utils.transaction_index import TransactionIndex
+from utils.transaction_table import TransactionTable
+
+
+@instrument
+def parse_transactions(raw_lines, columnar=False, strings=None):
     """
     Parses raw lines into clean list of dictionaries
+
+    raw_lines can be any iterable of lines, including the generator
+    returned by iter_sales_data or one of its batches. With columnar=True
+    a TransactionTable is returned instead, with Region, ProductID,
+    ProductName and CustomerID as integer codes; rows whose date is not in
+    YYYY-MM-DD form, or whose quantity or price the table cannot store,
+    are then left out and counted in the table's rejected.
+
+    In the dictionaries those fields and Date are interned, equal values share
+    one string object, so group-bys hash each distinct value once. Pass
+    the same strings dict to every batch to share them across batches.
     """
 
-    transactions = []
+    transactions = TransactionTable() if columnar else []
+    intern = (strings if strings is not None else {}).setdefault
 
     for line in raw_lines:
         parts = line.split("|")
@@ -29,15 +54,25 @@ def parse_transactions(raw_lines):
             quantity = int(quantity.replace(",", ""))
             unit_price = float(unit_price.replace(",", ""))
 
+            if columnar:
+                try:
+                    transactions.append(
+                        transaction_id, date, product_id, product_name,
+                        quantity, unit_price, customer_id, region
+                    )
+                except (ValueError, OverflowError):
+                    transactions.rejected += 1
+                continue
+
             transaction = {
                 "TransactionID": transaction_id,
-                "Date": date,
-                "ProductID": product_id,
-                "ProductName": product_name,
+                "Date": intern(date, date),
+                "ProductID": intern(product_id, product_id),
+                "ProductName": intern(product_name, product_name),
                 "Quantity": quantity,
                 "UnitPrice": unit_price,
-                "CustomerID": customer_id,
-                "Region": region
+                "CustomerID": intern(customer_id, customer_id),
+                "Region": intern(region, region)
             }
 
             transactions.append(transaction)
@@ -49,7 +84,13 @@ def parse_transactions(raw_lines):
     return transactions
 
 
+@instrument
 def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
+    if isinstance(transactions, TransactionIndex):
+        return transactions.filter(region, min_amount, max_amount)
+    if isinstance(transactions, TransactionTable):
+        return _validate_and_filter_table(transactions, region, min_amount, max_amount)
+
     valid_transactions = []
     invalid_count = 0
 
@@ -114,6 +155,79 @@ def validate_and_filter(transactions, region=None, min_amount=None, max_amount=N
     }
 
     return filtered, invalid_count, filter_summary
+
+
+def _validate_and_filter_table(table, region=None, min_amount=None, max_amount=None):
+    """
+    validate_and_filter for a TransactionTable.
+
+    ID and region rules are checked once per distinct category, then every
+    row is a couple of list lookups. Rows parse_transactions could not
+    store (see TransactionTable) count as invalid input. Returns a
+    filtered TransactionTable.
+    """
+
+    total_input = len(table) + table.rejected
+
+    valid_product = [p.startswith("P") for p in table.product_id.categories]
+    valid_customer = [c.startswith("C") for c in table.customer_id.categories]
+    valid_region = [bool(r) for r in table.region.categories]
+
+    indices = [
+        i
+        for i, (tid, pc, cc, rc, q, p) in enumerate(zip(
+            table.transaction_id,
+            table.product_id.codes,
+            table.customer_id.codes,
+            table.region.codes,
+            table.quantity,
+            table.unit_price
+        ))
+        if q > 0 and p > 0 and tid.startswith("T")
+        and valid_product[pc] and valid_customer[cc] and valid_region[rc]
+    ]
+
+    invalid_count = total_input - len(indices)
+
+    filtered_by_region = 0
+    filtered_by_amount = 0
+
+    if region:
+        before = len(indices)
+        region_code = table.region.lookup.get(region)
+        codes = table.region.codes
+        indices = [i for i in indices if codes[i] == region_code]
+        filtered_by_region = before - len(indices)
+
+    if min_amount is not None or max_amount is not None:
+        before = len(indices)
+        quantity = table.quantity
+        unit_price = table.unit_price
+        result = []
+
+        for i in indices:
+            amount = quantity[i] * unit_price[i]
+
+            if min_amount is not None and amount < min_amount:
+                continue
+            if max_amount is not None and amount > max_amount:
+                continue
+
+            result.append(i)
+
+        filtered_by_amount = before - len(result)
+        indices = result
+
+    filter_summary = {
+        "total_input": total_input,
+        "invalid": invalid_count,
+        "filtered_by_region": filtered_by_region,
+        "filtered_by_amount": filtered_by_amount,
+        "final_count": len(indices)
+    }
+
+    return table.take(indices), invalid_count, filter_summary
+@instrument
 def calculate_total_revenue(transactions):
     """
     Calculates total revenue from all transactions
@@ -121,18 +235,56 @@ def calculate_total_revenue(transactions):
     Returns: float (total revenue)
     """
 
+    if isinstance(transactions, SalesSummary):
+        return round(transactions.total_revenue, 2)
+
     total_revenue = 0.0
 
+    if isinstance(transactions, TransactionTable):
+        if vectorized.ENABLED:
+            return round(vectorized.total_revenue(transactions), 2)
+        for quantity, unit_price in zip(transactions.quantity, transactions.unit_price):
+            total_revenue += quantity * unit_price
+        return round(total_revenue, 2)
+
     for tx in transactions:
         total_revenue += tx["Quantity"] * tx["UnitPrice"]
 
     return round(total_revenue, 2)
 
+@instrument
 def region_wise_sales(transactions):
     """
     Analyzes sales by region
     """
 
+    if isinstance(transactions, SalesSummary):
+        region_stats = transactions.region_totals()
+        total_revenue = transactions.total_revenue
+    elif isinstance(transactions, TransactionTable):
+        region_stats, total_revenue = _region_totals_table(transactions)
+    else:
+        region_stats, total_revenue = _region_totals(transactions)
+
+    # Second pass: calculate percentages
+    for region in region_stats:
+        percentage = (region_stats[region]["total_sales"] / total_revenue) * 100
+        region_stats[region]["percentage"] = round(percentage, 2)
+        region_stats[region]["total_sales"] = round(region_stats[region]["total_sales"], 2)
+
+    # Sort by total_sales descending
+    sorted_regions = dict(
+        sorted(
+            region_stats.items(),
+            key=lambda item: item[1]["total_sales"],
+            reverse=True
+        )
+    )
+
+    return sorted_regions
+
+
+def _region_totals(transactions):
     region_stats = {}
     total_revenue = 0.0
 
@@ -151,27 +303,83 @@ def region_wise_sales(transactions):
         region_stats[region]["total_sales"] += amount
         region_stats[region]["transaction_count"] += 1
 
-    # Second pass: calculate percentages
-    for region in region_stats:
-        percentage = (region_stats[region]["total_sales"] / total_revenue) * 100
-        region_stats[region]["percentage"] = round(percentage, 2)
-        region_stats[region]["total_sales"] = round(region_stats[region]["total_sales"], 2)
+    return region_stats, total_revenue
 
-    # Sort by total_sales descending
-    sorted_regions = dict(
-        sorted(
-            region_stats.items(),
-            key=lambda item: item[1]["total_sales"],
-            reverse=True
-        )
-    )
 
-    return sorted_regions
+def _region_totals_table(table):
+    if vectorized.ENABLED:
+        return vectorized.region_totals(table)
+
+    categories = table.region.categories
+    sales = [0.0] * len(categories)
+    counts = [0] * len(categories)
+    seen = []
+    total_revenue = 0.0
+
+    for code, quantity, unit_price in zip(table.region.codes, table.quantity, table.unit_price):
+        amount = quantity * unit_price
+        total_revenue += amount
+
+        # Keep first-seen order so ties sort exactly like the dict path
+        if not counts[code]:
+            seen.append(code)
+
+        sales[code] += amount
+        counts[code] += 1
+
+    region_stats = {
+        categories[code]: {
+            "total_sales": sales[code],
+            "transaction_count": counts[code]
+        }
+        for code in seen
+    }
+
+    return region_stats, total_revenue
+@instrument
 def top_selling_products(transactions, n=5):
     """
-    Finds top n products by total quantity sold
+    Finds top n products by total quantity sold, n=None returns all of
+    them
     """
 
+    product_stats = _product_totals(transactions)
+
+    # Rank by total quantity descending
+    top = _top(product_stats.items(), n, key=lambda item: item[1]["total_quantity"])
+
+    return [
+        (
+            product,
+            stats["total_quantity"],
+            round(stats["total_revenue"], 2)
+        )
+        for product, stats in top
+    ]
+
+
+def _top(items, n, key):
+    """
+    Returns the n items with the largest key in descending order, ties in
+    their original order; all of them if n is None. A bounded heap keeps
+    this O(len(items) log n).
+    """
+
+    if n is None:
+        return sorted(items, key=key, reverse=True)
+    return heapq.nlargest(n, items, key=key)
+
+
+def _product_totals(transactions):
+    """
+    Aggregates total quantity and revenue by product name
+    """
+
+    if isinstance(transactions, SalesSummary):
+        return transactions.product_totals()
+    if isinstance(transactions, TransactionTable):
+        return _product_totals_table(transactions)
+
     product_stats = {}
 
     # Aggregate by product
@@ -189,21 +397,76 @@ def top_selling_products(transactions, n=5):
         product_stats[product]["total_quantity"] += quantity
         product_stats[product]["total_revenue"] += revenue
 
-    # Convert to list of tuples
-    result = [
-        (
-            product,
-            stats["total_quantity"],
-            round(stats["total_revenue"], 2)
-        )
-        for product, stats in product_stats.items()
-    ]
+    return product_stats
+
+
+def _product_totals_table(table):
+    if vectorized.ENABLED:
+        return vectorized.product_totals(table)
+
+    categories = table.product_name.categories
+    quantities = [0] * len(categories)
+    revenues = [0.0] * len(categories)
+    seen = [False] * len(categories)
+    order = []
 
-    # Sort by total quantity descending
-    result.sort(key=lambda x: x[1], reverse=True)
+    for code, quantity, unit_price in zip(table.product_name.codes, table.quantity, table.unit_price):
+        if not seen[code]:
+            seen[code] = True
+            order.append(code)
 
-    return result[:n]
-def customer_analysis(transactions):
+        quantities[code] += quantity
+        revenues[code] += quantity * unit_price
+
+    return {
+        categories[code]: {
+            "total_quantity": quantities[code],
+            "total_revenue": revenues[code]
+        }
+        for code in order
+    }
+@instrument
+def customer_analysis(transactions, n=None):
+    """
+    Ranks customers by total spent, only the top n if n is given
+
+    Returns: {customer_id: stats} in descending order of spend
+    """
+
+    if isinstance(transactions, SalesSummary):
+        customers = transactions.customer_totals()
+    elif isinstance(transactions, TransactionTable):
+        customers = _customer_totals_table(transactions)
+    else:
+        customers = _customer_totals(transactions)
+
+    # The per-customer detail, such as the sorted product list, is only
+    # built for the customers returned
+    top = _top(customers.items(), n, key=lambda item: round(item[1]["total_spent"], 2))
+
+    result = {}
+    for cid, data in top:
+        result[cid] = {
+            "total_spent": round(data["total_spent"], 2),
+            "purchase_count": data["purchase_count"],
+            "avg_order_value": round(
+                data["total_spent"] / data["purchase_count"], 2
+            )
+        }
+
+        # An approximate SalesSummary only tracks the top customers, with
+        # estimated figures and a product count instead of the names
+        if isinstance(data["products"], HyperLogLog):
+            result[cid]["unique_products"] = len(data["products"])
+            result[cid]["spent_error"] = round(data["spent_error"], 2)
+            result[cid]["estimated"] = True
+        else:
+            result[cid]["products_bought"] = sorted(list(data["products"]))
+
+    return result
+
+
+def _customer_totals(transactions):
     customers = {}
 
     for tx in transactions:
@@ -225,46 +488,79 @@ def customer_analysis(transactions):
         customers[customer_id]["purchase_count"] += 1
         customers[customer_id]["products"].add(product)
 
-    result = {}
-    for cid, data in customers.items():
-        result[cid] = {
-            "total_spent": round(data["total_spent"], 2),
-            "purchase_count": data["purchase_count"],
-            "avg_order_value": round(
-                data["total_spent"] / data["purchase_count"], 2
-            ),
-            "products_bought": sorted(list(data["products"]))
-        }
+    return customers
 
-    return dict(
-        sorted(result.items(), key=lambda x: x[1]["total_spent"], reverse=True)
-    )
+
+def _customer_totals_table(table):
+    # Customer IDs are grouped after stripping, so codes whose stripped
+    # values collide are folded onto one canonical code first
+    canonical = {}
+    canonical_code = []
+    for code, value in enumerate(table.customer_id.categories):
+        canonical_code.append(canonical.setdefault(value.strip(), code))
+
+    names = table.customer_id.categories
+    product_names = table.product_name.categories
+    customers = {}
+
+    for code, product, quantity, unit_price in zip(
+        table.customer_id.codes,
+        table.product_name.codes,
+        table.quantity,
+        table.unit_price
+    ):
+        code = canonical_code[code]
+        stats = customers.get(code)
+        if stats is None:
+            if not names[code].strip():
+                continue
+            stats = customers[code] = {
+                "total_spent": 0.0,
+                "purchase_count": 0,
+                "products": set()
+            }
+
+        stats["total_spent"] += quantity * unit_price
+        stats["purchase_count"] += 1
+        stats["products"].add(product)
+
+    for stats in customers.values():
+        stats["products"] = {product_names[p] for p in stats["products"]}
+
+    return {names[code].strip(): stats for code, stats in customers.items()}
+@instrument
 def daily_sales_trend(transactions):
     """
     Analyzes sales trends by date
     """
 
-    daily_stats = {}
+    if isinstance(transactions, TransactionTable):
+        return _daily_sales_trend_table(transactions)
 
-    # Aggregate by date
-    for tx in transactions:
-        date = tx["Date"]
-        customer = tx["CustomerID"]
-        amount = tx["Quantity"] * tx["UnitPrice"]
+    if isinstance(transactions, SalesSummary):
+        daily_stats = transactions.daily_stats()
+    else:
+        daily_stats = {}
 
-        if date not in daily_stats:
-            daily_stats[date] = {
-                "revenue": 0.0,
-                "transaction_count": 0,
-                "unique_customers": set()
-            }
+        # Aggregate by date
+        for tx in transactions:
+            date_str = tx["Date"]
+            customer = tx["CustomerID"]
+            amount = tx["Quantity"] * tx["UnitPrice"]
+
+            if date_str not in daily_stats:
+                daily_stats[date_str] = {
+                    "revenue": 0.0,
+                    "transaction_count": 0,
+                    "unique_customers": set()
+                }
 
-        daily_stats[date]["revenue"] += amount
-        daily_stats[date]["transaction_count"] += 1
-        daily_stats[date]["unique_customers"].add(customer)
+            daily_stats[date_str]["revenue"] += amount
+            daily_stats[date_str]["transaction_count"] += 1
+            daily_stats[date_str]["unique_customers"].add(customer)
 
     # Finalize counts
-    for date, stats in daily_stats.items():
+    for date_str, stats in daily_stats.items():
         stats["revenue"] = round(stats["revenue"], 2)
         stats["unique_customers"] = len(stats["unique_customers"])
 
@@ -272,6 +568,43 @@ def daily_sales_trend(transactions):
     sorted_daily_stats = dict(sorted(daily_stats.items()))
 
     return sorted_daily_stats
+
+
+def _daily_sales_trend_table(table):
+    if vectorized.ENABLED:
+        return vectorized.daily_sales_trend(table)
+
+    daily_stats = {}
+
+    # Aggregate by integer day
+    for day, customer, quantity, unit_price in zip(
+        table.date,
+        table.customer_id.codes,
+        table.quantity,
+        table.unit_price
+    ):
+        stats = daily_stats.get(day)
+        if stats is None:
+            stats = daily_stats[day] = {
+                "revenue": 0.0,
+                "transaction_count": 0,
+                "unique_customers": set()
+            }
+
+        stats["revenue"] += quantity * unit_price
+        stats["transaction_count"] += 1
+        stats["unique_customers"].add(customer)
+
+    # Integer days sort chronologically, keys go back to ISO strings
+    return {
+        date.fromordinal(day).isoformat(): {
+            "revenue": round(stats["revenue"], 2),
+            "transaction_count": stats["transaction_count"],
+            "unique_customers": len(stats["unique_customers"])
+        }
+        for day, stats in sorted(daily_stats.items())
+    }
+@instrument
 def find_peak_sales_day(transactions):
     """
     Identifies the date with highest revenue
@@ -280,52 +613,113 @@ def find_peak_sales_day(transactions):
     daily_totals = {}
 
     # Aggregate revenue and transaction count per date
-    for tx in transactions:
-        date = tx["Date"]
-        amount = tx["Quantity"] * tx["UnitPrice"]
+    if isinstance(transactions, SalesSummary):
+        daily_totals = transactions.daily_totals()
+    elif isinstance(transactions, TransactionTable) and vectorized.ENABLED:
+        daily_totals = vectorized.daily_totals(transactions)
+    elif isinstance(transactions, TransactionTable):
+        for day, quantity, unit_price in zip(
+            transactions.date, transactions.quantity, transactions.unit_price
+        ):
+            if day not in daily_totals:
+                daily_totals[day] = {
+                    "revenue": 0.0,
+                    "count": 0
+                }
+
+            daily_totals[day]["revenue"] += quantity * unit_price
+            daily_totals[day]["count"] += 1
+
+        daily_totals = {
+            date.fromordinal(day).isoformat(): stats
+            for day, stats in daily_totals.items()
+        }
+    else:
+        for tx in transactions:
+            date_str = tx["Date"]
+            amount = tx["Quantity"] * tx["UnitPrice"]
 
-        if date not in daily_totals:
-            daily_totals[date] = {
-                "revenue": 0.0,
-                "count": 0
-            }
+            if date_str not in daily_totals:
+                daily_totals[date_str] = {
+                    "revenue": 0.0,
+                    "count": 0
+                }
 
-        daily_totals[date]["revenue"] += amount
-        daily_totals[date]["count"] += 1
+            daily_totals[date_str]["revenue"] += amount
+            daily_totals[date_str]["count"] += 1
 
     # Find peak day
     peak_date = None
     peak_revenue = 0.0
     peak_count = 0
 
-    for date, stats in daily_totals.items():
+    for date_str, stats in daily_totals.items():
         if stats["revenue"] > peak_revenue:
             peak_revenue = stats["revenue"]
             peak_count = stats["count"]
-            peak_date = date
+            peak_date = date_str
 
     return (peak_date, round(peak_revenue, 2), peak_count)
-def low_performing_products(transactions, threshold=10):
+@instrument
+def sales_between(transactions, start=None, end=None):
     """
-    Identifies products with low sales
+    Totals the sales from start to end, inclusive YYYY-MM-DD dates
+    (either may be None for an open end)
+
+    Returns: dict with revenue, transaction_count and total_quantity
     """
 
-    product_stats = {}
+    revenue, count, quantity = _rollup(transactions).totals(start, end)
+    return {
+        "revenue": round(revenue, 2),
+        "transaction_count": count,
+        "total_quantity": quantity
+    }
+@instrument
+def sales_by_period(transactions, period="day"):
+    """
+    Totals the sales per day, ISO week (YYYY-Www) or month (YYYY-MM),
+    leaving out periods without sales
 
-    # Aggregate by product
-    for tx in transactions:
-        product = tx["ProductName"]
-        quantity = tx["Quantity"]
-        revenue = quantity * tx["UnitPrice"]
+    Returns: {period: {"revenue", "transaction_count", "total_quantity"}}
+    in date order
+    """
 
-        if product not in product_stats:
-            product_stats[product] = {
-                "total_quantity": 0,
-                "total_revenue": 0.0
-            }
+    return {
+        label: {
+            "revenue": round(revenue, 2),
+            "transaction_count": count,
+            "total_quantity": quantity
+        }
+        for label, (revenue, count, quantity) in _rollup(transactions).buckets(period).items()
+    }
+@instrument
+def moving_average_revenue(transactions, window=7, start=None, end=None):
+    """
+    Averages the daily revenue over the window days ending on each date,
+    counting days without sales as zero
 
-        product_stats[product]["total_quantity"] += quantity
-        product_stats[product]["total_revenue"] += revenue
+    Returns: {date: average} for every date from the first to the last
+    with sales (or start to end)
+    """
+
+    return {
+        date.fromordinal(day).isoformat(): round(average, 2)
+        for day, average in _rollup(transactions).moving_average(window, start, end)
+    }
+
+
+def _rollup(transactions):
+    if isinstance(transactions, SalesSummary):
+        return transactions.rollup()
+    return SalesSummary.from_transactions(transactions).rollup()
+@instrument
+def low_performing_products(transactions, threshold=10):
+    """
+    Identifies products with low sales
+    """
+
+    product_stats = _product_totals(transactions)
 
     # Filter low-performing products
     low_products = [
@@ -342,39 +736,98 @@ def low_performing_products(transactions, threshold=10):
     low_products.sort(key=lambda x: x[1])
 
     return low_products
-from datetime import datetime
+@instrument
+def enrichment_stats(enriched_transactions, previous=None):
+    """
+    Counts API matches in enriched transactions, optionally adding onto
+    the stats of an earlier batch
+
+    Returns: dict with enriched_count, total and the unmatched product names
+    """
+
+    stats = {
+        "enriched_count": 0,
+        "total": 0,
+        "unmatched": set()
+    }
+    if previous:
+        stats["enriched_count"] = previous["enriched_count"]
+        stats["total"] = previous["total"]
+        stats["unmatched"] = set(previous["unmatched"])
+
+    # A lazy enriched view is counted per distinct product
+    if isinstance(enriched_transactions, EnrichedTransactions):
+        dimension = enriched_transactions.dimension
+        for key, count in enriched_transactions.product_counts().items():
+            stats["total"] += count
+            if dimension.fields[key][2]:
+                stats["enriched_count"] += count
+            else:
+                stats["unmatched"].add(dimension.products[key][1])
+        return stats
+
+    for tx in enriched_transactions:
+        stats["total"] += 1
+        if tx.get("API_Match"):
+            stats["enriched_count"] += 1
+        else:
+            stats["unmatched"].add(tx["ProductName"])
 
-def generate_sales_report(transactions, enriched_transactions, output_file="output/sales_report.txt"):
+    return stats
+
+
+@instrument
+def generate_sales_report(transactions, enriched_transactions, output_file="output/sales_report.txt", summary=None, enrichment=None):
     """
     Generates a comprehensive formatted text report
+
+    All figures come from one SalesSummary, pass summary to reuse one that
+    was already built, otherwise it is built here in a single pass. Pass
+    enrichment (see enrichment_stats) when enriched_transactions only
+    holds part of the rows.
     """
 
+    if summary is None:
+        summary = SalesSummary.from_transactions(transactions)
+
     # ---------- BASIC METRICS ----------
-    total_transactions = len(transactions)
-    total_revenue = calculate_total_revenue(transactions)
+    total_transactions = len(summary)
+    total_revenue = calculate_total_revenue(summary)
     avg_order_value = round(total_revenue / total_transactions, 2) if total_transactions else 0
 
-    dates = sorted(tx["Date"] for tx in transactions)
+    dates = summary.date_range()
     date_range = f"{dates[0]} to {dates[-1]}" if dates else "N/A"
 
     # ---------- ANALYTICS ----------
-    region_stats = region_wise_sales(transactions)
-    top_products = top_selling_products(transactions, n=5)
-    customer_stats = customer_analysis(transactions)
-    daily_stats = daily_sales_trend(transactions)
-    peak_day = find_peak_sales_day(transactions)
-    low_products = low_performing_products(transactions)
+    region_stats = region_wise_sales(summary)
+    top_products = top_selling_products(summary, n=5)
+    customer_stats = customer_analysis(summary, n=5)
+    ranking_supported = True
+    if summary.approximate is not None:
+        # Estimated spend backs the ranking only if each listed customer's
+        # spend less its error still beats the next customer's estimate
+        ranked = list(customer_analysis(summary, n=6).values())
+        following = [stats["total_spent"] for stats in ranked[1:]] + [0.0]
+        ranking_supported = all(
+            stats["total_spent"] - stats["spent_error"] >= next_spent
+            for stats, next_spent in zip(ranked[:5], following)
+        )
+    daily_stats = daily_sales_trend(summary)
+    peak_day = find_peak_sales_day(summary)
+    low_products = low_performing_products(summary)
 
     # ---------- API ENRICHMENT ----------
-    enriched_count = sum(1 for tx in enriched_transactions if tx.get("API_Match"))
-    total_enriched = len(enriched_transactions)
+    if enrichment is None:
+        enrichment = enrichment_stats(enriched_transactions)
+    enriched_count = enrichment["enriched_count"]
+    total_enriched = enrichment["total"]
     enrichment_rate = round((enriched_count / total_enriched) * 100, 2) if total_enriched else 0
 
-    unenriched_products = sorted({
-        tx["ProductName"]
-        for tx in enriched_transactions
-        if not tx.get("API_Match")
-    })
+    unenriched_products = sorted(enrichment["unmatched"])
+
+    # Estimated figures are marked with ~ in approximate mode
+    approximate = summary.approximate
+    mark = "~" if approximate is not None else ""
 
     # ---------- WRITE REPORT ----------
     with open(output_file, "w", encoding="utf-8") as f:
@@ -383,6 +836,8 @@ def generate_sales_report(transactions, enriched_transactions, output_file="outp
         f.write("           SALES ANALYTICS REPORT\n")
         f.write(f"     Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
         f.write(f"     Records Processed: {total_transactions}\n")
+        if approximate is not None:
+            f.write("     Figures marked ~ are estimates\n")
         f.write("=" * 44 + "\n\n")
 
         # OVERALL SUMMARY
@@ -417,22 +872,40 @@ def generate_sales_report(transactions, enriched_transactions, output_file="outp
         f.write("TOP 5 CUSTOMERS\n")
         f.write("-" * 44 + "\n")
         f.write("Rank  CustomerID   Total Spent   Orders\n")
-        for i, (cust, stats) in enumerate(list(customer_stats.items())[:5], 1):
+        top_customers = list(customer_stats.items())
+        if approximate is not None and top_customers:
+            spent_error = max(stats["spent_error"] for _, stats in top_customers)
+        if not ranking_supported:
             f.write(
-                f"{i:<5} {cust:<12} ₹{stats['total_spent']:,.2f}   "
-                f"{stats['purchase_count']}\n"
+                f"~ Not ranked: spend may be overstated by up to ₹{spent_error:,.2f}, "
+                f"more than separates the top customers. Track more customers "
+                f"(Approximation spend_error below {approximate.spend_error:g}).\n"
             )
+        else:
+            for i, (cust, stats) in enumerate(top_customers, 1):
+                f.write(
+                    f"{i:<5} {cust:<12} {mark}₹{stats['total_spent']:,.2f}   "
+                    f"{mark}{stats['purchase_count']}\n"
+                )
+            if approximate is not None and top_customers:
+                count_error = approximate.count_error * total_transactions
+                f.write(
+                    f"~ Spend overstated by at most ₹{spent_error:,.2f}, orders by at most "
+                    f"{count_error:,.0f} ({approximate.count_confidence:.0%} confidence)\n"
+                )
         f.write("\n")
 
         # DAILY SALES TREND
         f.write("DAILY SALES TREND\n")
         f.write("-" * 44 + "\n")
         f.write("Date         Revenue        Transactions  Customers\n")
-        for date, stats in daily_stats.items():
+        for day, stats in daily_stats.items():
             f.write(
-                f"{date}   ₹{stats['revenue']:,.2f}      "
-                f"{stats['transaction_count']:<13} {stats['unique_customers']}\n"
+                f"{day}   ₹{stats['revenue']:,.2f}      "
+                f"{stats['transaction_count']:<13} {mark}{stats['unique_customers']}\n"
             )
+        if approximate is not None and daily_stats:
+            f.write(f"~ Unique customers within ±{approximate.cardinality_error:.1%} (standard error)\n")
         f.write("\n")
 
         # PRODUCT PERFORMANCE
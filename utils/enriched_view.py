@@ -0,0 +1,184 @@
+from array import array
+from collections import Counter
+from collections.abc import Sequence
+from datetime import date
+
+from utils.transaction_table import TransactionTable
+
+
+# Fields the product dimension adds to each transaction
+ENRICHED_FIELDS = ["API_Category", "API_Brand", "API_Match"]
+
+
+class ProductDimension:
+    """
+    The distinct products of a join, each resolved once.
+
+    resolve(product_id, product_name) returns a product's (API_Category,
+    API_Brand, API_Match). Products are numbered in first-seen order;
+    products[key] is its (ProductID, ProductName) and fields[key] its
+    resolved fields, so rows only need to keep the integer key.
+    """
+
+    def __init__(self, resolve):
+        self.resolve = resolve
+        self.products = []
+        self.fields = []
+        self.lookup = {}
+
+    def __len__(self):
+        return len(self.products)
+
+    def key(self, product_id, product_name):
+        """
+        Returns the key of a product, resolving it if it is new
+        """
+
+        product = (product_id, product_name)
+        key = self.lookup.get(product)
+        if key is None:
+            key = self.lookup[product] = len(self.products)
+            self.products.append(product)
+            self.fields.append(self.resolve(product_id, product_name))
+        return key
+
+
+class EnrichedTransactions:
+    """
+    Lazy join of transactions (a list of dicts or a TransactionTable) with
+    a ProductDimension.
+
+    Only an integer product key is kept per row. Indexing or iterating
+    builds the enriched transaction dictionaries on access, the same rows
+    enrich_sales_data used to return, and the transactions themselves are
+    never copied or modified. Like the list it replaces, the view takes
+    negative indices and a slice gives a list of rows; take() selects
+    rows as another view without building them.
+    """
+
+    def __init__(self, transactions, dimension, product_keys, rows=None):
+        self.transactions = transactions
+        self.dimension = dimension
+        self.product_keys = product_keys
+        # Indices into transactions when this is a selection of its rows
+        self.rows = rows
+
+    @classmethod
+    def join(cls, transactions, dimension):
+        """
+        Keys every transaction by its (ProductID, ProductName), adding the
+        distinct products to dimension. Input that is not a sequence, such
+        as a generator, is read into a list once, since rows are looked up
+        by index later.
+        """
+
+        if not isinstance(transactions, (TransactionTable, Sequence)):
+            transactions = list(transactions)
+
+        if isinstance(transactions, TransactionTable):
+            # Distinct code pairs are distinct products
+            product_ids = transactions.product_id.categories
+            product_names = transactions.product_name.categories
+
+            def pairs():
+                return zip(transactions.product_id.codes, transactions.product_name.codes)
+
+            keys = {
+                pair: dimension.key(product_ids[pair[0]], product_names[pair[1]])
+                for pair in dict.fromkeys(pairs())
+            }
+        else:
+            def pairs():
+                return ((tx.get("ProductID", ""), tx["ProductName"]) for tx in transactions)
+
+            keys = {pair: dimension.key(*pair) for pair in dict.fromkeys(pairs())}
+
+        return cls(transactions, dimension, array("l", map(keys.__getitem__, pairs())))
+
+    def __len__(self):
+        return len(self.product_keys)
+
+    def _transaction(self, i):
+        if self.rows is not None:
+            i = self.rows[i]
+        tx = self.transactions[i]
+        # Table rows are built fresh, dicts are copied
+        return tx if isinstance(self.transactions, TransactionTable) else dict(tx)
+
+    def row(self, i):
+        """
+        Returns row i as an enriched transaction dictionary
+        """
+
+        tx = self._transaction(i)
+        tx["API_Category"], tx["API_Brand"], tx["API_Match"] = self.dimension.fields[self.product_keys[i]]
+        return tx
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.row(j) for j in range(*i.indices(len(self)))]
+        if not -len(self) <= i < len(self):
+            raise IndexError("enriched transaction index out of range")
+        return self.row(i % len(self))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def take(self, indices):
+        """
+        Returns a view of the rows at the given indices
+        """
+
+        keys = self.product_keys
+        rows = list(indices) if self.rows is None else [self.rows[i] for i in indices]
+        return EnrichedTransactions(
+            self.transactions, self.dimension, array("l", [keys[i] for i in indices]), rows
+        )
+
+    def product_counts(self):
+        """
+        Returns: {product key: number of rows}
+        """
+
+        return Counter(self.product_keys)
+
+    def column(self, name):
+        """
+        Returns the values of one field for every row without building
+        the rows: a list, or for a whole table its own Quantity and
+        UnitPrice arrays and ProductID, ProductName, CustomerID and Region
+        Categoricals
+        """
+
+        if name in ENRICHED_FIELDS:
+            position = ENRICHED_FIELDS.index(name)
+            values = [fields[position] for fields in self.dimension.fields]
+            return list(map(values.__getitem__, self.product_keys))
+
+        transactions = self.transactions
+        if not isinstance(transactions, TransactionTable):
+            rows = transactions if self.rows is None else map(transactions.__getitem__, self.rows)
+            return [tx.get(name) for tx in rows]
+
+        if name == "TransactionID":
+            values = transactions.transaction_id
+        elif name == "Date":
+            days = {day: date.fromordinal(day).isoformat() for day in set(transactions.date)}
+            values = list(map(days.__getitem__, transactions.date))
+        elif name in ("Quantity", "UnitPrice"):
+            values = transactions.quantity if name == "Quantity" else transactions.unit_price
+        else:
+            column = {
+                "ProductID": transactions.product_id,
+                "ProductName": transactions.product_name,
+                "CustomerID": transactions.customer_id,
+                "Region": transactions.region
+            }[name]
+            if self.rows is None:
+                return column
+            values = list(map(column.categories.__getitem__, column.codes))
+
+        if self.rows is not None:
+            values = [values[i] for i in self.rows]
+        return values
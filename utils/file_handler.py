@@ -1,23 +1,297 @@
-def read_sales_data(filename):
+import bz2
+import codecs
+import gzip
+import lzma
+
+ENCODINGS = ["utf-8", "latin-1", "cp1252"]
+
+# compression -> (magic bytes, file suffix, opener)
+COMPRESSIONS = {
+    "gz": (b"\x1f\x8b", ".gz", gzip.open),
+    "bz2": (b"BZh", ".bz2", bz2.open),
+    "xz": (b"\xfd7zXZ\x00", ".xz", lzma.open)
+}
+
+
+def detect_compression(filename):
     """
-    Reads sales data from file handling encoding issues.
+    Detects gzip, bzip2 or xz compression from the file's magic bytes
 
-    Returns: list of raw lines (strings)
+    Returns: "gz", "bz2", "xz" or None for an uncompressed file
+    """
+
+    with open(filename, "rb") as file:
+        head = file.read(6)
+
+    for compression, (magic, _, _) in COMPRESSIONS.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def open_binary(filename):
+    """
+    Opens a file for reading bytes. Compressed files are decompressed in
+    chunks as they are read, tell() and seek() then count decompressed
+    bytes (a seek reads forward up to the position).
+    """
+
+    compression = detect_compression(filename)
+    if compression is None:
+        return open(filename, "rb")
+    return COMPRESSIONS[compression][2](filename, "rb")
+
+
+def open_text(filename, encoding):
+    """
+    Opens a file for reading text, decompressing it as it streams
     """
 
-    encodings = ["utf-8", "latin-1", "cp1252"]
+    compression = detect_compression(filename)
+    if compression is None:
+        return open(filename, "r", encoding=encoding)
+    return COMPRESSIONS[compression][2](filename, "rt", encoding=encoding)
+
+
+def open_output(filename, append=False, compression=None, encoding="utf-8"):
+    """
+    Opens a text file for writing, compressed with compression ("gz",
+    "bz2" or "xz"), by default the one named by the file suffix. Appending
+    to a compressed file adds a new stream, which readers join up.
+    """
+
+    if compression is None:
+        compression = next(
+            (name for name, (_, suffix, _) in COMPRESSIONS.items() if filename.endswith(suffix)),
+            None
+        )
+
+    mode = "a" if append else "w"
+    if compression is None:
+        return open(filename, mode, encoding=encoding)
+    return COMPRESSIONS[compression][2](filename, mode + "t", encoding=encoding)
+
+
+def detect_encoding(filename, sample_size=65536):
+    """
+    Detects the file encoding from a leading sample of the file.
 
-    for encoding in encodings:
+    Returns: encoding name (string)
+    """
+
+    with open_binary(filename) as file:
+        sample = file.read(sample_size)
+
+    for encoding in ENCODINGS:
         try:
-            with open(filename, "r", encoding=encoding) as file:
-                lines = file.readlines()
-                lines = lines[1:]
-                cleaned_lines = [line.strip() for line in lines if line.strip()]
-                return cleaned_lines
+            # Incremental decode so a multi-byte character cut at the
+            # end of the sample does not count as a decoding error
+            decoder = codecs.getincrementaldecoder(encoding)()
+            decoder.decode(sample, final=False)
+            return encoding
         except UnicodeDecodeError:
             continue
-        except FileNotFoundError:
-            print(f"Error: File '{filename}' not found.")
-            return []
-    print("Error: Unable to read file due to encoding issues.")
-    return []
+
+    return ENCODINGS[-1]
+
+
+def iter_sales_data(filename, batch_size=None, encoding=None):
+    """
+    Streams sales data from file one cleaned line at a time.
+
+    The encoding is detected once from a leading sample and the file is
+    read lazily, so memory use does not grow with the file size. Lines
+    the sample's encoding cannot decode fall back to the other ENCODINGS
+    one at a time. Compressed files are decompressed as they stream.
+
+    Yields: raw lines (strings), or lists of up to batch_size lines
+    """
+
+    try:
+        if encoding is None:
+            encoding = detect_encoding(filename)
+
+        with open_binary(filename) as file:
+            lines = _decode_lines(file, encoding)
+            # Skip header
+            next(lines, None)
+            yield from _clean_lines(lines, batch_size)
+
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+        return
+
+
+def _decode_lines(raw_lines, encoding):
+    """
+    Decodes lines read in binary mode with decode_line, splitting them on
+    a lone \r as well, like a file read in text mode
+    """
+
+    for raw in raw_lines:
+        if b"\r" in raw:
+            for part in raw.splitlines():
+                yield decode_line(part, encoding)
+        else:
+            yield decode_line(raw, encoding)
+
+
+def _clean_lines(lines, batch_size=None):
+    """
+    Strips lines and drops empty ones, optionally grouping them in batches
+    """
+
+    batch = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        if batch_size is None:
+            yield line
+            continue
+
+        batch.append(line)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def header_length(first_line):
+    """
+    Returns the length of the header line at the start of first_line
+    (bytes up to the first newline), which a lone \r ends as well
+    """
+
+    return len(first_line.splitlines(True)[0]) if first_line else 0
+
+
+def data_start(filename):
+    """
+    Returns the byte offset of the first line after the header
+    """
+
+    with open_binary(filename) as file:
+        return header_length(file.readline())
+
+
+def split_line_ranges(filename, parts, start=None, end=None):
+    """
+    Splits the data lines of a file (after the header, or from start to
+    end) into up to parts byte ranges that start and end on line
+    boundaries.
+
+    A compressed file cannot be entered part way without decompressing
+    everything before, so it stays one range; its offsets count
+    decompressed bytes and its end is None (the end of the stream) unless
+    given.
+
+    Returns: list of (start, end) byte offsets
+    """
+
+    if detect_compression(filename) is not None:
+        if start is None:
+            start = data_start(filename)
+        return [(start, end)]
+
+    with open(filename, "rb") as file:
+        if start is None:
+            start = header_length(file.readline())
+        size = file.seek(0, 2) if end is None else end
+
+        bounds = [start]
+        for i in range(1, parts):
+            pos = start + (size - start) * i // parts
+            if pos <= bounds[-1]:
+                continue
+
+            # Move to the start of the next line (pos itself if the
+            # previous byte ends a line)
+            file.seek(pos - 1)
+            file.readline()
+            pos = file.tell()
+
+            if bounds[-1] < pos < size:
+                bounds.append(pos)
+
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if a < b]
+
+
+def iter_raw_lines(filename, start, end, chunk_size=1 << 20):
+    """
+    Streams the undecoded lines of the byte range [start, end) of a file,
+    as produced by split_line_ranges (end None reads to the end). Lines
+    are read about chunk_size bytes at a time and, like iter_sales_data's,
+    end at a lone \r as well as at a newline.
+
+    Yields: lines (bytes, with their line endings)
+    """
+
+    with open_binary(filename) as file:
+        file.seek(start)
+        pos = start
+        while end is None or pos < end:
+            lines = file.readlines(chunk_size)
+            if not lines:
+                break
+            for line in lines:
+                if end is not None and pos >= end:
+                    return
+                # More carriage returns than a \r\n ending means a lone one
+                if line.count(b"\r") > line.endswith(b"\r\n"):
+                    for part in line.splitlines(True):
+                        if end is not None and pos >= end:
+                            return
+                        pos += len(part)
+                        yield part
+                    continue
+                pos += len(line)
+                yield line
+
+
+def decode_line(raw, encoding):
+    """
+    Decodes one line, falling back to the other ENCODINGS for this line
+    only when it is not valid in encoding
+    """
+
+    try:
+        return raw.decode(encoding)
+    except UnicodeDecodeError:
+        for fallback in ENCODINGS:
+            try:
+                return raw.decode(fallback)
+            except UnicodeDecodeError:
+                continue
+        raise
+
+
+def iter_line_range(filename, start, end, encoding="utf-8", batch_size=None):
+    """
+    Streams cleaned lines from the byte range [start, end) of a file, as
+    produced by split_line_ranges (end None reads to the end). A line that
+    is not valid in encoding is decoded with the next of ENCODINGS that
+    fits (see decode_line), the same per-line fallback iter_sales_data
+    uses.
+
+    Yields: raw lines (strings), or lists of up to batch_size lines
+    """
+
+    lines = (decode_line(line, encoding) for line in iter_raw_lines(filename, start, end))
+    yield from _clean_lines(lines, batch_size)
+
+
+def read_sales_data(filename):
+    """
+    Reads sales data from file handling encoding issues: lines the
+    detected encoding cannot decode fall back one at a time, see
+    iter_sales_data. A missing file is reported and gives no lines.
+
+    Returns: list of raw lines (strings)
+    """
+
+    return list(iter_sales_data(filename))
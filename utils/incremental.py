@@ -0,0 +1,236 @@
+import hashlib
+import json
+import os
+
+from utils.file_handler import data_start, detect_compression
+from utils.parallel import merge_partials, run_parallel
+from utils.sales_summary import SalesSummary
+from utils.transaction_table import TransactionTable
+
+
+STATE_VERSION = 3
+
+# Bytes read at a time while hashing the processed part of the file
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def default_state_file(filename):
+    """
+    Returns the state file path kept next to a data file
+    """
+
+    return os.path.splitext(filename)[0] + ".state.json"
+
+
+def _hash_range(filename, start, end, hasher):
+    """
+    Feeds bytes start to end of a file to hasher
+
+    Returns: the last byte hashed, b"" if none
+    """
+
+    last = b""
+    with open(filename, "rb") as file:
+        file.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = file.read(min(remaining, HASH_CHUNK_SIZE))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            remaining -= len(chunk)
+            last = chunk[-1:]
+    return last
+
+
+def file_watermark(filename, offset, hasher=None, hashed=0):
+    """
+    Fingerprints the first offset bytes of a file with a SHA-256 over all
+    of them, so an append can be told apart from a rewrite anywhere in
+    the part already processed. hasher may already hold the first hashed
+    bytes (see refresh_state), only the rest is read then.
+    """
+
+    hasher = hasher.copy() if hasher is not None else hashlib.sha256()
+    last = _hash_range(filename, hashed, offset, hasher)
+    if hashed and not last:
+        # Nothing new was hashed, the last byte is still the old one
+        last = _hash_range(filename, hashed - 1, hashed, hashlib.sha256())
+
+    return {
+        "offset": offset,
+        "sha256": hasher.hexdigest(),
+        "ends_line": last in (b"\n", b"\r")
+    }
+
+
+def _matching_hasher(filename, watermark):
+    """
+    Returns the SHA-256 hasher over the watermarked bytes if the file was
+    only appended to since, None otherwise
+    """
+
+    offset = watermark["offset"]
+    if os.path.getsize(filename) < offset:
+        return None
+
+    hasher = hashlib.sha256()
+    last = _hash_range(filename, 0, offset, hasher)
+    if hasher.hexdigest() != watermark["sha256"] or (last in (b"\n", b"\r")) != watermark["ends_line"]:
+        return None
+
+    if not watermark["ends_line"]:
+        with open(filename, "rb") as file:
+            file.seek(offset)
+            next_byte = file.read(1)
+        if next_byte not in (b"", b"\n", b"\r"):
+            return None
+
+    return hasher
+
+
+def watermark_matches(filename, watermark):
+    """
+    Checks the file still starts with the bytes the watermark was taken
+    over, i.e. it was only appended to since. Every one of those bytes
+    is read and hashed again, though none of them is parsed.
+
+    If the last line read had no newline yet, the appended bytes must
+    start a new line; a last line that was extended needs a rebuild.
+    """
+
+    return _matching_hasher(filename, watermark) is not None
+
+
+def empty_enrichment():
+    return {"enriched_count": 0, "total": 0, "unmatched": set()}
+
+
+def load_state(state_file):
+    """
+    Loads saved aggregate state.
+
+    Returns: state dictionary, or None if missing, unreadable or from an
+    older version
+    """
+
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(data, dict) or data.get("version") != STATE_VERSION:
+        return None
+
+    try:
+        result = data["result"]
+        result["regions"] = set(result["regions"])
+        result["summary"] = SalesSummary.from_dict(result["summary"])
+        result["transactions"] = None
+
+        enrichment = data["enrichment"]
+        enrichment["unmatched"] = set(enrichment["unmatched"])
+
+        int(data["watermark"]["offset"])
+        str(data["watermark"]["sha256"])
+        bool(data["watermark"]["ends_line"])
+    except (KeyError, TypeError, AttributeError):
+        return None
+
+    return data
+
+
+def save_state(state_file, state):
+    """
+    Writes aggregate state, replacing the old file only once the new one
+    is complete
+    """
+
+    result = dict(state["result"])
+    result["regions"] = sorted(result["regions"])
+    result["summary"] = result["summary"].to_dict()
+    result.pop("transactions", None)
+
+    enrichment = dict(state["enrichment"])
+    enrichment["unmatched"] = sorted(enrichment["unmatched"])
+
+    data = dict(state, result=result, enrichment=enrichment)
+
+    temp_file = state_file + ".tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(temp_file, state_file)
+
+
+def refresh_state(filename, state_file=None, workers=1, approximate=None):
+    """
+    Brings saved aggregate state up to date with the sales file.
+
+    Only lines after the saved watermark are parsed and folded into the
+    saved aggregates. If there is no usable state, the file was truncated
+    or rewritten, or the state was built with other approximate settings,
+    everything is rebuilt from the start.
+
+    Returns: (state, new_rows, rebuilt) where state["result"] covers the
+    whole file and new_rows is the result for the newly read lines only,
+    with their validated rows in new_rows["transactions"]
+    Raises: ValueError for a compressed file, whose byte offsets cannot be
+    watermarked
+    """
+
+    state_file = state_file or default_state_file(filename)
+
+    if not os.path.exists(filename):
+        print(f"Error: File '{filename}' not found.")
+        empty = merge_partials([])
+        state = {"result": empty, "enrichment": empty_enrichment()}
+        return state, dict(empty, transactions=TransactionTable()), True
+
+    if detect_compression(filename) is not None:
+        raise ValueError(f"Incremental mode needs an uncompressed file, '{filename}' is compressed")
+
+    end = os.path.getsize(filename)
+    state = load_state(state_file)
+
+    hasher = None
+    if (
+        state is not None
+        and state.get("source") == os.path.abspath(filename)
+        and state["result"]["summary"].approximate == approximate
+    ):
+        hasher = _matching_hasher(filename, state["watermark"])
+    rebuilt = hasher is None
+
+    if rebuilt:
+        start = data_start(filename)
+        previous = merge_partials([])
+        enrichment = empty_enrichment()
+    else:
+        start = state["watermark"]["offset"]
+        previous = state["result"]
+        enrichment = state["enrichment"]
+
+    if end > start:
+        new_rows = run_parallel(
+            filename, workers, keep_rows=True, start=start, end=end,
+            approximate=approximate
+        )
+    else:
+        new_rows = merge_partials([])
+        end = start
+
+    # No new lines still means an empty table, not missing rows
+    if new_rows["transactions"] is None:
+        new_rows["transactions"] = TransactionTable()
+
+    state = {
+        "version": STATE_VERSION,
+        "source": os.path.abspath(filename),
+        # The old prefix was just hashed, only the new lines are read again
+        "watermark": file_watermark(filename, end, hasher, 0 if rebuilt else start),
+        "result": merge_partials([previous, dict(new_rows, transactions=None)]),
+        "enrichment": enrichment
+    }
+
+    return state, new_rows, rebuilt
@@ -0,0 +1,205 @@
+import mmap
+import os
+import random
+import struct
+from array import array
+
+from utils import vectorized
+from utils.file_handler import decode_line, detect_compression, detect_encoding, header_length
+
+
+INDEX_MAGIC = b"SLIX"
+INDEX_VERSION = 1
+
+# magic, version, data file size, data file mtime_ns, line count
+INDEX_HEADER = struct.Struct("<4sIQQQ")
+
+WHITESPACE = b" \t\r\n\f\v"
+
+
+def default_index_file(filename):
+    """
+    Returns the line index file path kept next to a data file
+    """
+
+    return os.path.splitext(filename)[0] + ".lines.idx"
+
+
+class LineIndex:
+    """
+    Random access to the data lines of an uncompressed sales file.
+
+    The file is memory-mapped and the start offsets of its non-blank data
+    lines (after the header) are kept as uint64, lines ending at a lone
+    \r as well as at a newline like read_sales_data's, followed by the end of
+    the last line, so line i is the bytes from offsets[i] to
+    offsets[i + 1]. The offsets are cached in index_file and mapped back
+    in without copying; the cache is rebuilt when the data file's size
+    or modification time changes. Lines are only decoded when asked for.
+
+    Use as a context manager, or call close().
+    """
+
+    def __init__(self, filename, index_file=None, cache=True):
+        if detect_compression(filename) is not None:
+            raise ValueError(f"'{filename}' is compressed, a line index needs random access")
+
+        self.filename = filename
+        self.index_file = index_file or default_index_file(filename)
+        self.encoding = detect_encoding(filename)
+
+        stat = os.stat(filename)
+        self._key = (stat.st_size, stat.st_mtime_ns)
+
+        with open(filename, "rb") as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""
+
+        self._index = None
+        self.offsets = self._load() if cache else None
+        if self.offsets is None:
+            self.offsets = self._build()
+            if cache:
+                self._save()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        # The offsets view has to go before the map under it
+        if isinstance(self.offsets, memoryview):
+            self.offsets.release()
+        self.offsets = None
+        for mapped in (self._index, self._data):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+
+    def _build(self):
+        data = self._data
+        size = len(data)
+
+        # Skip header
+        pos = header_length(data[:data.find(b"\n") + 1 or size])
+        offsets = array("Q")
+
+        if vectorized.ENABLED and size:
+            offsets.frombytes(vectorized.line_offsets(data, pos).tobytes())
+            return offsets
+
+        while pos < size:
+            end = data.find(b"\n", pos) + 1 or size
+            # A \r before the line's end (or its \r\n) ends it early
+            lone = data.find(b"\r", pos, end - 1 - (data[end - 1] == 10))
+            if lone != -1:
+                end = lone + 1
+            # Only lines starting with whitespace can be blank
+            if data[pos] not in WHITESPACE or data[pos:end].strip():
+                offsets.append(pos)
+            pos = end
+
+        offsets.append(size)
+        return offsets
+
+    def _save(self):
+        header = INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, *self._key, len(self.offsets) - 1)
+        temp_file = self.index_file + ".tmp"
+        try:
+            with open(temp_file, "wb") as f:
+                f.write(header)
+                self.offsets.tofile(f)
+            os.replace(temp_file, self.index_file)
+        except OSError:
+            # A read-only data directory only loses the cache
+            pass
+
+    def _load(self):
+        """
+        Maps the cached offsets, or returns None if the cache is missing,
+        unreadable or was built from another version of the data file
+        """
+
+        try:
+            with open(self.index_file, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < INDEX_HEADER.size:
+                    return None
+                index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        magic, version, data_size, mtime_ns, count = INDEX_HEADER.unpack_from(index)
+        if (
+            magic != INDEX_MAGIC
+            or version != INDEX_VERSION
+            or (data_size, mtime_ns) != self._key
+            or size != INDEX_HEADER.size + 8 * (count + 1)
+        ):
+            index.close()
+            return None
+
+        self._index = index
+        return memoryview(index)[INDEX_HEADER.size:].cast("Q")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def line(self, i):
+        """
+        Returns data line i, stripped like read_sales_data's lines
+        """
+
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("line index out of range")
+        return decode_line(self._data[self.offsets[i]:self.offsets[i + 1]], self.encoding).strip()
+
+    def lines(self, start=0, stop=None):
+        """
+        Returns data lines start to stop (exclusive) as a list
+        """
+
+        start, stop, _ = slice(start, stop).indices(len(self))
+        offsets = self.offsets
+        data = self._data
+        encoding = self.encoding
+        return [decode_line(data[offsets[i]:offsets[i + 1]], encoding).strip() for i in range(start, stop)]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.step not in (None, 1):
+                return [self.line(i) for i in range(*key.indices(len(self)))]
+            return self.lines(key.start, key.stop)
+        return self.line(key)
+
+    def sample(self, n, seed=None):
+        """
+        Returns n data lines picked at random (all if there are fewer), in
+        file order
+        """
+
+        picked = random.Random(seed).sample(range(len(self)), min(n, len(self)))
+        return [self.line(i) for i in sorted(picked)]
+
+    def byte_range(self, start=0, stop=None):
+        """
+        Returns: (start, end) byte offsets of data lines start to stop, for
+        iter_line_range and process_line_range
+        """
+
+        start, stop, _ = slice(start, stop).indices(len(self))
+        return self.offsets[start], self.offsets[max(start, stop)]
+
+    def byte_ranges(self, parts):
+        """
+        Splits the data lines into up to parts byte ranges holding about
+        the same number of lines
+
+        Returns: list of (start, end) byte offsets
+        """
+
+        count = len(self)
+        bounds = sorted({count * i // parts for i in range(parts + 1)})
+        return [self.byte_range(a, b) for a, b in zip(bounds, bounds[1:]) if a < b]
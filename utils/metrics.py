@@ -0,0 +1,230 @@
+"""
+Per-stage timing, throughput and memory metrics for a pipeline run.
+
+Functions decorated with instrument() and blocks run under stage() are
+measured only while a Metrics collector is enabled; otherwise the
+decorator costs one global lookup per call. Each measurement records wall
+time, CPU time, rows in and out, and with trace_memory the peak bytes
+allocated by Python (tracemalloc) above the level at entry. Tracing
+memory slows the run down noticeably, timings are best read from a run
+with trace_memory=False.
+
+CPU time is process-wide in the thread that enabled the collector, so it
+includes helper threads. tracemalloc's peak is shared by all threads, so
+calls made in other threads, such as the catalog prefetch, record their
+own thread's CPU time and no allocation peak. Worker processes (see
+parallel.process_pool) start from a fresh interpreter with no collector
+enabled, so the work they do is only seen in the stage that waits for
+them. The process peak RSS is left out (None) where the resource module
+is missing, as on Windows.
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:
+    # Unix only
+    resource = None
+
+_active = None
+
+
+class Metrics:
+    """
+    Collects stage and function measurements for one run
+    """
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.pid = os.getpid()
+        self.thread = threading.get_ident()
+        self.started = time.perf_counter()
+        self.started_cpu = time.process_time()
+
+        self.stages = []
+        # function name -> aggregated record
+        self.functions = {}
+        # Running peaks of the measurements open in the collecting thread
+        self._peaks = []
+        self._lock = threading.Lock()
+        self._started_tracing = False
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def measure(self, rows_in=None):
+        """
+        Measures the block; set "rows_out" on the yielded record
+        """
+
+        own_thread = threading.get_ident() == self.thread
+        track_memory = self.trace_memory and own_thread and tracemalloc.is_tracing()
+        cpu_clock = time.process_time if own_thread else time.thread_time
+        record = {"rows_in": rows_in, "rows_out": None}
+
+        if track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            tracemalloc.reset_peak()
+            self._peaks.append(current)
+
+        start = time.perf_counter()
+        start_cpu = cpu_clock()
+        try:
+            yield record
+        finally:
+            record["wall_seconds"] = time.perf_counter() - start
+            record["cpu_seconds"] = cpu_clock() - start_cpu
+            record["alloc_peak_bytes"] = None
+
+            if track_memory:
+                peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                record["alloc_peak_bytes"] = max(0, peak - current)
+                # The enclosing measurement's peak includes this one
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                tracemalloc.reset_peak()
+
+    def call(self, func, args, kwargs):
+        if os.getpid() != self.pid:
+            return func(*args, **kwargs)
+
+        with self.measure(_size(args[0]) if args else None) as record:
+            result = func(*args, **kwargs)
+            record["rows_out"] = _size(result[0] if isinstance(result, tuple) else result)
+
+        with self._lock:
+            totals = self.functions.get(func.__qualname__)
+            if totals is None:
+                totals = self.functions[func.__qualname__] = {
+                    "calls": 0,
+                    "wall_seconds": 0.0,
+                    "cpu_seconds": 0.0,
+                    "rows_in": None,
+                    "rows_out": None,
+                    "alloc_peak_bytes": None
+                }
+            totals["calls"] += 1
+            for key in ("wall_seconds", "cpu_seconds"):
+                totals[key] += record[key]
+            for key in ("rows_in", "rows_out"):
+                if record[key] is not None:
+                    totals[key] = (totals[key] or 0) + record[key]
+            if record["alloc_peak_bytes"] is not None:
+                totals["alloc_peak_bytes"] = max(totals["alloc_peak_bytes"] or 0, record["alloc_peak_bytes"])
+
+        return result
+
+    def to_dict(self):
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        peak_rss = None
+        if resource is not None:
+            peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            if sys.platform != "darwin":
+                peak_rss *= 1024
+
+        return {
+            "generated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "trace_memory": self.trace_memory,
+            "total": {
+                "wall_seconds": time.perf_counter() - self.started,
+                "cpu_seconds": time.process_time() - self.started_cpu,
+                "peak_rss_bytes": peak_rss
+            },
+            "stages": self.stages,
+            "functions": self.functions
+        }
+
+    def write(self, filename):
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def _size(value):
+    if isinstance(value, (str, bytes)) or not hasattr(value, "__len__"):
+        return None
+    return len(value)
+
+
+def enable(trace_memory=True):
+    """
+    Starts collecting metrics
+
+    Returns: the Metrics collector
+    """
+
+    global _active
+    disable()
+    _active = Metrics(trace_memory)
+    _active.start()
+    return _active
+
+
+def disable():
+    """
+    Stops collecting metrics
+    """
+
+    global _active
+    if _active is not None:
+        _active.stop()
+        _active = None
+
+
+def _after_fork_in_child():
+    global _active
+    if _active is not None:
+        _active.stop()
+        _active = None
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def instrument(func):
+    """
+    Decorator measuring each call of func while metrics are enabled
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _active is None:
+            return func(*args, **kwargs)
+        return _active.call(func, args, kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def stage(name, rows_in=None):
+    """
+    Measures a pipeline stage while metrics are enabled; set "rows_out"
+    on the yielded record
+    """
+
+    metrics = _active
+    if metrics is None:
+        yield {}
+        return
+
+    with metrics.measure(rows_in) as record:
+        yield record
+    metrics.stages.append(dict(name=name, **record))
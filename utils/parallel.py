@@ -0,0 +1,221 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.data_processor import parse_transactions, validate_and_filter
+from utils.file_handler import detect_encoding, iter_line_range, split_line_ranges
+from utils.partitions import is_partitioned, select_partitions
+from utils.sales_summary import SalesSummary
+from utils.transaction_table import TransactionTable
+
+
+def process_line_range(filename, start, end, encoding, region=None,
+                       min_amount=None, max_amount=None, keep_rows=False,
+                       batch_size=50000, approximate=None, start_date=None,
+                       end_date=None):
+    """
+    Parses, validates and aggregates one byte range of the sales file.
+    With start_date or end_date, rows dated outside that window are
+    dropped right after parsing, as if they were not in the file.
+
+    Returns: partial result dictionary, merged with merge_partials
+    """
+
+    parsed = TransactionTable()
+    raw_count = 0
+
+    for batch in iter_line_range(filename, start, end, encoding, batch_size):
+        raw_count += len(batch)
+        parsed.extend(parse_transactions(batch, columnar=True))
+
+    if start_date or end_date:
+        parsed = parsed.between(start_date, end_date)
+
+    amounts = parsed.amounts()
+    valid, invalid_count, filter_summary = validate_and_filter(
+        parsed,
+        region=region,
+        min_amount=min_amount,
+        max_amount=max_amount
+    )
+
+    return {
+        "raw_count": raw_count,
+        "parsed_count": len(parsed) + parsed.rejected,
+        "regions": set(parsed.region.categories),
+        "min_amount": min(amounts) if amounts else None,
+        "max_amount": max(amounts) if amounts else None,
+        "filter_summary": filter_summary,
+        "summary": SalesSummary.from_transactions(valid, approximate),
+        "transactions": valid if keep_rows else None
+    }
+
+
+def merge_partials(partials):
+    """
+    Merges partial results in file order into one result of the same shape
+    """
+
+    merged = {
+        "raw_count": 0,
+        "parsed_count": 0,
+        "regions": set(),
+        "min_amount": None,
+        "max_amount": None,
+        "filter_summary": {
+            "total_input": 0,
+            "invalid": 0,
+            "filtered_by_region": 0,
+            "filtered_by_amount": 0,
+            "final_count": 0
+        },
+        "summary": SalesSummary(),
+        "transactions": None
+    }
+
+    for partial in partials:
+        merged["raw_count"] += partial["raw_count"]
+        merged["parsed_count"] += partial["parsed_count"]
+        merged["regions"] |= partial["regions"]
+
+        if partial["min_amount"] is not None:
+            if merged["min_amount"] is None or partial["min_amount"] < merged["min_amount"]:
+                merged["min_amount"] = partial["min_amount"]
+            if merged["max_amount"] is None or partial["max_amount"] > merged["max_amount"]:
+                merged["max_amount"] = partial["max_amount"]
+
+        for key, value in partial["filter_summary"].items():
+            merged["filter_summary"][key] += value
+
+        merged["summary"].merge(partial["summary"])
+
+        if partial["transactions"] is not None:
+            if merged["transactions"] is None:
+                merged["transactions"] = TransactionTable()
+            merged["transactions"].extend(partial["transactions"])
+
+    return merged
+
+
+def run_parallel(filename, workers=None, region=None, min_amount=None,
+                 max_amount=None, keep_rows=False, start=None, end=None,
+                 approximate=None):
+    """
+    Splits the sales file into line-aligned byte ranges and processes them
+    on a pool of worker processes. With one worker the file is processed
+    in this process as a single range.
+
+    Set keep_rows to also get the validated rows back as one
+    TransactionTable, for steps that need them (enrichment). start and end
+    limit the work to a byte range of the file. approximate (an
+    Approximation) builds approximate summaries, see SalesSummary.
+
+    Returns: merged result dictionary, see process_line_range
+    """
+
+    workers = workers or os.cpu_count() or 1
+
+    try:
+        encoding = detect_encoding(filename)
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+        tasks = []
+    else:
+        # A few ranges per worker evens out uneven line lengths
+        parts = 1 if workers == 1 else workers * 4
+        tasks = [
+            (filename, range_start, range_end, encoding)
+            for range_start, range_end in split_line_ranges(filename, parts, start, end)
+        ]
+
+    return _process_ranges(
+        tasks, workers, region=region, min_amount=min_amount,
+        max_amount=max_amount, keep_rows=keep_rows, approximate=approximate
+    )
+
+
+def run_partitioned(source, workers=None, start_date=None, end_date=None,
+                    region=None, min_amount=None, max_amount=None,
+                    keep_rows=False, approximate=None):
+    """
+    Processes the partition files of a directory or glob pattern as one
+    data set. Partitions whose name or header dates fall outside
+    start_date to end_date (inclusive YYYY-MM-DD) are skipped without
+    being read, rows outside the window are dropped from the rest. The
+    remaining files are split into byte ranges that run concurrently on
+    a pool of worker processes, and merged in date order.
+
+    Returns: merged result dictionary, see process_line_range
+    """
+
+    workers = workers or os.cpu_count() or 1
+    partitions = select_partitions(source, start_date, end_date)
+
+    # Large files are split further so the ranges still keep every
+    # worker busy
+    parts = 1 if workers == 1 else max(1, workers * 4 // max(1, len(partitions)))
+
+    tasks = []
+    for filename, _ in partitions:
+        try:
+            encoding = detect_encoding(filename)
+        except FileNotFoundError:
+            print(f"Error: File '{filename}' not found.")
+            continue
+        tasks.extend(
+            (filename, range_start, range_end, encoding)
+            for range_start, range_end in split_line_ranges(filename, parts)
+        )
+
+    return _process_ranges(
+        tasks, workers, region=region, min_amount=min_amount,
+        max_amount=max_amount, keep_rows=keep_rows, approximate=approximate,
+        start_date=start_date, end_date=end_date
+    )
+
+
+def load_sales(source, workers=None, start_date=None, end_date=None, **options):
+    """
+    Processes a single sales file with run_parallel, or a directory or
+    glob of partitions (or any source with a date window) with
+    run_partitioned; options are passed on
+
+    Returns: merged result dictionary, see process_line_range
+    """
+
+    if is_partitioned(source) or start_date or end_date:
+        return run_partitioned(source, workers, start_date, end_date, **options)
+    return run_parallel(source, workers, **options)
+
+
+def process_pool(workers):
+    """
+    Returns a ProcessPoolExecutor of workers started from a fresh
+    interpreter (forkserver, or spawn where that is missing) rather than
+    forked from this process, so threads already running here, such as
+    the catalog prefetch, cannot leave a copied lock held in a worker
+    """
+
+    methods = multiprocessing.get_all_start_methods()
+    method = "forkserver" if "forkserver" in methods else "spawn"
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+
+
+def _process_ranges(tasks, workers, **options):
+    """
+    Runs process_line_range over (filename, start, end, encoding) tasks,
+    in this process with one worker, and merges the results in task order
+    """
+
+    if workers == 1 or not tasks:
+        partials = [process_line_range(*task, **options) for task in tasks]
+    else:
+        with process_pool(workers) as pool:
+            futures = [pool.submit(process_line_range, *task, **options) for task in tasks]
+            partials = [future.result() for future in futures]
+
+    merged = merge_partials(partials)
+    # Rows were asked for, so no data is an empty table rather than None
+    if options.get("keep_rows") and merged["transactions"] is None:
+        merged["transactions"] = TransactionTable()
+    return merged
@@ -0,0 +1,111 @@
+import glob
+import os
+import re
+from datetime import date
+
+from utils.file_handler import COMPRESSIONS, open_binary
+
+# File names a data directory is expanded to, plain or compressed
+PARTITION_GLOBS = ["*.txt"] + [f"*.txt{suffix}" for _, suffix, _ in COMPRESSIONS.values()]
+
+# YYYY-MM-DD, YYYY_MM_DD or YYYYMMDD not inside a longer number; the
+# lookahead lets candidates overlap, as in store_0012_20241201
+DATE_PATTERN = re.compile(r"(?<!\d)(?=((?:19|20)\d\d)[-_]?(\d\d)[-_]?(\d\d)(?!\d))")
+
+
+def find_dates(text):
+    """
+    Returns: the valid dates in text as YYYY-MM-DD strings
+    """
+
+    dates = []
+    for match in DATE_PATTERN.finditer(text):
+        try:
+            dates.append(date(*map(int, match.groups())).isoformat())
+        except ValueError:
+            continue
+    return dates
+
+
+def is_partitioned(source):
+    """
+    Tells whether a data source names a directory or glob of partition
+    files rather than a single file
+    """
+
+    return os.path.isdir(source) or glob.has_magic(source)
+
+
+def partition_files(source):
+    """
+    Lists the files of a data source: the PARTITION_GLOBS files of a
+    directory, the matches of a glob pattern, or a single file
+
+    Returns: sorted list of file paths
+    """
+
+    if os.path.isdir(source):
+        patterns = [os.path.join(source, pattern) for pattern in PARTITION_GLOBS]
+    elif glob.has_magic(source):
+        patterns = [source]
+    else:
+        return [source]
+
+    return sorted({
+        path
+        for pattern in patterns
+        for path in glob.glob(pattern)
+        if os.path.isfile(path)
+    })
+
+
+def partition_date_range(filename, read_header=True):
+    """
+    Infers the dates a partition holds from the dates in its file name
+    (one for a daily file, two for a range), or else from its header line.
+    Only the header is read, and only when the name has no date and
+    read_header is set.
+
+    Returns: (first, last) YYYY-MM-DD dates, or None when unknown
+    """
+
+    dates = find_dates(os.path.basename(filename))
+
+    if not dates and read_header:
+        try:
+            with open_binary(filename) as file:
+                header = file.readline(4096)
+        except (OSError, EOFError):
+            return None
+        dates = find_dates(header.decode("latin-1"))
+
+    if not dates:
+        return None
+    return min(dates), max(dates)
+
+
+def select_partitions(source, start_date=None, end_date=None):
+    """
+    Lists the partitions of a data source that may hold rows dated from
+    start_date to end_date (inclusive YYYY-MM-DD, either may be None).
+    Partitions whose dates are known to fall outside are skipped, those
+    with unknown dates are kept.
+
+    Returns: [(filename, (first, last) or None)] in date order, partitions
+    with unknown dates first, ties by name
+    """
+
+    selected = []
+
+    for filename in partition_files(source):
+        # Without a window no header needs to be read, names still order
+        # the partitions
+        dates = partition_date_range(filename, read_header=bool(start_date or end_date))
+        if dates is not None:
+            first, last = dates
+            if (start_date and last < start_date) or (end_date and first > end_date):
+                continue
+        selected.append((filename, dates))
+
+    selected.sort(key=lambda item: (item[1] or ("",), item[0]))
+    return selected
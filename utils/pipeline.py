@@ -0,0 +1,465 @@
+"""
+Lazy read -> parse -> validate -> filter -> aggregate pipeline over a
+sales data source.
+
+    pipeline = (
+        SalesPipeline("data/sales_data.txt")
+        .where(region="North", min_amount=1000)
+        .aggregate("total_revenue", top_selling_products={"n": 10})
+    )
+    print(pipeline.explain())
+    results = pipeline.collect()
+
+Nothing is read until collect(). The plan then pushes every predicate
+as far down as it goes: partitions outside the date window are skipped
+unread, lines without the wanted Region are dropped on their raw bytes
+before decoding, the string rules are checked before any numeric field
+is converted, and only the columns the requested aggregates read are
+built. Read, parse, validate and filter run fused in one pass per byte
+range, on worker processes when workers > 1.
+"""
+
+import os
+from datetime import date
+
+from utils.data_processor import (
+    calculate_total_revenue,
+    customer_analysis,
+    daily_sales_trend,
+    find_peak_sales_day,
+    low_performing_products,
+    moving_average_revenue,
+    region_wise_sales,
+    sales_between,
+    sales_by_period,
+    top_selling_products
+)
+from utils.file_handler import decode_line, detect_encoding, iter_raw_lines, split_line_ranges
+from utils.parallel import process_pool
+from utils.partitions import partition_files, select_partitions
+from utils.sales_summary import SalesSummary
+from utils.transaction_table import TransactionTable, check_storable
+
+
+# TransactionTable columns; quantity and unit_price are always built
+COLUMNS = [
+    "transaction_id", "date", "product_id", "product_name",
+    "quantity", "unit_price", "customer_id", "region"
+]
+
+# aggregate -> (function, extra columns it reads from a TransactionTable);
+# None means it needs a SalesSummary, which is built from every column
+AGGREGATES = {
+    "total_revenue": (calculate_total_revenue, []),
+    "region_wise_sales": (region_wise_sales, ["region"]),
+    "top_selling_products": (top_selling_products, ["product_name"]),
+    "low_performing_products": (low_performing_products, ["product_name"]),
+    "customer_analysis": (customer_analysis, ["customer_id", "product_name"]),
+    "daily_sales_trend": (daily_sales_trend, ["date", "customer_id"]),
+    "peak_sales_day": (find_peak_sales_day, ["date"]),
+    "sales_between": (sales_between, None),
+    "sales_by_period": (sales_by_period, None),
+    "moving_average_revenue": (moving_average_revenue, None)
+}
+
+# Besides AGGREGATES: the filtered rows as a TransactionTable, and the
+# SalesSummary of them
+OUTPUTS = ["rows", "summary"]
+
+SCAN_COUNTS = [
+    "raw_count", "pushed_down", "malformed", "invalid", "filtered_by_region",
+    "filtered_by_date", "filtered_by_amount", "final_count"
+]
+
+
+def _ordinal(date_str):
+    """
+    Returns the day number of a YYYY-MM-DD date, 0 if it is not one
+    (TransactionTable.append rejects the same dates)
+    """
+
+    try:
+        day = date.fromisoformat(date_str)
+    except ValueError:
+        return 0
+    return day.toordinal() if day.isoformat() == date_str else 0
+
+
+def scan_range(filename, start, end, encoding, plan):
+    """
+    Reads, parses, validates and filters one byte range of a sales file
+    in a single pass, as planned by SalesPipeline.
+
+    Rows are checked cheapest first: the raw Region bytes, then the
+    string rules and filters, then the numeric fields, the date and the
+    amount; each rejected row is counted once, under the first check it
+    fails. Only plan["columns"] are built.
+
+    Returns: partial result dictionary with the scan counts, the rows (a
+    TransactionTable) and/or their SalesSummary as planned
+    """
+
+    region = plan["region"]
+    region_bytes = plan["region_bytes"]
+    min_amount = plan["min_amount"]
+    max_amount = plan["max_amount"]
+    first_day = plan["first_day"]
+    last_day = plan["last_day"]
+    columns = plan["columns"]
+
+    table = TransactionTable()
+    keep_transaction_id = "transaction_id" in columns
+    keep_date = "date" in columns
+    keep_product_id = "product_id" in columns
+    keep_product_name = "product_name" in columns
+    keep_customer_id = "customer_id" in columns
+    keep_region = "region" in columns
+
+    raw_count = pushed_down = malformed = invalid = 0
+    filtered_by_region = filtered_by_date = filtered_by_amount = 0
+    days = {}
+
+    for raw in iter_raw_lines(filename, start, end):
+        # Region is the last field, a line that does not hold its bytes
+        # anywhere cannot match
+        if region_bytes is not None and region_bytes not in raw:
+            if raw.strip():
+                raw_count += 1
+                pushed_down += 1
+            continue
+
+        line = decode_line(raw, encoding).strip()
+        if not line:
+            continue
+        raw_count += 1
+
+        parts = line.split("|")
+        if len(parts) != 8:
+            malformed += 1
+            continue
+
+        (
+            transaction_id,
+            date_str,
+            product_id,
+            product_name,
+            quantity,
+            unit_price,
+            customer_id,
+            row_region
+        ) = parts
+
+        if not (
+            row_region
+            and transaction_id.startswith("T")
+            and product_id.startswith("P")
+            and customer_id.startswith("C")
+        ):
+            invalid += 1
+            continue
+
+        if region is not None and row_region != region:
+            filtered_by_region += 1
+            continue
+
+        try:
+            quantity = int(quantity.replace(",", ""))
+            unit_price = float(unit_price.replace(",", ""))
+            # Values the table columns cannot hold count as malformed
+            check_storable(quantity, unit_price)
+        except ValueError:
+            malformed += 1
+            continue
+
+        day = days.get(date_str)
+        if day is None:
+            day = days[date_str] = _ordinal(date_str)
+        if not day:
+            malformed += 1
+            continue
+
+        if quantity <= 0 or unit_price <= 0:
+            invalid += 1
+            continue
+
+        if (first_day is not None and day < first_day) or (last_day is not None and day > last_day):
+            filtered_by_date += 1
+            continue
+
+        if min_amount is not None or max_amount is not None:
+            amount = quantity * unit_price
+            if (min_amount is not None and amount < min_amount) or (max_amount is not None and amount > max_amount):
+                filtered_by_amount += 1
+                continue
+
+        if keep_transaction_id:
+            table.transaction_id.append(transaction_id)
+        if keep_date:
+            table.date.append(day)
+        if keep_product_id:
+            table.product_id.append(product_id)
+        if keep_product_name:
+            table.product_name.append(product_name.replace(",", ""))
+        table.quantity.append(quantity)
+        table.unit_price.append(unit_price)
+        if keep_customer_id:
+            table.customer_id.append(customer_id)
+        if keep_region:
+            table.region.append(row_region)
+
+    counts = {
+        "raw_count": raw_count,
+        "pushed_down": pushed_down,
+        "malformed": malformed,
+        "invalid": invalid,
+        "filtered_by_region": filtered_by_region,
+        "filtered_by_date": filtered_by_date,
+        "filtered_by_amount": filtered_by_amount,
+        "final_count": len(table)
+    }
+
+    return {
+        "counts": counts,
+        "rows": table if plan["keep_rows"] else None,
+        "summary": SalesSummary.from_transactions(table) if plan["summary"] else None
+    }
+
+
+class SalesPipeline:
+    """
+    Lazy query over a sales data source: a file, or a directory or glob
+    of partition files (see load_sales).
+
+    where() and aggregate() return a new pipeline and read nothing;
+    explain() shows the plan and collect() runs it.
+    """
+
+    def __init__(self, source, workers=1):
+        self.source = source
+        self.workers = workers or os.cpu_count() or 1
+        self.filters = {
+            "region": None,
+            "min_amount": None,
+            "max_amount": None,
+            "start_date": None,
+            "end_date": None
+        }
+        # name -> keyword arguments, in request order
+        self.aggregates = {}
+
+    def _copy(self):
+        pipeline = SalesPipeline(self.source, self.workers)
+        pipeline.filters = dict(self.filters)
+        pipeline.aggregates = dict(self.aggregates)
+        return pipeline
+
+    def where(self, region=None, min_amount=None, max_amount=None,
+              start_date=None, end_date=None):
+        """
+        Keeps only the rows of region, with an amount (Quantity *
+        UnitPrice) from min_amount to max_amount, dated from start_date to
+        end_date (inclusive YYYY-MM-DD). Filters left as None keep the
+        ones already set.
+        """
+
+        pipeline = self._copy()
+        given = {
+            "region": region,
+            "min_amount": min_amount,
+            "max_amount": max_amount,
+            "start_date": start_date,
+            "end_date": end_date
+        }
+        pipeline.filters.update((key, value) for key, value in given.items() if value is not None)
+        return pipeline
+
+    def aggregate(self, *names, **options):
+        """
+        Adds aggregates to compute, by name (see AGGREGATES and OUTPUTS).
+        Keyword arguments add one with its arguments, e.g.
+        top_selling_products={"n": 10}.
+        """
+
+        pipeline = self._copy()
+        requested = [(name, {}) for name in names] + list(options.items())
+        for name, arguments in requested:
+            if name not in AGGREGATES and name not in OUTPUTS:
+                raise ValueError(f"Unknown aggregate '{name}'")
+            pipeline.aggregates[name] = dict(arguments)
+        return pipeline
+
+    def _plan(self):
+        """
+        Chooses what each scan builds for the requested aggregates
+
+        Returns: plan dictionary, passed to scan_range
+        """
+
+        filters = self.filters
+        names = list(self.aggregates) or ["rows"]
+
+        # One summary answers every aggregate, the rollup based ones need
+        # it; otherwise only the columns the aggregates read are built
+        summary = "summary" in names or any(
+            AGGREGATES[name][1] is None for name in names if name in AGGREGATES
+        )
+        keep_rows = "rows" in names or not summary
+
+        if summary or "rows" in names:
+            columns = list(COLUMNS)
+        else:
+            needed = {"quantity", "unit_price"}
+            for name in names:
+                needed.update(AGGREGATES[name][1])
+            columns = [column for column in COLUMNS if column in needed]
+
+        # Only an ASCII region has the same bytes in every supported
+        # encoding, others are compared after decoding
+        region = filters["region"]
+        region_bytes = ("|" + region).encode("ascii") if region and region.isascii() else None
+
+        start_date = filters["start_date"]
+        end_date = filters["end_date"]
+
+        return {
+            "names": names,
+            "region": region or None,
+            "region_bytes": region_bytes,
+            "min_amount": filters["min_amount"],
+            "max_amount": filters["max_amount"],
+            "first_day": date.fromisoformat(start_date).toordinal() if start_date else None,
+            "last_day": date.fromisoformat(end_date).toordinal() if end_date else None,
+            "columns": columns,
+            "summary": summary,
+            "keep_rows": keep_rows
+        }
+
+    def _tasks(self):
+        """
+        Lists the byte ranges to scan, after skipping the partitions
+        outside the date window
+
+        Returns: (tasks, files, selected) with tasks as (filename, start,
+        end, encoding), the number of files in the source and the number
+        selected
+        """
+
+        filters = self.filters
+        files = partition_files(self.source)
+        partitions = select_partitions(self.source, filters["start_date"], filters["end_date"])
+
+        # A few ranges per worker evens out uneven line lengths
+        parts = 1 if self.workers == 1 else max(1, self.workers * 4 // max(1, len(partitions)))
+
+        tasks = []
+        for filename, _ in partitions:
+            try:
+                encoding = detect_encoding(filename)
+            except FileNotFoundError:
+                print(f"Error: File '{filename}' not found.")
+                continue
+            tasks.extend(
+                (filename, range_start, range_end, encoding)
+                for range_start, range_end in split_line_ranges(filename, parts)
+            )
+
+        return tasks, len(files), len(partitions)
+
+    def explain(self):
+        """
+        Describes the plan collect() would run, one step per line. Only
+        file names and headers are looked at.
+
+        Returns: string
+        """
+
+        plan = self._plan()
+        tasks, files, selected = self._tasks()
+        filters = self.filters
+        pruned = [column for column in COLUMNS if column not in plan["columns"]]
+
+        steps = [
+            ("scan", f"{self.source}: {selected} of {files} file(s), "
+                     f"{len(tasks)} byte range(s) on {self.workers} worker(s)")
+        ]
+
+        if plan["region_bytes"] is not None:
+            steps.append(("pushdown", f"drop lines without {plan['region_bytes']!r} before decoding"))
+
+        checks = ["non-empty Region, TransactionID/ProductID/CustomerID prefixes"]
+        if plan["region"] is not None:
+            checks.append(f"Region == {plan['region']!r}")
+        steps.append(("validate", "; ".join(checks) + " (before numeric parsing)"))
+
+        steps.append((
+            "parse",
+            "Quantity, UnitPrice, Date; Quantity > 0, UnitPrice > 0"
+        ))
+
+        row_filters = []
+        if filters["start_date"] or filters["end_date"]:
+            row_filters.append(f"Date {filters['start_date'] or '...'} to {filters['end_date'] or '...'}")
+        if filters["min_amount"] is not None:
+            row_filters.append(f"amount >= {filters['min_amount']}")
+        if filters["max_amount"] is not None:
+            row_filters.append(f"amount <= {filters['max_amount']}")
+        if row_filters:
+            steps.append(("filter", ", ".join(row_filters)))
+
+        build = "build " + ", ".join(plan["columns"])
+        if pruned:
+            build += "; skip " + ", ".join(pruned)
+        steps.append(("columns", build))
+
+        if plan["summary"]:
+            target = "one SalesSummary per range, merged"
+        else:
+            target = "the merged pruned table"
+        steps.append(("aggregate", ", ".join(plan["names"]) + " from " + target))
+
+        return "\n".join(f"{step:<10} {detail}" for step, detail in steps)
+
+    def collect(self):
+        """
+        Runs the plan
+
+        Returns: {aggregate: result} for every requested aggregate ("rows"
+        alone when none was), plus "counts": how many lines were read and
+        how many rows each check dropped (see scan_range)
+        """
+
+        plan = self._plan()
+        tasks, _, _ = self._tasks()
+
+        if self.workers == 1:
+            partials = [scan_range(*task, plan) for task in tasks]
+        else:
+            with process_pool(self.workers) as pool:
+                futures = [pool.submit(scan_range, *task, plan) for task in tasks]
+                partials = [future.result() for future in futures]
+
+        counts = dict.fromkeys(SCAN_COUNTS, 0)
+        rows = TransactionTable() if plan["keep_rows"] else None
+        summary = SalesSummary() if plan["summary"] else None
+
+        # Merged in task order, so rows keep file order
+        for partial in partials:
+            for key, value in partial["counts"].items():
+                counts[key] += value
+            if rows is not None:
+                rows.extend(partial["rows"])
+            if summary is not None:
+                summary.merge(partial["summary"])
+
+        source = summary if summary is not None else rows
+        results = {}
+        for name in plan["names"]:
+            if name == "rows":
+                results[name] = rows
+            elif name == "summary":
+                results[name] = summary
+            else:
+                results[name] = AGGREGATES[name][0](source, **self.aggregates.get(name, {}))
+
+        results["counts"] = counts
+        return results
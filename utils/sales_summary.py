@@ -0,0 +1,506 @@
+import math
+from datetime import date
+
+from utils import vectorized
+from utils.sketches import Approximation, CountMinSketch, HyperLogLog, SpaceSaving, hash128
+from utils.time_rollup import TimeRollup
+from utils.transaction_table import TransactionTable
+
+
+# Money sums are kept as short lists of floats whose exact sum is the
+# exact total; a list is compacted once it grows past this length
+PARTS_LIMIT = 64
+
+
+def exact_partials(values):
+    """
+    Returns a few non-overlapping floats whose exact sum equals the exact
+    sum of values
+    """
+
+    values = list(values)
+    partials = []
+
+    while True:
+        # fsum is correctly rounded, so it only returns 0.0 once nothing
+        # is left of the exact sum
+        total = math.fsum(values)
+        if not total:
+            return partials
+        partials.append(total)
+        values.append(-total)
+
+
+class SalesSummary:
+    """
+    Every aggregate the analytics functions and the sales report need,
+    accumulated in a single pass over the transactions.
+
+    The analytics functions in data_processor accept a SalesSummary in
+    place of the transactions and read their figures from it instead of
+    rescanning. More rows can be folded in later with update(), and
+    summaries of separate chunks combined with merge().
+
+    Money sums are exact until they are read (then correctly rounded), so
+    the figures do not depend on row order or on how the rows were split.
+
+    With approximate (an Approximation) the customer and daily sets are
+    replaced by fixed-size sketches: unique counts come from HyperLogLogs,
+    only the top customers by spend are tracked (Space-Saving) and purchase
+    counts come from a Count-Min sketch. Memory then no longer grows with
+    the number of customers.
+    """
+
+    def __init__(self, approximate=None):
+        self.approximate = approximate
+        self.revenue_parts = []
+        self.transaction_count = 0
+
+        # region -> [total_sales parts, transaction_count]
+        self.regions = {}
+        # product name -> [total_quantity, total_revenue parts]
+        self.products = {}
+        # date -> [revenue parts, transaction_count, customer ids, quantity]
+        self.daily = {}
+        # TimeRollup over daily, built on first use
+        self._rollup = None
+
+        if approximate is None:
+            # stripped customer id -> [total_spent parts, purchase_count, product names]
+            self.customers = {}
+            self.customer_counts = None
+        else:
+            # top stripped customer ids -> [total_spent, spend error, product HyperLogLog]
+            self.customers = SpaceSaving(approximate.top_customers)
+            # stripped customer id -> purchase_count, for every customer
+            self.customer_counts = approximate.new_counts()
+
+    def __len__(self):
+        return self.transaction_count
+
+    def _new_set(self):
+        if self.approximate is None:
+            return set()
+        return self.approximate.new_cardinality()
+
+    @property
+    def total_revenue(self):
+        return math.fsum(self.revenue_parts)
+
+    @staticmethod
+    def add_parts(parts, values):
+        """
+        Adds values to a money sum kept as parts, in place
+        """
+
+        parts.extend(values)
+        if len(parts) > PARTS_LIMIT:
+            parts[:] = exact_partials(parts)
+
+    @classmethod
+    def from_transactions(cls, transactions, approximate=None):
+        """
+        Builds a summary from a list of transactions or a TransactionTable
+        """
+
+        summary = cls(approximate)
+        summary.update(transactions)
+        return summary
+
+    def update(self, transactions):
+        """
+        Folds more transactions into the summary
+        """
+
+        approximate = self.approximate
+        self._rollup = None
+
+        if isinstance(transactions, TransactionTable) and approximate is None:
+            if vectorized.ENABLED:
+                vectorized.update_summary(self, transactions)
+            else:
+                self._update_table(transactions)
+            return
+
+        if isinstance(transactions, TransactionTable):
+            day_names = {}
+            for day in set(transactions.date):
+                day_names[day] = date.fromordinal(day).isoformat()
+
+            rows = zip(
+                (day_names[day] for day in transactions.date),
+                (transactions.product_name.categories[c] for c in transactions.product_name.codes),
+                transactions.quantity,
+                transactions.unit_price,
+                (transactions.customer_id.categories[c] for c in transactions.customer_id.codes),
+                (transactions.region.categories[c] for c in transactions.region.codes)
+            )
+        else:
+            rows = (
+                (
+                    tx["Date"], tx["ProductName"], tx["Quantity"],
+                    tx["UnitPrice"], tx["CustomerID"], tx["Region"]
+                )
+                for tx in transactions
+            )
+
+        regions = self.regions
+        products = self.products
+        customers = self.customers
+        daily = self.daily
+        revenue_parts = self.revenue_parts
+        customer_counts = self.customer_counts
+        new_set = self._new_set
+        product_hashes = {}
+        count = 0
+
+        def add(parts, amount):
+            parts.append(amount)
+            if len(parts) > PARTS_LIMIT:
+                parts[:] = exact_partials(parts)
+
+        for date_str, product, quantity, unit_price, customer, region in rows:
+            amount = quantity * unit_price
+            add(revenue_parts, amount)
+            count += 1
+
+            stats = regions.get(region)
+            if stats is None:
+                stats = regions[region] = [[], 0]
+            add(stats[0], amount)
+            stats[1] += 1
+
+            stats = products.get(product)
+            if stats is None:
+                stats = products[product] = [0, []]
+            stats[0] += quantity
+            add(stats[1], amount)
+
+            customer_id = customer.strip()
+            if customer_id and approximate is None:
+                stats = customers.get(customer_id)
+                if stats is None:
+                    stats = customers[customer_id] = [[], 0, set()]
+                add(stats[0], amount)
+                stats[1] += 1
+                stats[2].add(product)
+            elif customer_id:
+                # Each id and product name is hashed once for all sketches
+                customer_hash = hash128(customer_id)
+                customer_counts.add_hash(customer_hash)
+                product_hash = product_hashes.get(product)
+                if product_hash is None:
+                    product_hash = product_hashes[product] = hash128(product) >> 64
+                customers.add(customer_id, amount, new_set)[2].add_hash(product_hash)
+
+            stats = daily.get(date_str)
+            if stats is None:
+                stats = daily[date_str] = [[], 0, new_set(), 0]
+            add(stats[0], amount)
+            stats[1] += 1
+            stats[3] += quantity
+            # The id's hash is reused when it was taken from this row; a
+            # blank or padded id is hashed as written, like the exact mode
+            if approximate is not None and customer_id and customer == customer_id:
+                stats[2].add_hash(customer_hash >> 64)
+            else:
+                stats[2].add(customer)
+
+        self.transaction_count += count
+
+    def _update_table(self, table):
+        """
+        Folds a TransactionTable in by its integer codes. Each code is
+        mapped to its string and its stats entry once, on first sight,
+        giving the same state as the row loop.
+        """
+
+        names = table.region.categories
+        product_names = table.product_name.categories
+        customer_names = table.customer_id.categories
+
+        # code -> stats entry of the summary, None until first seen
+        region_stats = [None] * len(names)
+        product_stats = [None] * len(product_names)
+        customer_stats = [None] * len(customer_names)
+        day_stats = {}
+
+        # Customer IDs are grouped after stripping, blank ones are skipped
+        customer_keys = [name.strip() for name in customer_names]
+
+        regions = self.regions
+        products = self.products
+        customers = self.customers
+        daily = self.daily
+        amounts = []
+        touched = []
+
+        for day, product, quantity, unit_price, customer, region in zip(
+            table.date,
+            table.product_name.codes,
+            table.quantity,
+            table.unit_price,
+            table.customer_id.codes,
+            table.region.codes
+        ):
+            amount = quantity * unit_price
+            amounts.append(amount)
+
+            stats = region_stats[region]
+            if stats is None:
+                stats = region_stats[region] = regions.setdefault(names[region], [[], 0])
+                touched.append(stats[0])
+            stats[0].append(amount)
+            stats[1] += 1
+
+            name = product_names[product]
+            stats = product_stats[product]
+            if stats is None:
+                stats = product_stats[product] = products.setdefault(name, [0, []])
+                touched.append(stats[1])
+            stats[0] += quantity
+            stats[1].append(amount)
+
+            stats = customer_stats[customer]
+            if stats is None and customer_keys[customer]:
+                stats = customer_stats[customer] = customers.setdefault(customer_keys[customer], [[], 0, set()])
+                touched.append(stats[0])
+            if stats is not None:
+                stats[0].append(amount)
+                stats[1] += 1
+                stats[2].add(name)
+
+            stats = day_stats.get(day)
+            if stats is None:
+                stats = day_stats[day] = daily.setdefault(date.fromordinal(day).isoformat(), [[], 0, set(), 0])
+                touched.append(stats[0])
+            stats[0].append(amount)
+            stats[1] += 1
+            stats[3] += quantity
+            stats[2].add(customer_names[customer])
+
+        self.add_parts(self.revenue_parts, amounts)
+        self.transaction_count += len(amounts)
+
+        # The money sums grew by a whole table, compact them once
+        for parts in touched:
+            if len(parts) > PARTS_LIMIT:
+                parts[:] = exact_partials(parts)
+
+    def merge(self, other):
+        """
+        Folds another summary, built from the rows that follow this one's,
+        into this summary. Merging partial summaries in row order gives the
+        same figures as one update() over all the rows.
+        """
+
+        if other.approximate != self.approximate:
+            if not other.transaction_count:
+                return self
+            if self.transaction_count:
+                raise ValueError("Cannot merge summaries built in different modes")
+            # An empty summary takes the mode of the first one merged in
+            self.__init__(other.approximate)
+
+        self._rollup = None
+        add_parts = self.add_parts
+        add_parts(self.revenue_parts, other.revenue_parts)
+        self.transaction_count += other.transaction_count
+
+        for region, stats in other.regions.items():
+            mine = self.regions.setdefault(region, [[], 0])
+            add_parts(mine[0], stats[0])
+            mine[1] += stats[1]
+
+        for product, stats in other.products.items():
+            mine = self.products.setdefault(product, [0, []])
+            mine[0] += stats[0]
+            add_parts(mine[1], stats[1])
+
+        if self.approximate is None:
+            for customer_id, stats in other.customers.items():
+                mine = self.customers.setdefault(customer_id, [[], 0, set()])
+                add_parts(mine[0], stats[0])
+                mine[1] += stats[1]
+                mine[2] |= stats[2]
+        else:
+            self.customers.merge(other.customers, HyperLogLog.merge, HyperLogLog.copy)
+            self.customer_counts.merge(other.customer_counts)
+
+        for date_str, stats in other.daily.items():
+            mine = self.daily.get(date_str)
+            if mine is None:
+                mine = self.daily[date_str] = [[], 0, self._new_set(), 0]
+            add_parts(mine[0], stats[0])
+            mine[1] += stats[1]
+            mine[3] += stats[3]
+            if self.approximate is None:
+                mine[2] |= stats[2]
+            else:
+                mine[2].merge(stats[2])
+
+        return self
+
+    def to_dict(self):
+        """
+        Returns the summary state as JSON-serializable data
+        """
+
+        data = {
+            "revenue_parts": self.revenue_parts,
+            "transaction_count": self.transaction_count,
+            "regions": self.regions,
+            "products": self.products
+        }
+
+        if self.approximate is None:
+            data["customers"] = {
+                customer_id: [stats[0], stats[1], sorted(stats[2])]
+                for customer_id, stats in self.customers.items()
+            }
+            data["daily"] = {
+                date_str: [stats[0], stats[1], sorted(stats[2]), stats[3]]
+                for date_str, stats in self.daily.items()
+            }
+            return data
+
+        data["approximate"] = self.approximate.to_dict()
+        data["customers"] = {
+            customer_id: [stats[0], stats[1], stats[2].to_dict()]
+            for customer_id, stats in self.customers.entries.items()
+        }
+        data["customer_counts"] = self.customer_counts.to_dict()
+        data["daily"] = {
+            date_str: [stats[0], stats[1], stats[2].to_dict(), stats[3]]
+            for date_str, stats in self.daily.items()
+        }
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuilds a summary from to_dict() output
+        """
+
+        approximate = data.get("approximate")
+        if approximate is not None:
+            approximate = Approximation.from_dict(approximate)
+
+        summary = cls(approximate)
+        summary.revenue_parts = list(data["revenue_parts"])
+        summary.transaction_count = data["transaction_count"]
+        summary.regions = {
+            region: [list(stats[0]), stats[1]]
+            for region, stats in data["regions"].items()
+        }
+        summary.products = {
+            product: [stats[0], list(stats[1])]
+            for product, stats in data["products"].items()
+        }
+
+        if approximate is None:
+            summary.customers = {
+                customer_id: [list(stats[0]), stats[1], set(stats[2])]
+                for customer_id, stats in data["customers"].items()
+            }
+            summary.daily = {
+                date_str: [list(stats[0]), stats[1], set(stats[2]), stats[3]]
+                for date_str, stats in data["daily"].items()
+            }
+            return summary
+
+        summary.customers = SpaceSaving.from_entries(approximate.top_customers, {
+            customer_id: [stats[0], stats[1], HyperLogLog.from_dict(stats[2])]
+            for customer_id, stats in data["customers"].items()
+        })
+        summary.customer_counts = CountMinSketch.from_dict(data["customer_counts"])
+        summary.daily = {
+            date_str: [list(stats[0]), stats[1], HyperLogLog.from_dict(stats[2]), stats[3]]
+            for date_str, stats in data["daily"].items()
+        }
+        return summary
+
+    def rollup(self):
+        """
+        Returns the TimeRollup of the daily revenue, transaction count and
+        quantity, kept until more rows are folded in
+        """
+
+        if self._rollup is None:
+            self._rollup = TimeRollup.from_daily({
+                date_str: (math.fsum(stats[0]), stats[1], stats[3])
+                for date_str, stats in self.daily.items()
+            })
+        return self._rollup
+
+    def date_range(self):
+        """
+        Returns (first date, last date), or None when empty
+        """
+
+        if not self.daily:
+            return None
+        return min(self.daily), max(self.daily)
+
+    # The methods below return fresh dicts in the same shape the
+    # analytics functions build from raw transactions
+
+    def region_totals(self):
+        return {
+            region: {
+                "total_sales": math.fsum(stats[0]),
+                "transaction_count": stats[1]
+            }
+            for region, stats in self.regions.items()
+        }
+
+    def product_totals(self):
+        return {
+            product: {
+                "total_quantity": stats[0],
+                "total_revenue": math.fsum(stats[1])
+            }
+            for product, stats in self.products.items()
+        }
+
+    def customer_totals(self):
+        if self.approximate is not None:
+            # Only the top customers; spend may be overstated by up to
+            # spent_error, and products is a HyperLogLog
+            return {
+                customer_id: {
+                    "total_spent": stats[0],
+                    "spent_error": stats[1],
+                    "purchase_count": self.customer_counts.estimate(customer_id),
+                    "products": stats[2]
+                }
+                for customer_id, stats in self.customers.entries.items()
+            }
+
+        return {
+            customer_id: {
+                "total_spent": math.fsum(stats[0]),
+                "purchase_count": stats[1],
+                "products": stats[2]
+            }
+            for customer_id, stats in self.customers.items()
+        }
+
+    def daily_stats(self):
+        return {
+            date_str: {
+                "revenue": math.fsum(stats[0]),
+                "transaction_count": stats[1],
+                "unique_customers": stats[2]
+            }
+            for date_str, stats in self.daily.items()
+        }
+
+    def daily_totals(self):
+        return {
+            date_str: {
+                "revenue": math.fsum(stats[0]),
+                "count": stats[1]
+            }
+            for date_str, stats in self.daily.items()
+        }
@@ -0,0 +1,317 @@
+"""
+Fixed-size probabilistic summaries for the approximate SalesSummary mode.
+
+All hashing goes through blake2b rather than hash(), so sketches built in
+different worker processes (or saved and reloaded) can be merged.
+"""
+
+import base64
+import hashlib
+import math
+from array import array
+from heapq import heapify, heappop, heappush
+
+MASK64 = (1 << 64) - 1
+
+
+def hash128(value):
+    """
+    Returns a stable 128-bit hash of a string
+    """
+
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest(), "big")
+
+
+class Approximation:
+    """
+    Error bounds of the approximate mode.
+
+    cardinality_error: relative standard error of the unique counts
+    spend_error: tracked customers' spend overestimates by at most
+    spend_error times the total revenue
+    top_customers: customers tracked, 1 / spend_error unless given
+    count_error, count_confidence: purchase counts overestimate by at most
+    count_error times the number of transactions, with this probability
+
+    Every tracked customer keeps a HyperLogLog of its products, so memory
+    grows with top_customers. When customers spend alike, no capacity
+    short of their number can rank them; the report then leaves the
+    ranking out rather than print one its error bound does not support.
+    """
+
+    def __init__(self, cardinality_error=0.02, top_customers=None,
+                 count_error=0.0001, count_confidence=0.99, spend_error=0.001):
+        if not 0 < cardinality_error < 1 or not 0 < count_error < 1 or not 0 < spend_error < 1:
+            raise ValueError("Error bounds must be between 0 and 1")
+        if not 0 < count_confidence < 1:
+            raise ValueError("count_confidence must be between 0 and 1")
+        if top_customers is None:
+            # Space-Saving overestimates by at most total weight / capacity
+            top_customers = math.ceil(1 / spend_error)
+        if top_customers < 1:
+            raise ValueError("top_customers must be at least 1")
+
+        self.cardinality_error = cardinality_error
+        self.spend_error = spend_error
+        self.top_customers = top_customers
+        self.count_error = count_error
+        self.count_confidence = count_confidence
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def __eq__(self, other):
+        return isinstance(other, Approximation) and vars(self) == vars(other)
+
+    def new_cardinality(self):
+        return HyperLogLog(HyperLogLog.precision_for(self.cardinality_error))
+
+    def new_counts(self):
+        return CountMinSketch.for_error(self.count_error, 1 - self.count_confidence)
+
+
+class HyperLogLog:
+    """
+    Distinct count estimate in 2 ** precision bytes, with a relative
+    standard error of about 1.04 / sqrt(2 ** precision)
+    """
+
+    def __init__(self, precision=12, registers=None):
+        self.precision = precision
+        size = 1 << precision
+        self.registers = bytearray(size) if registers is None else bytearray(registers)
+        if len(self.registers) != size:
+            raise ValueError("Register count does not match the precision")
+
+    @staticmethod
+    def precision_for(error):
+        precision = math.ceil(math.log2((1.04 / error) ** 2))
+        return min(16, max(4, precision))
+
+    def add(self, value):
+        self.add_hash(hash128(value) >> 64)
+
+    def add_hash(self, h):
+        """
+        Adds a 64-bit hash
+        """
+
+        p = self.precision
+        index = h >> (64 - p)
+        rest = (h << p) & MASK64
+        rank = 65 - rest.bit_length() if rest else 65 - p
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self):
+        m = len(self.registers)
+        if m >= 128:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[m]
+
+        estimate = alpha * m * m / math.fsum(2.0 ** -r for r in self.registers)
+
+        # Linear counting is more accurate while many registers are empty
+        zeros = self.registers.count(0)
+        if zeros and estimate <= 2.5 * m:
+            estimate = m * math.log(m / zeros)
+        return estimate
+
+    def __len__(self):
+        return int(round(self.count()))
+
+    def copy(self):
+        return HyperLogLog(self.precision, self.registers)
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def to_dict(self):
+        return {
+            "precision": self.precision,
+            "registers": base64.b64encode(bytes(self.registers)).decode("ascii")
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["precision"], base64.b64decode(data["registers"]))
+
+
+class CountMinSketch:
+    """
+    Frequency estimates that never undercount and overcount by at most
+    epsilon * total with probability 1 - delta
+    """
+
+    def __init__(self, width, depth, table=None):
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.table = [array("q", bytes(8 * width)) for _ in range(depth)] if table is None else table
+
+    @classmethod
+    def for_error(cls, epsilon, delta):
+        return cls(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)))
+
+    def _columns(self, h):
+        # Double hashing derives every row's column from one 128-bit hash
+        h1 = h >> 64
+        h2 = (h & MASK64) | 1
+        width = self.width
+        return [(h1 + i * h2) % width for i in range(self.depth)]
+
+    def add_hash(self, h, count=1):
+        h1 = h >> 64
+        h2 = (h & MASK64) | 1
+        width = self.width
+        for row in self.table:
+            row[h1 % width] += count
+            h1 += h2
+        self.total += count
+
+    def add(self, value, count=1):
+        self.add_hash(hash128(value), count)
+
+    def estimate_hash(self, h):
+        return min(row[column] for row, column in zip(self.table, self._columns(h)))
+
+    def estimate(self, value):
+        return self.estimate_hash(hash128(value))
+
+    def merge(self, other):
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge Count-Min sketches of different size")
+        for row, other_row in zip(self.table, other.table):
+            for column, count in enumerate(other_row):
+                if count:
+                    row[column] += count
+        self.total += other.total
+        return self
+
+    def to_dict(self):
+        return {
+            "width": self.width,
+            "depth": self.depth,
+            "total": self.total,
+            "table": [base64.b64encode(row.tobytes()).decode("ascii") for row in self.table]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        table = []
+        for row in data["table"]:
+            values = array("q")
+            values.frombytes(base64.b64decode(row))
+            table.append(values)
+        sketch = cls(data["width"], data["depth"], table)
+        sketch.total = data["total"]
+        return sketch
+
+
+class SpaceSaving:
+    """
+    Keeps the capacity keys with the largest weight sums (Metwally et al.).
+
+    A key that is not tracked takes the place of the smallest one and
+    inherits its weight as error, so tracked weights overestimate by at
+    most their error, and any key heavier than the smallest tracked
+    weight is tracked. Each entry is [weight, error, payload].
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = {}
+        # One (weight, key) pair per tracked key. Weights only grow, so a
+        # pair's weight is a lower bound that is refreshed when popped.
+        self._heap = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    @classmethod
+    def from_entries(cls, capacity, entries):
+        summary = cls(capacity)
+        summary.entries = entries
+        summary._rebuild_heap()
+        return summary
+
+    def add(self, key, weight, new_payload):
+        """
+        Adds weight to key
+
+        Returns: the key's entry
+        """
+
+        entries = self.entries
+        entry = entries.get(key)
+
+        if entry is None:
+            if len(entries) < self.capacity:
+                entry = entries[key] = [0.0, 0.0, new_payload()]
+            else:
+                smallest = self._pop_smallest()
+                floor = entries.pop(smallest)[0]
+                entry = entries[key] = [floor, floor, new_payload()]
+            heappush(self._heap, (entry[0], key))
+
+        entry[0] += weight
+        return entry
+
+    def _pop_smallest(self):
+        heap = self._heap
+        entries = self.entries
+        while True:
+            weight, key = heappop(heap)
+            current = entries[key][0]
+            if current == weight:
+                return key
+            heappush(heap, (current, key))
+
+    def _rebuild_heap(self):
+        self._heap = [(entry[0], key) for key, entry in self.entries.items()]
+        heapify(self._heap)
+
+    def floor(self):
+        """
+        Weight an untracked key may have at most
+        """
+
+        if len(self.entries) < self.capacity:
+            return 0.0
+        return min(entry[0] for entry in self.entries.values())
+
+    def merge(self, other, merge_payload, copy_payload):
+        """
+        Combines two summaries; keys missing on one side get that side's
+        floor added to their weight and error. Payloads of other are
+        copied, never shared.
+        """
+
+        floor = self.floor()
+        other_floor = other.floor()
+        merged = {}
+
+        for key, (weight, error, payload) in self.entries.items():
+            merged[key] = [weight + other_floor, error + other_floor, payload]
+
+        for key, (weight, error, payload) in other.entries.items():
+            entry = merged.get(key)
+            if entry is None:
+                merged[key] = [weight + floor, error + floor, copy_payload(payload)]
+            else:
+                entry[0] += weight - other_floor
+                entry[1] += error - other_floor
+                entry[2] = merge_payload(entry[2], payload)
+
+        kept = sorted(merged.items(), key=lambda item: item[1][0], reverse=True)[:self.capacity]
+        self.entries = dict(kept)
+        self._rebuild_heap()
+        return self
@@ -0,0 +1,258 @@
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+
+PERIODS = ("day", "week", "month")
+
+
+def _ordinal(day):
+    """
+    Returns the integer day of an ISO date string, a date or an ordinal
+    """
+
+    if isinstance(day, str):
+        return date.fromisoformat(day).toordinal()
+    if isinstance(day, date):
+        return day.toordinal()
+    return int(day)
+
+
+def _prefix_sums(values):
+    """
+    Returns the correctly rounded sum of every prefix of values, starting
+    with the empty one. The running sum is kept exactly as non-overlapping
+    partials (Shewchuk), so no rounding error builds up along the axis.
+    """
+
+    prefix = array("d", [0.0])
+    partials = []
+
+    for x in values:
+        i = 0
+        for y in partials:
+            if abs(x) < abs(y):
+                x, y = y, x
+            high = x + y
+            low = y - (high - x)
+            if low:
+                partials[i] = low
+                i += 1
+            x = high
+        partials[i:] = [x]
+        prefix.append(math.fsum(partials))
+
+    return prefix
+
+
+class TimeRollup:
+    """
+    Revenue, transaction count and quantity per day with sales, on a
+    sparse axis of integer days (date ordinals) in date order; days
+    without sales are not stored and count as zero.
+
+    Prefix sums answer the totals of any date range with two binary
+    searches, and the peak day of a range comes from a sparse table built
+    on the first peak query. Everything is sized by the number of days
+    with sales, not the span between them.
+    """
+
+    def __init__(self, days=(), revenue=(), count=(), quantity=()):
+        self.days = array("l", days)
+        self.revenue = array("d", revenue)
+        self.count = array("q", count)
+        self.quantity = array("q", quantity)
+
+        if not len(self.days) == len(self.revenue) == len(self.count) == len(self.quantity):
+            raise ValueError("Rollup columns differ in length")
+        if any(a >= b for a, b in zip(self.days, self.days[1:])):
+            raise ValueError("Rollup days must be distinct and in order")
+
+        self.revenue_prefix = _prefix_sums(self.revenue)
+        self.count_prefix = array("q", [0])
+        self.quantity_prefix = array("q", [0])
+        for count, quantity in zip(self.count, self.quantity):
+            self.count_prefix.append(self.count_prefix[-1] + count)
+            self.quantity_prefix.append(self.quantity_prefix[-1] + quantity)
+
+        self.peaks = None
+
+    @classmethod
+    def from_daily(cls, daily):
+        """
+        Builds a rollup from {ISO date: (revenue, count, quantity)}. Keys
+        that are not ISO dates have no place on the axis and are left out.
+        """
+
+        days = {}
+        for date_str, stats in daily.items():
+            try:
+                day = date.fromisoformat(date_str).toordinal()
+            except (TypeError, ValueError):
+                continue
+            days[day] = stats
+
+        ordered = sorted(days)
+        return cls(
+            ordered,
+            [days[day][0] for day in ordered],
+            [days[day][1] for day in ordered],
+            [days[day][2] for day in ordered]
+        )
+
+    def __len__(self):
+        return len(self.days)
+
+    def _build_peaks(self):
+        # peaks[k][i] is the index of the highest revenue among the 2 ** k
+        # entries from i, the earliest one on ties
+        revenue = self.revenue
+        level = array("l", range(len(revenue)))
+        self.peaks = [level]
+        width = 1
+
+        while 2 * width <= len(revenue):
+            previous = level
+            level = array("l")
+            for i in range(len(revenue) - 2 * width + 1):
+                a = previous[i]
+                b = previous[i + width]
+                level.append(b if revenue[b] > revenue[a] else a)
+            self.peaks.append(level)
+            width *= 2
+
+    def _bounds(self, start, end):
+        """
+        Returns the entry slice [lo, hi) covering start to end inclusive,
+        either of which may be None for an open end
+        """
+
+        lo = 0 if start is None else bisect_left(self.days, _ordinal(start))
+        hi = len(self.days) if end is None else bisect_right(self.days, _ordinal(end))
+        return lo, max(lo, hi)
+
+    def totals(self, start=None, end=None):
+        """
+        Returns: (revenue, transaction count, quantity) from start to end,
+        inclusive
+        """
+
+        lo, hi = self._bounds(start, end)
+        return (
+            self.revenue_prefix[hi] - self.revenue_prefix[lo],
+            self.count_prefix[hi] - self.count_prefix[lo],
+            self.quantity_prefix[hi] - self.quantity_prefix[lo]
+        )
+
+    def peak(self, start=None, end=None):
+        """
+        Returns: (day, revenue, transaction count) of the day with the
+        highest revenue from start to end, the earliest one on ties, or
+        None if no day there has positive revenue
+        """
+
+        lo, hi = self._bounds(start, end)
+        if lo == hi:
+            return None
+
+        if self.peaks is None:
+            self._build_peaks()
+
+        k = (hi - lo).bit_length() - 1
+        level = self.peaks[k]
+        a = level[lo]
+        b = level[hi - (1 << k)]
+        i = b if self.revenue[b] > self.revenue[a] else a
+
+        if self.revenue[i] <= 0:
+            return None
+        return self.days[i], self.revenue[i], self.count[i]
+
+    def moving_average(self, window, start=None, end=None):
+        """
+        Returns: [(day, mean daily revenue over the window days ending on
+        it)] for every calendar day from start to end, clamped to the
+        first and last day with sales; days before the first average over
+        the days there are
+        """
+
+        if window < 1:
+            raise ValueError("window must be at least 1")
+
+        days = self.days
+        if not days:
+            return []
+
+        first = days[0]
+        lo_day = first if start is None else max(_ordinal(start), first)
+        hi_day = days[-1] if end is None else min(_ordinal(end), days[-1])
+
+        prefix = self.revenue_prefix
+        result = []
+
+        # Entries [lo, hi) are the days with sales in the window ending on day
+        lo = bisect_left(days, lo_day + 1 - window)
+        hi = bisect_left(days, lo_day)
+        for day in range(lo_day, hi_day + 1):
+            while hi < len(days) and days[hi] <= day:
+                hi += 1
+            while days[lo] <= day - window:
+                lo += 1
+            span = min(window, day - first + 1)
+            result.append((day, (prefix[hi] - prefix[lo]) / span))
+
+        return result
+
+    def buckets(self, period="day"):
+        """
+        Returns: {label: (revenue, transaction count, quantity)} per day
+        (YYYY-MM-DD), ISO week (YYYY-Www) or month (YYYY-MM) with sales,
+        in date order
+        """
+
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period '{period}', expected one of {', '.join(PERIODS)}")
+
+        result = {}
+        i = 0
+
+        # Each bucket takes the run of entries up to its last day
+        while i < len(self.days):
+            day = date.fromordinal(self.days[i])
+            if period == "day":
+                label = day.isoformat()
+                end = self.days[i]
+            elif period == "week":
+                year, week, weekday = day.isocalendar()
+                label = f"{year:04d}-W{week:02d}"
+                end = self.days[i] + 7 - weekday
+            else:
+                label = f"{day.year:04d}-{day.month:02d}"
+                if day.year == date.max.year and day.month == 12:
+                    end = date.max.toordinal()
+                else:
+                    following = date(day.year + day.month // 12, day.month % 12 + 1, 1)
+                    end = following.toordinal() - 1
+
+            j = bisect_right(self.days, end, i)
+            result[label] = (
+                self.revenue_prefix[j] - self.revenue_prefix[i],
+                self.count_prefix[j] - self.count_prefix[i],
+                self.quantity_prefix[j] - self.quantity_prefix[i]
+            )
+            i = j
+
+        return result
+
+    def to_dict(self):
+        return {
+            "days": self.days.tolist(),
+            "revenue": self.revenue.tolist(),
+            "count": self.count.tolist(),
+            "quantity": self.quantity.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["days"], data["revenue"], data["count"], data["quantity"])
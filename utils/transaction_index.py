@@ -0,0 +1,143 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+from utils.transaction_table import TransactionTable
+
+
+class TransactionIndex:
+    """
+    Region and amount indexes over validated transactions, built once so
+    that repeated region / amount filters do not rescan the rows.
+
+    Each region keeps its row numbers in row order and sorted by amount,
+    so a query is a dict lookup plus two bisects, and only the matching
+    rows are touched (and put back in row order). Pass the index to
+    validate_and_filter in place of the transactions, or call filter().
+    """
+
+    def __init__(self, transactions, total_input=None, invalid_count=0):
+        """
+        transactions must already be validated (a list of dicts or a
+        TransactionTable); total_input and invalid_count are the
+        validation counts reported in every filter summary
+        """
+
+        self.transactions = transactions
+        self.total_input = len(transactions) if total_input is None else total_input
+        self.invalid_count = invalid_count
+
+        if isinstance(transactions, TransactionTable):
+            self.amounts = transactions.amounts()
+            regions = transactions.region
+            region_of = regions.__getitem__
+        else:
+            self.amounts = array("d", [tx["Quantity"] * tx["UnitPrice"] for tx in transactions])
+            region_of = lambda i: transactions[i]["Region"]
+
+        # region -> row numbers in row order
+        self.region_rows = {}
+        for i in range(len(transactions)):
+            self.region_rows.setdefault(region_of(i), array("l")).append(i)
+
+        self.by_amount, self.sorted_amounts = self._sort_by_amount(range(len(transactions)))
+        # region -> (row numbers by amount, their amounts)
+        self.region_by_amount = {
+            region: self._sort_by_amount(rows)
+            for region, rows in self.region_rows.items()
+        }
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        """
+        Validates transactions (list or TransactionTable) and indexes the
+        valid ones
+        """
+
+        from utils.data_processor import validate_and_filter
+
+        valid, invalid_count, filter_summary = validate_and_filter(transactions)
+        return cls(valid, total_input=filter_summary["total_input"], invalid_count=invalid_count)
+
+    def __len__(self):
+        return len(self.transactions)
+
+    def _sort_by_amount(self, rows):
+        amounts = self.amounts
+        rows = array("l", sorted(rows, key=amounts.__getitem__))
+        return rows, array("d", [amounts[i] for i in rows])
+
+    def regions(self):
+        return list(self.region_rows)
+
+    def amount_range(self):
+        """
+        Returns (lowest amount, highest amount), or None when empty
+        """
+
+        if not self.sorted_amounts:
+            return None
+        return self.sorted_amounts[0], self.sorted_amounts[-1]
+
+    def count(self, region=None, min_amount=None, max_amount=None):
+        """
+        Counts matching rows without building them, in O(log n)
+        """
+
+        rows, amounts = self._candidates(region)
+        if rows is None:
+            return 0
+        start, end = self._amount_bounds(amounts, min_amount, max_amount)
+        return end - start
+
+    def select(self, region=None, min_amount=None, max_amount=None):
+        """
+        Returns the matching row numbers in row order
+        """
+
+        if min_amount is None and max_amount is None:
+            if region:
+                return self.region_rows.get(region, array("l"))
+            return range(len(self.transactions))
+
+        rows, amounts = self._candidates(region)
+        if rows is None:
+            return []
+        start, end = self._amount_bounds(amounts, min_amount, max_amount)
+        return sorted(rows[start:end])
+
+    def filter(self, region=None, min_amount=None, max_amount=None):
+        """
+        Same as validate_and_filter on the original transactions
+
+        Returns: (filtered transactions, invalid count, filter summary)
+        """
+
+        valid_count = len(self.transactions)
+        region_count = self.count(region) if region else valid_count
+        selected = self.select(region, min_amount, max_amount)
+
+        filter_summary = {
+            "total_input": self.total_input,
+            "invalid": self.invalid_count,
+            "filtered_by_region": valid_count - region_count,
+            "filtered_by_amount": region_count - len(selected),
+            "final_count": len(selected)
+        }
+
+        if isinstance(self.transactions, TransactionTable):
+            filtered = self.transactions.take(selected)
+        else:
+            filtered = [self.transactions[i] for i in selected]
+
+        return filtered, self.invalid_count, filter_summary
+
+    def _candidates(self, region):
+        if not region:
+            return self.by_amount, self.sorted_amounts
+        return self.region_by_amount.get(region, (None, None))
+
+    @staticmethod
+    def _amount_bounds(amounts, min_amount, max_amount):
+        start = 0 if min_amount is None else bisect_left(amounts, min_amount)
+        end = len(amounts) if max_amount is None else bisect_right(amounts, max_amount)
+        return start, max(start, end)
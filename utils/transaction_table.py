@@ -0,0 +1,232 @@
+import math
+from array import array
+from datetime import date
+
+
+FIELDS = [
+    "TransactionID", "Date", "ProductID", "ProductName",
+    "Quantity", "UnitPrice", "CustomerID", "Region"
+]
+
+# Quantities the int64 Quantity column holds
+QUANTITY_MIN = -(1 << 63)
+QUANTITY_MAX = (1 << 63) - 1
+
+
+def check_storable(quantity, unit_price):
+    """
+    Raises ValueError unless quantity fits the int64 Quantity column and
+    unit_price is a finite number
+    """
+
+    if not QUANTITY_MIN <= quantity <= QUANTITY_MAX:
+        raise ValueError(f"Quantity out of range: {quantity}")
+    if not math.isfinite(unit_price):
+        raise ValueError(f"Non-finite unit price: {unit_price}")
+
+
+class Categorical:
+    """
+    Column of repeated strings stored as integer codes into a list of
+    distinct values
+    """
+
+    def __init__(self, categories=None, lookup=None):
+        self.codes = array("l")
+        self.categories = categories if categories is not None else []
+        self.lookup = lookup if lookup is not None else {}
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        return self.categories[self.codes[i]]
+
+    def encode(self, value):
+        """
+        Returns the code for value, adding it as a new category if needed
+        """
+
+        code = self.lookup.get(value)
+        if code is None:
+            code = len(self.categories)
+            self.lookup[value] = code
+            self.categories.append(value)
+        return code
+
+    def append(self, value):
+        self.codes.append(self.encode(value))
+
+    def take(self, indices):
+        """
+        Returns a new column with the selected rows.
+
+        Categories are shared with this column, they are only ever appended
+        to, so codes stay valid in both.
+        """
+
+        column = Categorical(self.categories, self.lookup)
+        codes = self.codes
+        column.codes = array("l", [codes[i] for i in indices])
+        return column
+
+    def extend(self, other):
+        """
+        Appends the rows of another column, remapping its codes
+        """
+
+        remap = [self.encode(value) for value in other.categories]
+        self.codes.extend(remap[c] for c in other.codes)
+
+
+class TransactionTable:
+    """
+    Columnar store of sales transactions.
+
+    Quantity and UnitPrice are typed arrays, Region, ProductID, ProductName
+    and CustomerID are categorical codes and Date is stored as integer days
+    (proleptic Gregorian ordinal). Indexing or iterating the table gives the
+    same dict rows as parse_transactions, for backward compatibility.
+
+    Rows the columns cannot hold (a date not in YYYY-MM-DD form, a
+    quantity outside int64, a price that is not finite) are left out by
+    parse_transactions and counted in rejected, which validate_and_filter
+    reports as invalid.
+    """
+
+    def __init__(self):
+        self.transaction_id = []
+        self.date = array("l")
+        self.product_id = Categorical()
+        self.product_name = Categorical()
+        self.quantity = array("q")
+        self.unit_price = array("d")
+        self.customer_id = Categorical()
+        self.region = Categorical()
+        self.rejected = 0
+
+    def __len__(self):
+        # Quantity is the one column every scan builds, see pipeline
+        return len(self.quantity)
+
+    def __getitem__(self, i):
+        return self.row(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def append(self, transaction_id, date_str, product_id, product_name,
+               quantity, unit_price, customer_id, region):
+        """
+        Appends one parsed transaction.
+
+        Raises ValueError if the date is not in YYYY-MM-DD form or the
+        row fails check_storable; every check runs before any column is
+        touched, so nothing is appended in that case.
+        """
+
+        day = date.fromisoformat(date_str)
+        if day.isoformat() != date_str:
+            raise ValueError(f"Non-canonical date: {date_str}")
+        check_storable(quantity, unit_price)
+
+        self.transaction_id.append(transaction_id)
+        self.date.append(day.toordinal())
+        self.product_id.append(product_id)
+        self.product_name.append(product_name)
+        self.quantity.append(quantity)
+        self.unit_price.append(unit_price)
+        self.customer_id.append(customer_id)
+        self.region.append(region)
+
+    def extend(self, other):
+        """
+        Appends all rows of another table
+        """
+
+        self.transaction_id.extend(other.transaction_id)
+        self.date.extend(other.date)
+        self.product_id.extend(other.product_id)
+        self.product_name.extend(other.product_name)
+        self.quantity.extend(other.quantity)
+        self.unit_price.extend(other.unit_price)
+        self.customer_id.extend(other.customer_id)
+        self.region.extend(other.region)
+        self.rejected += other.rejected
+
+    def take(self, indices):
+        """
+        Returns a new table with the rows at the given indices, none of
+        the rejected ones
+        """
+
+        table = TransactionTable()
+        transaction_id = self.transaction_id
+        day = self.date
+        quantity = self.quantity
+        unit_price = self.unit_price
+
+        table.transaction_id = [transaction_id[i] for i in indices]
+        table.date = array("l", [day[i] for i in indices])
+        table.product_id = self.product_id.take(indices)
+        table.product_name = self.product_name.take(indices)
+        table.quantity = array("q", [quantity[i] for i in indices])
+        table.unit_price = array("d", [unit_price[i] for i in indices])
+        table.customer_id = self.customer_id.take(indices)
+        table.region = self.region.take(indices)
+        return table
+
+    def between(self, start=None, end=None):
+        """
+        Returns the rows dated from start to end, inclusive YYYY-MM-DD
+        dates (either may be None for an open end)
+        """
+
+        first = date.fromisoformat(start).toordinal() if start else None
+        last = date.fromisoformat(end).toordinal() if end else None
+        return self.take([
+            i for i, day in enumerate(self.date)
+            if (first is None or day >= first) and (last is None or day <= last)
+        ])
+
+    def amounts(self):
+        """
+        Returns Quantity * UnitPrice for every row
+        """
+
+        return array("d", [q * p for q, p in zip(self.quantity, self.unit_price)])
+
+    def row(self, i):
+        """
+        Returns row i as a transaction dictionary
+        """
+
+        return {
+            "TransactionID": self.transaction_id[i],
+            "Date": date.fromordinal(self.date[i]).isoformat(),
+            "ProductID": self.product_id[i],
+            "ProductName": self.product_name[i],
+            "Quantity": self.quantity[i],
+            "UnitPrice": self.unit_price[i],
+            "CustomerID": self.customer_id[i],
+            "Region": self.region[i]
+        }
+
+    def to_dicts(self):
+        """
+        Returns all rows as a list of transaction dictionaries
+        """
+
+        return list(self)
+
+    @classmethod
+    def from_dicts(cls, transactions):
+        """
+        Builds a table from a list of transaction dictionaries
+        """
+
+        table = cls()
+        for tx in transactions:
+            table.append(*(tx[field] for field in FIELDS))
+        return table
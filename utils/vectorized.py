@@ -0,0 +1,322 @@
+"""
+Optional NumPy backend for the TransactionTable group-bys (and the line
+index scan).
+
+Every sum is taken in row order (bincount / cumsum accumulate
+sequentially), so results are bit-for-bit identical to the pure Python
+loops. Groups are returned in first-seen order and the final rounding and
+sorting is left to data_processor, so ties still break the same way.
+"""
+
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Selected automatically when NumPy is installed, set to False to force
+# the pure Python loops
+ENABLED = np is not None
+
+# Byte values str.strip() removes
+WHITESPACE = list(b" \t\r\n\f\v")
+
+
+def column(values):
+    """
+    Returns a zero-copy NumPy view of an array column
+    """
+
+    return np.frombuffer(values, dtype=values.typecode)
+
+
+def amounts(table):
+    """
+    Returns Quantity * UnitPrice for every row as a float64 array
+    """
+
+    return column(table.quantity) * column(table.unit_price)
+
+
+def _first_seen(codes, size):
+    """
+    Returns the row index where each code first appears (len(codes) if it
+    never does)
+    """
+
+    first = np.full(size, len(codes), dtype=np.int64)
+    np.minimum.at(first, codes, np.arange(len(codes), dtype=np.int64))
+    return first
+
+
+def group_sums(codes, weights, size):
+    """
+    Sums weights per code in row order.
+
+    Returns (order, sums, counts): the codes present in first-seen order
+    and per-code sums and counts as Python lists.
+    """
+
+    first = _first_seen(codes, size)
+    present = np.flatnonzero(first < len(codes))
+    order = present[np.argsort(first[present], kind="stable")]
+
+    sums = np.bincount(codes, weights=weights, minlength=size)
+    counts = np.bincount(codes, minlength=size)
+    return order.tolist(), sums.tolist(), counts.tolist()
+
+
+def running_total(values):
+    """
+    Adds values up one at a time, like a Python loop would
+    """
+
+    if not len(values):
+        return 0.0
+    return float(np.cumsum(values)[-1])
+
+
+def day_codes(table):
+    """
+    Returns (codes, first_day): dates as offsets from the earliest day
+    """
+
+    days = column(table.date)
+    first_day = int(days.min())
+    return days - first_day, first_day
+
+
+def distinct_pairs(left, right, right_size):
+    """
+    Returns the distinct (left, right) code pairs as two arrays, sorted by
+    left code
+    """
+
+    pairs = np.sort(left.astype(np.int64) * right_size + right)
+    if len(pairs):
+        keep = np.empty(len(pairs), dtype=bool)
+        keep[0] = True
+        np.not_equal(pairs[1:], pairs[:-1], out=keep[1:])
+        pairs = pairs[keep]
+    return pairs // right_size, pairs % right_size
+
+
+def add_pairs_to_sets(left, right, sets_by_left, right_names):
+    """
+    Adds right_names[right] to sets_by_left[left] for every pair from
+    distinct_pairs, one set.update per left code
+    """
+
+    if not len(left):
+        return
+
+    starts = np.flatnonzero(np.diff(left)) + 1
+    bounds = [0] + starts.tolist() + [len(left)]
+    left = left[bounds[:-1]].tolist()
+    right = right.tolist()
+
+    for code, start, end in zip(left, bounds, bounds[1:]):
+        sets_by_left[code].update([right_names[r] for r in right[start:end]])
+
+
+def line_offsets(data, start):
+    """
+    Scans a bytes-like object (without copying it) for the lines from
+    offset start on, ended by a newline or a lone \r, leaving out blank
+    ones
+
+    Returns: uint64 array of line start offsets followed by the end of
+    the data
+    """
+
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    size = len(buffer)
+    if start >= size:
+        return np.array([size], dtype=np.uint64)
+
+    tail = buffer[start:]
+    breaks = tail == 10
+    lone = tail == 13
+    lone[:-1] &= tail[1:] != 10
+    breaks |= lone
+    starts = np.flatnonzero(breaks) + (start + 1)
+    starts = np.concatenate(([start], starts[starts < size], [size]))
+
+    # Only lines starting with whitespace can be blank
+    keep = np.ones(len(starts), dtype=bool)
+    for i in np.flatnonzero(np.isin(buffer[starts[:-1]], WHITESPACE)).tolist():
+        keep[i] = bool(bytes(buffer[starts[i]:starts[i + 1]]).strip())
+
+    return starts[keep].astype(np.uint64)
+
+
+def total_revenue(table):
+    return running_total(amounts(table))
+
+
+def region_totals(table):
+    categories = table.region.categories
+    amount = amounts(table)
+    order, sales, counts = group_sums(column(table.region.codes), amount, len(categories))
+
+    region_stats = {
+        categories[code]: {
+            "total_sales": sales[code],
+            "transaction_count": counts[code]
+        }
+        for code in order
+    }
+
+    return region_stats, running_total(amount)
+
+
+def product_totals(table):
+    categories = table.product_name.categories
+    codes = column(table.product_name.codes)
+    quantity = column(table.quantity)
+    order, revenues, _ = group_sums(codes, amounts(table), len(categories))
+    quantities = np.bincount(codes, weights=quantity, minlength=len(categories))
+
+    return {
+        categories[code]: {
+            "total_quantity": int(quantities[code]),
+            "total_revenue": revenues[code]
+        }
+        for code in order
+    }
+
+
+def daily_sales_trend(table):
+    if not len(table):
+        return {}
+
+    codes, first_day = day_codes(table)
+    size = int(codes.max()) + 1
+    _, revenues, counts = group_sums(codes, amounts(table), size)
+
+    customers = table.customer_id
+    days, _ = distinct_pairs(codes, column(customers.codes), len(customers.categories))
+    unique_customers = np.bincount(days, minlength=size).tolist()
+
+    return {
+        date.fromordinal(first_day + code).isoformat(): {
+            "revenue": round(revenues[code], 2),
+            "transaction_count": counts[code],
+            "unique_customers": unique_customers[code]
+        }
+        for code in range(size)
+        if counts[code]
+    }
+
+
+def daily_totals(table):
+    if not len(table):
+        return {}
+
+    codes, first_day = day_codes(table)
+    order, revenues, counts = group_sums(codes, amounts(table), int(codes.max()) + 1)
+
+    return {
+        date.fromordinal(first_day + code).isoformat(): {
+            "revenue": revenues[code],
+            "count": counts[code]
+        }
+        for code in order
+    }
+
+
+def grouped_values(codes, values, size):
+    """
+    Groups values by code, keeping row order within each group.
+
+    Returns (order, counts, groups): the codes present in first-seen
+    order, per-code counts and a function giving one code's values as a
+    Python list.
+    """
+
+    first = _first_seen(codes, size)
+    present = np.flatnonzero(first < len(codes))
+    order = present[np.argsort(first[present], kind="stable")]
+
+    counts = np.bincount(codes, minlength=size)
+    ends = np.cumsum(counts).tolist()
+    counts = counts.tolist()
+    ordered = values[np.argsort(codes, kind="stable")].tolist()
+
+    def groups(code):
+        return ordered[ends[code] - counts[code]:ends[code]]
+
+    return order.tolist(), counts, groups
+
+
+def update_summary(summary, table):
+    """
+    Folds a TransactionTable into a SalesSummary with vectorized
+    group-bys, giving the same state as SalesSummary.update's row loop
+    """
+
+    if not len(table):
+        return
+
+    add_parts = summary.add_parts
+    amount = amounts(table)
+    quantity = column(table.quantity)
+
+    # Regions
+    names = table.region.categories
+    order, counts, groups = grouped_values(column(table.region.codes), amount, len(names))
+    for code in order:
+        stats = summary.regions.setdefault(names[code], [[], 0])
+        add_parts(stats[0], groups(code))
+        stats[1] += counts[code]
+
+    # Products
+    product_names = table.product_name.categories
+    product_codes = column(table.product_name.codes)
+    order, _, groups = grouped_values(product_codes, amount, len(product_names))
+    quantities = np.bincount(product_codes, weights=quantity, minlength=len(product_names)).tolist()
+    for code in order:
+        stats = summary.products.setdefault(product_names[code], [0, []])
+        stats[0] += int(quantities[code])
+        add_parts(stats[1], groups(code))
+
+    # Customers, grouped after stripping the ID
+    customer_names = table.customer_id.categories
+    canonical = {}
+    canonical_code = np.array(
+        [canonical.setdefault(name.strip(), code) for code, name in enumerate(customer_names)],
+        dtype=np.int64
+    )
+    customer_codes = column(table.customer_id.codes)
+    codes = canonical_code[customer_codes]
+    keep = np.array([bool(name.strip()) for name in customer_names], dtype=bool)[codes]
+    codes = codes[keep]
+    order, counts, groups = grouped_values(codes, amount[keep], len(customer_names))
+    for code in order:
+        stats = summary.customers.setdefault(customer_names[code].strip(), [[], 0, set()])
+        add_parts(stats[0], groups(code))
+        stats[1] += counts[code]
+
+    product_sets = {code: summary.customers[customer_names[code].strip()][2] for code in order}
+    left, right = distinct_pairs(codes, product_codes[keep], len(product_names))
+    add_pairs_to_sets(left, right, product_sets, product_names)
+
+    # Days
+    codes, first_day = day_codes(table)
+    order, counts, groups = grouped_values(codes, amount, int(codes.max()) + 1)
+    day_names = {code: date.fromordinal(first_day + code).isoformat() for code in order}
+    quantities = np.bincount(codes, weights=quantity, minlength=len(counts)).tolist()
+    for code in order:
+        stats = summary.daily.setdefault(day_names[code], [[], 0, set(), 0])
+        add_parts(stats[0], groups(code))
+        stats[1] += counts[code]
+        stats[3] += int(quantities[code])
+
+    customer_sets = {code: summary.daily[day_names[code]][2] for code in order}
+    left, right = distinct_pairs(codes, customer_codes, len(customer_names))
+    add_pairs_to_sets(left, right, customer_sets, customer_names)
+
+    add_parts(summary.revenue_parts, amount.tolist())
+    summary.transaction_count += len(table)